@@ -4,8 +4,14 @@ from io import BytesIO
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime
+from contextlib import contextmanager
+import functools
+import json
+import logging
 import re
 import os
+import time
+import uuid
 
 # 페이지 설정
 st.set_page_config(
@@ -14,6 +20,126 @@ st.set_page_config(
     layout="wide"
 )
 
+# ============= 재실행 프로파일링 =============
+# Streamlit은 위젯을 조작할 때마다 스크립트 전체를 다시 실행합니다.
+# PROFILE_RERUNS=1 로 실행하면 재실행마다 구간별(DB, Excel, 렌더링, 내보내기) 소요 시간을
+# 화면 하단의 접이식 패널과 로그 파일(PROFILE_LOG_FILE)에 남깁니다.
+PROFILE_RERUNS = os.getenv("PROFILE_RERUNS", "").lower() in {"1", "true", "yes"}
+PROFILE_LOG_FILE = os.getenv("PROFILE_LOG_FILE", "rerun_profile.log")
+
+
+@st.cache_resource
+def get_profile_logger():
+    """프로파일 로그 파일 (프로세스당 한 번 설정)"""
+    logger = logging.getLogger("rerun_profile")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:  # 스크립트가 수정되어 캐시가 새로 만들어져도 핸들러는 하나만
+        handler = logging.FileHandler(PROFILE_LOG_FILE, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+class RerunProfiler:
+    """스크립트 재실행 한 번의 구간별 소요 시간"""
+
+    def __init__(self, enabled, session_id="", run=0):
+        self.enabled = enabled
+        self.session_id = session_id
+        self.run = run
+        self.started_at = datetime.now()
+        self.sections = []  # (구분, 구간, 초)
+        self._start = time.perf_counter()
+        self._last = self._start
+        self._flushed = False
+
+    @contextmanager
+    def section(self, category, label):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last = time.perf_counter()
+            self.sections.append((category, label, self._last - start))
+
+    def profiled(self, category):
+        """함수 호출 한 번을 한 구간으로 기록하는 데코레이터"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.section(category, func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def totals(self):
+        totals = {}
+        for category, _, seconds in self.sections:
+            totals[category] = totals.get(category, 0.0) + seconds
+        return totals
+
+    def render(self):
+        """화면 하단 디버그 패널"""
+        if not self.enabled:
+            return
+        self._last = time.perf_counter()
+        elapsed = self._last - self._start
+        with st.expander(f"🛠 재실행 프로파일 #{self.run} ({elapsed * 1000:.0f} ms)", expanded=False):
+            st.markdown(" · ".join(
+                f"**{category}** {seconds * 1000:.1f} ms" for category, seconds in self.totals().items()
+            ) or "기록된 구간이 없습니다")
+            st.dataframe(
+                pd.DataFrame(
+                    [(category, label, round(seconds * 1000, 1)) for category, label, seconds in self.sections],
+                    columns=['구분', '구간', 'ms']
+                ),
+                use_container_width=True,
+                hide_index=True
+            )
+            st.caption(f"로그 파일: {PROFILE_LOG_FILE}")
+
+    def flush(self, interrupted=False):
+        """로그 파일에 재실행당 JSON 한 줄을 기록"""
+        if not self.enabled or self._flushed:
+            return
+        self._flushed = True
+        record = {
+            'started_at': self.started_at.isoformat(timespec='milliseconds'),
+            'session': self.session_id,
+            'run': self.run,
+            # st.rerun()/st.stop()으로 중간에 끝난 재실행은 마지막 구간까지만 잽니다
+            'interrupted': interrupted,
+            'total_ms': round((self._last - self._start) * 1000, 1),
+            'totals_ms': {category: round(seconds * 1000, 1) for category, seconds in self.totals().items()},
+            'sections': [
+                {'category': category, 'label': label, 'ms': round(seconds * 1000, 1)}
+                for category, label, seconds in self.sections
+            ],
+        }
+        try:
+            get_profile_logger().info(json.dumps(record, ensure_ascii=False))
+        except OSError as e:
+            st.warning(f"⚠️ 프로파일 로그 기록 오류: {str(e)}")
+
+
+if PROFILE_RERUNS:
+    # 직전 재실행이 st.rerun()으로 끊겼다면 여기서 기록을 마무리합니다
+    previous_profiler = st.session_state.get('_rerun_profiler')
+    if previous_profiler is not None:
+        previous_profiler.flush(interrupted=True)
+    profiler = RerunProfiler(
+        True,
+        session_id=st.session_state.setdefault('_profile_session', uuid.uuid4().hex[:8]),
+        run=previous_profiler.run + 1 if previous_profiler is not None else 1
+    )
+    st.session_state['_rerun_profiler'] = profiler
+else:
+    profiler = RerunProfiler(False)
+
 # 데이터베이스 연결 정보
 @st.cache_resource
 def get_db_connection():
@@ -32,9 +158,11 @@ def get_db_connection():
         st.error(f"❌ 데이터베이스 연결 오류: {str(e)}")
         st.stop()
 
-conn = get_db_connection()
+with profiler.section("DB", "get_db_connection"):
+    conn = get_db_connection()
 
-# 데이터베이스 초기화
+# 데이터베이스 초기화 (프로세스당 한 번; 실패하면 캐시되지 않아 다음 재실행에서 다시 시도)
+@st.cache_resource
 def init_db():
     """데이터베이스 테이블 생성"""
     cursor = conn.cursor()
@@ -72,13 +200,17 @@ def init_db():
         ''')
         
         conn.commit()
-    except Exception as e:
+    except Exception:
         conn.rollback()
-        st.error(f"❌ 테이블 생성 오류: {str(e)}")
+        raise
     finally:
         cursor.close()
 
-init_db()
+try:
+    with profiler.section("DB", "init_db"):
+        init_db()
+except Exception as e:
+    st.error(f"❌ 테이블 생성 오류: {str(e)}")
 
 # 제목
 st.title("📋 티켓츠 예매 관리 시스템")
@@ -110,6 +242,7 @@ with tab1:
         st.markdown("- 예스24")
     
     with col_content:
+        @profiler.profiled("Excel")
         def extract_performance_info(uploaded_file):
             """Excel 파일에서 공연 정보 추출"""
             try:
@@ -182,6 +315,7 @@ with tab1:
                 return None
         
         
+        @profiler.profiled("Excel")
         def parse_excel_file(uploaded_file):
             """Excel 파일 파싱"""
             try:
@@ -253,6 +387,7 @@ with tab1:
                 return [], '오류'
         
         
+        @profiler.profiled("DB")
         def save_to_database(performance_info, reservation_data):
             """데이터베이스에 저장"""
             cursor = conn.cursor()
@@ -421,6 +556,7 @@ with tab1:
 with tab2:
     st.header("📋 예약 리스트")
     
+    @profiler.profiled("DB")
     def get_all_performances():
         """모든 공연 목록 조회"""
         cursor = conn.cursor()
@@ -435,6 +571,7 @@ with tab2:
             cursor.close()
     
     
+    @profiler.profiled("DB")
     def get_performance_sessions(performance_name):
         """특정 공연의 회차 목록 조회"""
         cursor = conn.cursor()
@@ -450,6 +587,7 @@ with tab2:
             cursor.close()
     
     
+    @profiler.profiled("DB")
     def get_reservations(performance_id):
         """특정 공연 회차의 예약 리스트 조회"""
         query = '''
@@ -604,9 +742,11 @@ with tab2:
                     st.markdown(f"**검색 결과: {len(filtered_df)}건**")
                     
                     # 데이터 테이블
-                    st.dataframe(filtered_df, use_container_width=True, height=500)
+                    with profiler.section("렌더링", "st.dataframe"):
+                        st.dataframe(filtered_df, use_container_width=True, height=500)
                     
                     # 다운로드
+                    @profiler.profiled("내보내기")
                     def create_download_excel(df):
                         output = BytesIO()
                         with pd.ExcelWriter(output, engine='openpyxl') as writer:
@@ -636,3 +776,7 @@ with tab2:
                     3. "🔄 통합하고 저장하기" 버튼 클릭
                     4. "✅ 총 XX건이 저장되었습니다!" 메시지 확인
                     """)
+
+# ============= 프로파일 패널 =============
+profiler.render()
+profiler.flush()
@@ -1,9 +1,9 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from ..core.security import verify_access_token
+from ..core.security import bearer_subject
 from ..database import get_session
 from ..models import User
 
@@ -11,10 +11,13 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
 
 async def get_current_user(
+    request: Request,
     session: AsyncSession = Depends(get_session),
     token: str = Depends(oauth2_scheme),
 ) -> User:
-    email = verify_access_token(token)
+    # oauth2_scheme rejects requests without a token; the subject itself was
+    # already verified once for this request
+    email = bearer_subject(request.scope)
     if not email:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
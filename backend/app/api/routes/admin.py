@@ -1,22 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+import heapq
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...api.deps import get_active_admin
-from ...database import get_session
+from ...core.instrumentation import slow_query_samples
+from ...database import get_session, use_read_replica
 from ...models import FraudAlert, FraudStatus, User
-from ...schemas import FraudAlertRead, FraudAlertResolve
+from ...schemas import (
+    AuditLogPage,
+    CountRead,
+    FraudAlertPage,
+    FraudAlertRead,
+    FraudAlertResolve,
+    SlowQueryRead,
+)
+from ...services.audit_partitions import query_audit_logs
+from ...shards import shard_router
+from ...utils.cache import TTLCache
+from ...utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from ...utils.serialization import FastJSONResponse, row_dicts, schema_columns
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Unfiltered counts above this size come from planner statistics instead of COUNT(*).
+ESTIMATE_THRESHOLD = 100_000
+_count_cache: TTLCache[CountRead] = TTLCache(ttl=30.0, maxsize=256)
+FRAUD_ALERT_COLUMNS = schema_columns(FraudAlert, FraudAlertRead)
+
+
+def _fraud_alert_filters(
+    status: Optional[str],
+    min_score: Optional[float],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+) -> list:
+    conditions = []
+    if status is not None:
+        conditions.append(FraudAlert.status == status)
+    if min_score is not None:
+        conditions.append(FraudAlert.score >= min_score)
+    if created_from is not None:
+        conditions.append(FraudAlert.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(FraudAlert.created_at < created_to)
+    return conditions
 
-@router.get("/fraud-alerts", response_model=list[FraudAlertRead])
+
+@router.get("/fraud-alerts", response_model=FraudAlertPage, dependencies=[Depends(use_read_replica)])
 async def list_fraud_alerts(
+    status: Optional[str] = Query(None, pattern="^(open|reviewing|resolved)$"),
+    min_score: Optional[float] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_active_admin),
     session: AsyncSession = Depends(get_session),
 ):
-    result = await session.execute(select(FraudAlert))
-    return result.scalars().all()
+    conditions = _fraud_alert_filters(status, min_score, created_from, created_to)
+    query = select(*FRAUD_ALERT_COLUMNS).where(*conditions)
+    if cursor is not None:
+        created_at, alert_id = decode_cursor(cursor)
+        query = query.where(tuple_(FraudAlert.created_at, FraudAlert.id) < tuple_(created_at, alert_id))
+    query = query.order_by(FraudAlert.created_at.desc(), FraudAlert.id.desc()).limit(limit + 1)
+
+    result = await session.execute(query)
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return FastJSONResponse({"items": row_dicts(FRAUD_ALERT_COLUMNS, rows), "next_cursor": next_cursor})
+
+
+@router.get("/fraud-alerts/count", response_model=CountRead)
+async def count_fraud_alerts(
+    status: Optional[str] = Query(None, pattern="^(open|reviewing|resolved)$"),
+    min_score: Optional[float] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: User = Depends(get_active_admin),
+    session: AsyncSession = Depends(get_session),
+):
+    key = (status, min_score, created_from, created_to)
+    cached = _count_cache.get(key)
+    if cached is not None:
+        return cached
+
+    conditions = _fraud_alert_filters(status, min_score, created_from, created_to)
+    count = None
+    if not conditions and session.get_bind().dialect.name == "postgresql":
+        estimate = await session.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+            {"table": FraudAlert.__tablename__},
+        )
+        if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+            count = CountRead(count=estimate, estimated=True)
+    if count is None:
+        total = await session.scalar(select(func.count()).select_from(FraudAlert).where(*conditions))
+        count = CountRead(count=total or 0)
+
+    _count_cache.set(key, count)
+    return count
 
 
 @router.post("/fraud-alerts/{alert_id}/resolve", response_model=FraudAlertRead)
@@ -34,4 +123,48 @@ async def resolve_fraud_alert(
     alert.resolved_by = current_user.id
     await session.commit()
     await session.refresh(alert)
+    _count_cache.clear()
     return alert
+
+
+@router.get("/audit-logs", response_model=AuditLogPage, dependencies=[Depends(use_read_replica)])
+async def list_audit_logs(
+    actor_id: Optional[int] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    target_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_active_admin),
+    session: AsyncSession = Depends(get_session),
+):
+    decoded_cursor = decode_cursor(cursor) if cursor is not None else None
+
+    async def load_page(shard_session: AsyncSession):
+        return await query_audit_logs(
+            shard_session,
+            actor_id=actor_id,
+            action=action,
+            target_type=target_type,
+            target_id=target_id,
+            created_from=created_from,
+            created_to=created_to,
+            cursor=decoded_cursor,
+            limit=limit,
+        )
+
+    # each shard's page is already newest first; merging keeps the keyset order across shards
+    pages = await shard_router.fan_out(session, load_page)
+    rows = list(heapq.merge(*pages, key=lambda row: (row.created_at, row.id), reverse=True))[: limit + 1]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return AuditLogPage(items=rows, next_cursor=next_cursor)
+
+
+@router.get("/slow-queries", response_model=list[SlowQueryRead])
+async def list_slow_queries(current_user: User = Depends(get_active_admin)):
+    return slow_query_samples()
@@ -3,10 +3,12 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from ...core.config import get_settings
 from ...core.security import create_access_token, get_password_hash, verify_password
 from ...database import get_session
 from ...models import User
 from ...schemas import Token, UserCreate, UserRead
+from ...utils.phone import normalize_phone
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -20,6 +22,7 @@ async def register_user(user_in: UserCreate, session: AsyncSession = Depends(get
     db_user = User(
         email=user_in.email,
         full_name=user_in.full_name,
+        phone=normalize_phone(user_in.phone),
         hashed_password=get_password_hash(user_in.password),
         role=user_in.role,
     )
@@ -39,5 +42,6 @@ async def login(
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect credentials")
 
-    access_token = create_access_token(user.email)
-    return Token(access_token=access_token, expires_in=60 * 60)
+    expires_delta = get_settings().access_token_expires
+    access_token = create_access_token(user.email, expires_delta)
+    return Token(access_token=access_token, expires_in=int(expires_delta.total_seconds()))
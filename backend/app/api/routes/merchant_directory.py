@@ -0,0 +1,31 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...api.deps import get_current_user
+from ...database import get_session
+from ...models import User
+from ...schemas import NearbyMerchantRead
+from ...services.geo import merchant_locator
+
+router = APIRouter(prefix="/merchants", tags=["merchants"])
+
+
+@router.get("/nearby", response_model=list[NearbyMerchantRead])
+async def list_nearby_merchants(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(1000, gt=0, le=20_000),
+    category: Optional[str] = None,
+    status: Optional[str] = "active",
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    await merchant_locator.ensure_loaded(session)
+    hits = merchant_locator.index.query(lat, lon, radius_m, category=category, status=status, limit=limit)
+    return [
+        NearbyMerchantRead(**point._asdict(), distance_m=round(distance, 1))
+        for distance, point in hits
+    ]
@@ -1,30 +1,188 @@
+import asyncio
+import heapq
+import json
 from datetime import datetime
+from itertools import chain
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...api.deps import get_active_merchant
-from ...database import get_session
-from ...models import Merchant, Stamp, StampStatus, User
-from ...schemas import StampRead
-from ...utils.audit import record_audit_log
+from ...database import get_session, use_read_replica
+from ...models import Merchant, Stamp, StampBook, StampStatus, User
+from ...schemas import (
+    StampBatchCreate,
+    StampBatchResult,
+    StampBulkApprove,
+    StampBulkApproveResult,
+    StampPage,
+    StampRead,
+)
+from ...services.pubsub import get_broker, merchant_channel
+from ...services.side_effects import enqueue_audit_logs
+from ...services.stamp_batches import ingest_stamp_batch
+from ...services.stamp_counters import StampChange, apply_stamp_changes
+from ...services.versions import MERCHANT_PENDING, USER_STAMP_BOOKS, bump_versions, current_versions
+from ...shards import shard_router
+from ...utils.etag import etag_headers, etag_matches, make_etag
+from ...utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from ...utils.serialization import FastJSONResponse, row_dicts, schema_columns
 
 router = APIRouter(prefix="/merchant", tags=["merchant"])
 
+STREAM_KEEPALIVE_SECONDS = 15.0
+STAMP_COLUMNS = schema_columns(Stamp, StampRead)
+APPROVED_COLUMNS = (Stamp.id, Stamp.stamp_book_id, Stamp.merchant_id, Stamp.discount_amount, Stamp.visit_at)
 
-@router.get("/stamps/pending", response_model=list[StampRead])
+
+async def _owned_merchant_ids(session: AsyncSession, owner_id: int) -> List[int]:
+    # resolved on the primary: shards only hold stamp data, so they filter on plain ids
+    result = await session.execute(select(Merchant.id).where(Merchant.owner_id == owner_id))
+    return result.scalars().all()
+
+
+async def _bump_approval_versions(session: AsyncSession, stamp_session: AsyncSession, stamps) -> None:
+    if not stamps:
+        return
+    await bump_versions(session, MERCHANT_PENDING, {stamp.merchant_id for stamp in stamps})
+    owners = await stamp_session.execute(
+        select(StampBook.user_id).where(StampBook.id.in_({stamp.stamp_book_id for stamp in stamps}))
+    )
+    await bump_versions(session, USER_STAMP_BOOKS, owners.scalars().all())
+
+
+@router.get("/stamps/pending", response_model=StampPage, dependencies=[Depends(use_read_replica)])
 async def list_pending_stamps(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_active_merchant),
     session: AsyncSession = Depends(get_session),
 ):
-    result = await session.execute(
-        select(Stamp)
-        .join(Merchant, Stamp.merchant_id == Merchant.id)
-        .where(Merchant.owner_id == current_user.id, Stamp.status == StampStatus.PENDING.value)
+    owned_ids = await _owned_merchant_ids(session, current_user.id)
+    # read before the data: a concurrent write can only make the body newer than its ETag
+    versions = await current_versions(session, MERCHANT_PENDING, owned_ids)
+    etag = make_etag("pending-stamps", current_user.id, versions, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+    query = select(*STAMP_COLUMNS).where(
+        Stamp.merchant_id.in_(owned_ids), Stamp.status == StampStatus.PENDING.value
     )
-    stamps = result.scalars().all()
-    return stamps
+    if cursor is not None:
+        visit_at, stamp_id = decode_cursor(cursor)
+        query = query.where(tuple_(Stamp.visit_at, Stamp.id) > tuple_(visit_at, stamp_id))
+    query = query.order_by(Stamp.visit_at, Stamp.id).limit(limit + 1)
+
+    async def load_page(shard_session: AsyncSession) -> list:
+        return (await shard_session.execute(query)).all()
+
+    # every shard returns its own first limit + 1 rows in keyset order; merging them keeps the order
+    pages = await shard_router.fan_out(session, load_page)
+    rows = list(heapq.merge(*pages, key=lambda row: (row.visit_at, row.id)))[: limit + 1]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].visit_at, rows[-1].id)
+    return FastJSONResponse(
+        {"items": row_dicts(STAMP_COLUMNS, rows), "next_cursor": next_cursor},
+        headers=etag_headers(etag),
+    )
+
+
+@router.get("/stamps/stream")
+async def stream_pending_stamps(
+    current_user: User = Depends(get_active_merchant),
+    session: AsyncSession = Depends(get_session),
+):
+    result = await session.execute(select(Merchant.id).where(Merchant.owner_id == current_user.id))
+    channels = [merchant_channel(merchant_id) for merchant_id in result.scalars().all()]
+    # release the pooled connection; the stream itself never touches the database
+    await session.close()
+
+    async def event_stream():
+        async with get_broker().subscribe(channels) as subscription:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: stamp\ndata: {json.dumps(message)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/stamps/batch", response_model=StampBatchResult)
+async def upload_stamp_batch(
+    payload: StampBatchCreate,
+    current_user: User = Depends(get_active_merchant),
+    session: AsyncSession = Depends(get_session),
+):
+    if shard_router.enabled:
+        raise HTTPException(status_code=501, detail="Batch uploads are not available with sharding")
+    results = await ingest_stamp_batch(session, current_user, payload.items)
+    return StampBatchResult(results=results)
+
+
+@router.post("/stamps/approve", response_model=StampBulkApproveResult)
+async def bulk_approve_stamps(
+    payload: StampBulkApprove,
+    current_user: User = Depends(get_active_merchant),
+    session: AsyncSession = Depends(get_session),
+):
+    owned_ids = await _owned_merchant_ids(session, current_user.id)
+    approved_by_shard = {}
+    for shard, stamp_ids in shard_router.group_ids(set(payload.stamp_ids)).items():
+        async with shard_router.session(session, shard) as stamp_session:
+            result = await stamp_session.execute(
+                update(Stamp)
+                .where(
+                    Stamp.id.in_(stamp_ids),
+                    Stamp.status == StampStatus.PENDING.value,
+                    Stamp.merchant_id.in_(owned_ids),
+                )
+                .values(status=StampStatus.APPROVED.value, visit_at=datetime.utcnow())
+                .returning(*APPROVED_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+            approved = result.all()
+            await apply_stamp_changes(
+                stamp_session,
+                [
+                    StampChange(
+                        row.stamp_book_id,
+                        StampStatus.PENDING.value,
+                        StampStatus.APPROVED.value,
+                        row.discount_amount,
+                        row.visit_at,
+                    )
+                    for row in approved
+                ],
+            )
+            await _bump_approval_versions(session, stamp_session, approved)
+            if stamp_session is not session:
+                await stamp_session.commit()
+        approved_by_shard[shard.index] = sorted(row.id for row in approved)
+    await session.commit()
+    for shard_index, shard_approved_ids in approved_by_shard.items():
+        await enqueue_audit_logs(
+            actor_id=current_user.id,
+            actor_role=current_user.role,
+            action="stamp_approved",
+            target_type="stamp",
+            target_ids=shard_approved_ids,
+            shard_index=shard_index,
+        )
+    return StampBulkApproveResult(approved_ids=sorted(chain.from_iterable(approved_by_shard.values())))
 
 
 @router.post("/stamps/{stamp_id}/approve", response_model=StampRead)
@@ -33,24 +191,53 @@ async def approve_stamp(
     current_user: User = Depends(get_active_merchant),
     session: AsyncSession = Depends(get_session),
 ):
-    stamp = await session.get(Stamp, stamp_id)
-    if not stamp:
-        raise HTTPException(status_code=404, detail="Stamp not found")
-
-    merchant = await session.get(Merchant, stamp.merchant_id)
-    if not merchant or merchant.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Access denied to this stamp")
-
-    stamp.status = StampStatus.APPROVED.value
-    stamp.visit_at = datetime.utcnow()
-    await record_audit_log(
-        session,
-        actor_id=current_user.id,
-        actor_role=current_user.role,
-        action="stamp_approved",
-        target_type="stamp",
-        target_id=stamp.id,
-    )
-    await session.commit()
-    await session.refresh(stamp)
-    return stamp
+    shard = shard_router.for_id(stamp_id)
+    async with shard_router.session(session, shard) as stamp_session:
+        stamp = await stamp_session.get(Stamp, stamp_id)
+        if not stamp:
+            raise HTTPException(status_code=404, detail="Stamp not found")
+
+        merchant = await session.get(Merchant, stamp.merchant_id)
+        if not merchant or merchant.owner_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Access denied to this stamp")
+
+        if stamp.status == StampStatus.APPROVED.value:
+            return StampRead.model_validate(stamp)
+        # compare-and-set on the status we read: of two concurrent approvals only one gets a row back,
+        # so the book counters move once
+        result = await stamp_session.execute(
+            update(Stamp)
+            .where(Stamp.id == stamp_id, Stamp.status == stamp.status)
+            .values(status=StampStatus.APPROVED.value, visit_at=datetime.utcnow())
+            .returning(*APPROVED_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        approved = result.one_or_none()
+        if approved is not None:
+            await apply_stamp_changes(
+                stamp_session,
+                [
+                    StampChange(
+                        approved.stamp_book_id,
+                        stamp.status,
+                        StampStatus.APPROVED.value,
+                        approved.discount_amount,
+                        approved.visit_at,
+                    )
+                ],
+            )
+            await _bump_approval_versions(session, stamp_session, [approved])
+            await stamp_session.commit()
+            await session.commit()
+        await stamp_session.refresh(stamp)
+        approved_stamp = StampRead.model_validate(stamp)
+    if approved is not None:
+        await enqueue_audit_logs(
+            actor_id=current_user.id,
+            actor_role=current_user.role,
+            action="stamp_approved",
+            target_type="stamp",
+            target_ids=[stamp_id],
+            shard_index=shard.index,
+        )
+    return approved_stamp
@@ -1,30 +1,102 @@
 from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...api.deps import get_current_user
-from ...database import get_session
-from ...models import Merchant, Performance, Stamp, StampBook, User
-from ...schemas import StampBookCreate, StampBookRead, StampCreate, StampRead
-from ...utils.audit import record_audit_log
+from ...database import get_session, use_read_replica
+from ...models import Stamp, StampBook, StampStatus, User
+from ...schemas import StampBookCreate, StampBookRead, StampBookSummary, StampCreate, StampRead
+from ...services.campaigns import StampFacts
+from ...services.pubsub import get_broker, merchant_channel
+from ...services.qr_tokens import QRTokenRejected, redeem_qr_token
+from ...services.reference_cache import merchant_cache, performance_cache
+from ...services.side_effects import enqueue_audit_logs, enqueue_campaign_match
+from ...services.stamp_counters import StampChange, apply_stamp_changes
+from ...services.versions import MERCHANT_PENDING, USER_STAMP_BOOKS, bump_versions, current_versions
+from ...shards import shard_router
+from ...utils.etag import etag_headers, etag_matches, make_etag
+from ...utils.serialization import FastJSONResponse, row_dicts, schema_columns
 
 router = APIRouter(prefix="/stamp-books", tags=["stamp-books"])
 
+BOOK_COLUMNS = schema_columns(StampBook, StampBookRead, exclude={"stamps"})
+STAMP_COLUMNS = schema_columns(Stamp, StampRead)
 
-@router.get("/", response_model=list[StampBookRead])
+
+async def _stamp_books_etag(session: AsyncSession, view: str, user_id: int) -> str:
+    # read before the data: a concurrent write can only make the body newer than its ETag
+    versions = await current_versions(session, USER_STAMP_BOOKS, [user_id])
+    return make_etag("stamp-books", view, user_id, versions)
+
+
+@router.get("/", response_model=list[StampBookRead], dependencies=[Depends(use_read_replica)])
 async def list_stamp_books(
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    result = await session.execute(
-        select(StampBook).where(StampBook.user_id == current_user.id)
+    etag = await _stamp_books_etag(session, "list", current_user.id)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+    async def load_books(shard_session: AsyncSession) -> list:
+        query = select(*BOOK_COLUMNS).where(StampBook.user_id == current_user.id)
+        books = row_dicts(BOOK_COLUMNS, (await shard_session.execute(query)).all())
+        stamps_by_book = {book["id"]: book.setdefault("stamps", []) for book in books}
+        if stamps_by_book:
+            # one query for every book's stamps instead of a refresh per book
+            stamp_result = await shard_session.execute(
+                select(*STAMP_COLUMNS).where(Stamp.stamp_book_id.in_(stamps_by_book)).order_by(Stamp.id)
+            )
+            for stamp in row_dicts(STAMP_COLUMNS, stamp_result.all()):
+                stamps_by_book[stamp["stamp_book_id"]].append(stamp)
+        return books
+
+    books = [book for shard_books in await shard_router.fan_out(session, load_books) for book in shard_books]
+    return FastJSONResponse(books, headers=etag_headers(etag))
+
+
+@router.get(
+    "/summary",
+    response_model=list[StampBookSummary],
+    dependencies=[Depends(use_read_replica)],
+)
+async def summarize_stamp_books(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    etag = await _stamp_books_etag(session, "summary", current_user.id)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    response.headers.update(etag_headers(etag))
+
+    # served by uq_stampbook_user_performance (user_id, performance_id); no stamps are read
+    query = (
+        select(
+            StampBook.id,
+            StampBook.performance_id,
+            StampBook.status,
+            StampBook.expires_at,
+            StampBook.approved_count,
+            StampBook.pending_count,
+            StampBook.rejected_count,
+            StampBook.total_discount,
+            StampBook.last_stamp_at,
+        )
+        .where(StampBook.user_id == current_user.id)
+        .order_by(StampBook.performance_id)
     )
-    stamp_books = result.scalars().unique().all()
-    for sb in stamp_books:
-        await session.refresh(sb, attribute_names=["stamps"])
-    return stamp_books
+
+    async def load_summaries(shard_session: AsyncSession) -> list:
+        return (await shard_session.execute(query)).all()
+
+    rows = [row for shard_rows in await shard_router.fan_out(session, load_summaries) for row in shard_rows]
+    return sorted(rows, key=lambda row: row.performance_id)
 
 
 @router.post("/", response_model=StampBookRead, status_code=status.HTTP_201_CREATED)
@@ -33,37 +105,44 @@ async def issue_stamp_book(
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    performance = await session.get(Performance, stamp_book_in.performance_id)
+    performance = await performance_cache.get(session, stamp_book_in.performance_id)
     if not performance:
         raise HTTPException(status_code=404, detail="Performance not found")
 
-    existing = await session.execute(
-        select(StampBook).where(
-            StampBook.user_id == current_user.id,
-            StampBook.performance_id == stamp_book_in.performance_id,
+    shard = shard_router.for_performance(stamp_book_in.performance_id)
+    async with shard_router.session(session, shard) as stamp_session:
+        existing = await stamp_session.execute(
+            select(StampBook).where(
+                StampBook.user_id == current_user.id,
+                StampBook.performance_id == stamp_book_in.performance_id,
+            )
         )
-    )
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=400, detail="Stamp book already issued")
+        if existing.scalar_one_or_none():
+            raise HTTPException(status_code=400, detail="Stamp book already issued")
 
-    stamp_book = StampBook(
-        user_id=current_user.id,
-        performance_id=stamp_book_in.performance_id,
-        expires_at=stamp_book_in.expires_at,
-    )
-    session.add(stamp_book)
-    await session.flush()
-    await record_audit_log(
-        session,
+        stamp_book = StampBook(
+            user_id=current_user.id,
+            performance_id=stamp_book_in.performance_id,
+            expires_at=stamp_book_in.expires_at,
+        )
+        stamp_session.add(stamp_book)
+        await bump_versions(session, USER_STAMP_BOOKS, [current_user.id])
+        await stamp_session.commit()
+        await session.commit()
+        await stamp_session.refresh(stamp_book)
+        # a new book has no stamps; building the body here avoids lazy-loading them from a closed session
+        issued = StampBookRead.model_validate(
+            {**{column.key: getattr(stamp_book, column.key) for column in BOOK_COLUMNS}, "stamps": []}
+        )
+    await enqueue_audit_logs(
         actor_id=current_user.id,
         actor_role=current_user.role,
         action="stamp_book_issued",
         target_type="stamp_book",
-        target_id=stamp_book.id,
+        target_ids=[issued.id],
+        shard_index=shard.index,
     )
-    await session.commit()
-    await session.refresh(stamp_book)
-    return stamp_book
+    return issued
 
 
 @router.post("/{stamp_book_id}/stamps", response_model=StampRead, status_code=status.HTTP_201_CREATED)
@@ -73,32 +152,75 @@ async def add_stamp_to_book(
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    stamp_book = await session.get(StampBook, stamp_book_id)
-    if not stamp_book or stamp_book.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Stamp book not found")
-
-    merchant = await session.get(Merchant, stamp_in.merchant_id)
-    if not merchant:
-        raise HTTPException(status_code=404, detail="Merchant not found")
-
-    stamp = Stamp(
-        stamp_book_id=stamp_book_id,
-        merchant_id=stamp_in.merchant_id,
-        qr_token_id=stamp_in.qr_token_id,
-        discount_amount=stamp_in.discount_amount,
-        approval_method=stamp_in.approval_method,
-        photo_url=stamp_in.photo_url,
-        visit_at=datetime.utcnow(),
-    )
-    session.add(stamp)
-    await record_audit_log(
-        session,
+    shard = shard_router.for_id(stamp_book_id)
+    async with shard_router.session(session, shard) as stamp_session:
+        stamp_book = await stamp_session.get(StampBook, stamp_book_id)
+        if not stamp_book or stamp_book.user_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Stamp book not found")
+
+        merchant = await merchant_cache.get(session, stamp_in.merchant_id)
+        if not merchant:
+            raise HTTPException(status_code=404, detail="Merchant not found")
+
+        qr_token_id = stamp_in.qr_token_id
+        if stamp_in.qr_token is not None or qr_token_id is not None:
+            try:
+                qr_token_id = await redeem_qr_token(
+                    session,
+                    merchant_id=merchant.id,
+                    token=stamp_in.qr_token,
+                    token_id=qr_token_id,
+                )
+            except QRTokenRejected as exc:
+                await session.rollback()
+                raise HTTPException(status_code=400, detail=exc.detail)
+
+        stamp = Stamp(
+            stamp_book_id=stamp_book_id,
+            merchant_id=stamp_in.merchant_id,
+            qr_token_id=qr_token_id,
+            discount_amount=stamp_in.discount_amount,
+            approval_method=stamp_in.approval_method,
+            photo_url=stamp_in.photo_url,
+            visit_at=datetime.utcnow(),
+        )
+        stamp_session.add(stamp)
+        await apply_stamp_changes(
+            stamp_session,
+            [
+                StampChange(
+                    stamp_book_id, None, StampStatus.PENDING.value, stamp.discount_amount, stamp.visit_at
+                )
+            ],
+        )
+        await bump_versions(session, USER_STAMP_BOOKS, [current_user.id])
+        await bump_versions(session, MERCHANT_PENDING, [stamp.merchant_id])
+        # the QR token is only spent once the stamp is stored
+        await stamp_session.commit()
+        await session.commit()
+        await stamp_session.refresh(stamp)
+    await enqueue_audit_logs(
         actor_id=current_user.id,
         actor_role=current_user.role,
         action="stamp_created",
         target_type="stamp",
-        target_id=stamp.id,
+        target_ids=[stamp.id],
+        shard_index=shard.index,
+    )
+    await enqueue_campaign_match(
+        StampFacts(
+            stamp_id=stamp.id,
+            user_id=current_user.id,
+            merchant_id=merchant.id,
+            merchant_category=merchant.category,
+            performance_id=stamp_book.performance_id,
+            discount_amount=stamp.discount_amount,
+            approval_method=stamp.approval_method,
+            visit_at=stamp.visit_at,
+        ),
+    )
+    await get_broker().publish(
+        merchant_channel(stamp.merchant_id),
+        StampRead.model_validate(stamp).model_dump(mode="json"),
     )
-    await session.commit()
-    await session.refresh(stamp)
     return stamp
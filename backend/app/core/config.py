@@ -1,6 +1,7 @@
 import os
 from functools import lru_cache
 from datetime import timedelta
+from typing import Dict, List
 
 
 class Settings:
@@ -10,15 +11,87 @@ class Settings:
     API_V1_STR: str = "/api"
     SECRET_KEY: str = os.getenv("SECRET_KEY", "super-secret-development-key")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+    # "kid:secret" pairs separated by commas; empty means SECRET_KEY under kid "default"
+    JWT_SIGNING_KEYS: str = os.getenv("JWT_SIGNING_KEYS", "")
+    JWT_ACTIVE_KID: str = os.getenv("JWT_ACTIVE_KID", "")
+    # SECRET_KEY keeps verifying kid-less tokens under "default" until this is set
+    JWT_RETIRE_DEFAULT_KEY: bool = os.getenv("JWT_RETIRE_DEFAULT_KEY", "false").lower() in {"1", "true", "yes"}
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
     DATABASE_URL: str = os.getenv(
         "DATABASE_URL",
         "sqlite+aiosqlite:///./tcats.db",
     )
+    # optional read replica for GET routes that opt in (see database.use_read_replica)
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    # extra databases for stamp data; the primary is shard 0 (see shards.py)
+    SHARD_DATABASE_URLS: str = os.getenv("SHARD_DATABASE_URLS", "")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in {"1", "true", "yes"}
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+    DB_AUTO_MIGRATE: bool = os.getenv("DB_AUTO_MIGRATE", "false").lower() in {"1", "true", "yes"}
+    READINESS_CACHE_SECONDS: float = float(os.getenv("READINESS_CACHE_SECONDS", "1.5"))
+    READINESS_DB_TIMEOUT_SECONDS: float = float(os.getenv("READINESS_DB_TIMEOUT_SECONDS", "1.0"))
+    READINESS_MAX_POOL_SATURATION: float = float(os.getenv("READINESS_MAX_POOL_SATURATION", "0.9"))
+    READINESS_MAX_LOOP_LAG_SECONDS: float = float(os.getenv("READINESS_MAX_LOOP_LAG_SECONDS", "0.25"))
+    REFERENCE_CACHE_TTL_SECONDS: float = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300"))
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    REQUEST_QUERY_WARN_THRESHOLD: int = int(os.getenv("REQUEST_QUERY_WARN_THRESHOLD", "20"))
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in {"1", "true", "yes"}
+    RATE_LIMIT_TRUST_PROXY: bool = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() in {"1", "true", "yes"}
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    # "key:count/seconds" per key type (ip, user, merchant); empty disables the route's limit
+    RATE_LIMIT_AUTH_TOKEN: str = os.getenv("RATE_LIMIT_AUTH_TOKEN", "ip:60/60,user:10/60")
+    RATE_LIMIT_ADD_STAMP: str = os.getenv("RATE_LIMIT_ADD_STAMP", "user:30/60,merchant:600/60,ip:600/60")
+    # largest discount a merchant device may report for one stamp (batch uploads)
+    MAX_STAMP_DISCOUNT_AMOUNT: float = float(os.getenv("MAX_STAMP_DISCOUNT_AMOUNT", "100000"))
+    AUDIT_LOG_HOT_MONTHS: int = int(os.getenv("AUDIT_LOG_HOT_MONTHS", "6"))
+    AUDIT_LOG_ARCHIVE_DIR: str = os.getenv("AUDIT_LOG_ARCHIVE_DIR", "./audit_archive")
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_RETRY_BASE_SECONDS: float = float(os.getenv("JOB_RETRY_BASE_SECONDS", "0.5"))
+    JOB_QUEUE_MAXSIZE: int = int(os.getenv("JOB_QUEUE_MAXSIZE", "10000"))
+    JOB_DRAIN_TIMEOUT_SECONDS: float = float(os.getenv("JOB_DRAIN_TIMEOUT_SECONDS", "10"))
+    # the Streamlit tool's database, read by services/box_office_sync.py
+    BOX_OFFICE_DATABASE_URL: str = os.getenv("BOX_OFFICE_DATABASE_URL", "")
+
+    @property
+    def shard_database_urls(self) -> List[str]:
+        return [url.strip() for url in self.SHARD_DATABASE_URLS.split(",") if url.strip()]
 
     @property
     def access_token_expires(self) -> timedelta:
         return timedelta(minutes=self.ACCESS_TOKEN_EXPIRE_MINUTES)
 
+    @property
+    def rate_limits(self) -> Dict[str, str]:
+        return {
+            f"POST {self.API_V1_STR}/auth/token": self.RATE_LIMIT_AUTH_TOKEN,
+            f"POST {self.API_V1_STR}/stamp-books/{{stamp_book_id}}/stamps": self.RATE_LIMIT_ADD_STAMP,
+        }
+
+    @property
+    def signing_keys(self) -> Dict[str, str]:
+        # listed first, so it never becomes the implicit active key of a rotation
+        keys = {} if self.JWT_RETIRE_DEFAULT_KEY else {"default": self.SECRET_KEY}
+        for pair in self.JWT_SIGNING_KEYS.split(","):
+            kid, separator, secret = pair.strip().partition(":")
+            if separator and kid and secret:
+                keys[kid] = secret
+        return keys or {"default": self.SECRET_KEY}
+
+    @property
+    def active_kid(self) -> str:
+        keys = self.signing_keys
+        if self.JWT_ACTIVE_KID in keys:
+            return self.JWT_ACTIVE_KID
+        # without an explicit choice the last listed key signs; earlier ones only verify
+        return list(keys)[-1]
+
 
 @lru_cache
 def get_settings() -> Settings:
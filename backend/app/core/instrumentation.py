@@ -0,0 +1,162 @@
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import get_settings
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    labelnames=("method", "route", "status"),
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    "http_request_db_queries",
+    "Database queries issued per request",
+    labelnames=("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds",
+    "Time spent in the database per request",
+    labelnames=("route",),
+)
+QUERY_HEAVY_REQUESTS = registry.counter(
+    "http_requests_query_heavy_total",
+    "Requests that issued more queries than REQUEST_QUERY_WARN_THRESHOLD (likely N+1)",
+    labelnames=("route",),
+)
+SLOW_QUERIES = registry.counter("db_slow_queries_total", "Queries slower than SLOW_QUERY_THRESHOLD_MS")
+
+SLOW_QUERY_SAMPLE_SIZE = 50
+_slow_query_samples: Deque[Dict[str, Any]] = deque(maxlen=SLOW_QUERY_SAMPLE_SIZE)
+
+
+class RequestStats:
+    __slots__ = ("path", "route", "query_count", "db_seconds")
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.route = "unmatched"
+        self.query_count = 0
+        self.db_seconds = 0.0
+
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+
+def slow_query_samples() -> List[Dict[str, Any]]:
+    return list(_slow_query_samples)
+
+
+def _redact_parameters(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: "?" for key in parameters}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [_redact_parameters(parameters[0]), f"... {len(parameters)} rows"]
+        return ["?"] * len(parameters)
+    return "?"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    elapsed = time.perf_counter() - started
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.query_count += 1
+        stats.db_seconds += elapsed
+
+    if elapsed * 1000 >= get_settings().SLOW_QUERY_THRESHOLD_MS:
+        SLOW_QUERIES.inc()
+        _slow_query_samples.append(
+            {
+                "statement": statement,
+                "parameters": _redact_parameters(parameters),
+                "duration_ms": round(elapsed * 1000, 3),
+                "path": stats.path if stats is not None else None,
+                "recorded_at": datetime.utcnow().isoformat(),
+            }
+        )
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute never fires for a failed statement; drop its start
+    # time so the stack stays balanced on the pooled connection
+    conn = exception_context.connection
+    if conn is None or exception_context.execution_context is None:
+        return
+    if conn.info.get("query_started_at"):
+        conn.info["query_started_at"].pop()
+
+
+def install_query_hooks(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+class PerformanceMiddleware:
+    """ASGI middleware recording per-route latency and DB usage."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope["path"])
+        token = _current_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_stats.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                stats.route = getattr(route, "path", stats.route)
+            self._record(scope["method"], stats, status_code, elapsed)
+
+    @staticmethod
+    def _record(method: str, stats: RequestStats, status_code: int, elapsed: float) -> None:
+        REQUEST_LATENCY.observe(elapsed, method=method, route=stats.route, status=str(status_code))
+        REQUEST_DB_QUERIES.observe(stats.query_count, route=stats.route)
+        REQUEST_DB_SECONDS.observe(stats.db_seconds, route=stats.route)
+        if stats.query_count > get_settings().REQUEST_QUERY_WARN_THRESHOLD:
+            QUERY_HEAVY_REQUESTS.inc(route=stats.route)
+            logger.warning(
+                "%s %s issued %d queries (%.1f ms in DB)",
+                method,
+                stats.route,
+                stats.query_count,
+                stats.db_seconds * 1000,
+            )
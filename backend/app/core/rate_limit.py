@@ -0,0 +1,274 @@
+"""Token-bucket rate limiting for expensive routes.
+
+Each rule names a route (``"POST /api/auth/token"``) and a spec such as
+``"ip:20/60,user:5/60"``: every listed key gets a bucket holding up to 20
+(or 5) tokens that refills over 60 seconds. Keys are
+
+* ``ip``       - the client address (``X-Forwarded-For`` with ``RATE_LIMIT_TRUST_PROXY``)
+* ``user``     - the bearer token subject, or the ``username`` form field on login
+* ``merchant`` - ``merchant_id`` from the JSON body
+
+A request is admitted only if every bucket has a token. Rejections are
+answered from the middleware with ``429`` and ``Retry-After`` before routing,
+authentication or any database access.
+"""
+import abc
+import json
+import re
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import parse_qs
+
+from .config import get_settings
+from .metrics import registry
+from .security import bearer_subject
+
+RATE_LIMITED = registry.counter(
+    "http_requests_rate_limited_total",
+    "Requests rejected with 429 by the rate limiter",
+    labelnames=("route",),
+)
+
+KEY_TYPES = ("ip", "user", "merchant")
+MAX_BODY_BYTES = 64 * 1024
+
+
+class Limit(NamedTuple):
+    key_type: str
+    capacity: float
+    refill_per_second: float
+
+
+class RateLimitRule(NamedTuple):
+    method: str
+    route: str
+    pattern: "re.Pattern[str]"
+    limits: Tuple[Limit, ...]
+
+    @property
+    def needs_body(self) -> bool:
+        return any(limit.key_type in {"user", "merchant"} for limit in self.limits)
+
+
+BucketRequest = Tuple[str, float, float]  # key, capacity, refill_per_second
+
+
+def parse_limits(spec: str) -> Tuple[Limit, ...]:
+    limits = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        key_type, _, rate = part.partition(":")
+        count, _, seconds = rate.partition("/")
+        if key_type not in KEY_TYPES or not count or not seconds:
+            raise ValueError(f"Invalid rate limit {part!r}; expected e.g. 'ip:20/60'")
+        capacity = float(count)
+        limits.append(Limit(key_type, capacity, capacity / float(seconds)))
+    return tuple(limits)
+
+
+def parse_rules(rules: Dict[str, str]) -> List[RateLimitRule]:
+    """Build rules from ``{"METHOD /path/{param}": "key:count/seconds,..."}``."""
+    parsed = []
+    for route_key, spec in rules.items():
+        limits = parse_limits(spec)
+        if not limits:
+            continue
+        method, _, route = route_key.partition(" ")
+        pattern = re.compile("^" + re.sub(r"\\\{[^/]+?\\\}", "[^/]+", re.escape(route)) + "$")
+        parsed.append(RateLimitRule(method.upper(), route, pattern, limits))
+    return parsed
+
+
+class BucketStore(abc.ABC):
+    """Interface for token-bucket backends.
+
+    ``acquire`` takes one token from every bucket or from none and returns 0
+    when admitted, otherwise the seconds until the request would succeed.
+    The in-memory store only limits one worker; a multi-worker deployment
+    plugs in a shared backend (e.g. Redis with a Lua script) through
+    :func:`set_bucket_store`.
+    """
+
+    @abc.abstractmethod
+    async def acquire(self, buckets: Sequence[BucketRequest]) -> float:
+        ...
+
+
+class InMemoryBucketStore(BucketStore):
+    """Process-local buckets.
+
+    ``acquire`` never awaits, so on the event loop each call runs to
+    completion without a lock.
+    """
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> (tokens, updated_at, full_at)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def acquire(self, buckets: Sequence[BucketRequest]) -> float:
+        now = self.clock()
+        levels = []
+        retry_after = 0.0
+        for key, capacity, rate in buckets:
+            bucket = self._buckets.get(key)
+            tokens = capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            levels.append(tokens)
+            if tokens < 1:
+                retry_after = max(retry_after, (1 - tokens) / rate)
+        if retry_after:
+            return retry_after
+
+        if len(self._buckets) + len(buckets) > self.max_keys:
+            self._evict(now)
+        for (key, capacity, rate), tokens in zip(buckets, levels):
+            tokens -= 1
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        return 0.0
+
+    def _evict(self, now: float) -> None:
+        # a bucket that has refilled completely is indistinguishable from a missing one
+        for key in [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+        while len(self._buckets) >= self.max_keys:
+            self._buckets.pop(next(iter(self._buckets)))
+
+
+_store: BucketStore = InMemoryBucketStore(max_keys=get_settings().RATE_LIMIT_MAX_KEYS)
+
+
+def get_bucket_store() -> BucketStore:
+    return _store
+
+
+def set_bucket_store(store: BucketStore) -> None:
+    global _store
+    _store = store
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _client_ip(scope, trust_proxy: bool) -> str:
+    if trust_proxy:
+        forwarded = _header(scope, b"x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _body_fields(scope, body: bytes) -> dict:
+    content_type = _header(scope, b"content-type") or ""
+    try:
+        if content_type.startswith("application/json"):
+            fields = json.loads(body)
+            return fields if isinstance(fields, dict) else {}
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return {key: values[0] for key, values in parse_qs(body.decode("utf-8")).items()}
+    except (ValueError, UnicodeDecodeError):
+        pass
+    return {}
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying token-bucket limits to the configured routes."""
+
+    def __init__(
+        self,
+        app,
+        rules: Optional[Dict[str, str]] = None,
+        store: Optional[BucketStore] = None,
+        trust_proxy: Optional[bool] = None,
+    ):
+        settings = get_settings()
+        self.app = app
+        self.enabled = settings.RATE_LIMIT_ENABLED
+        self.rules = parse_rules(settings.rate_limits if rules is None else rules)
+        self.store = store
+        self.trust_proxy = settings.RATE_LIMIT_TRUST_PROXY if trust_proxy is None else trust_proxy
+
+    def _match(self, scope) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if rule.method == scope["method"] and rule.pattern.match(scope["path"]):
+                return rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        rule = self._match(scope) if scope["type"] == "http" and self.enabled else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        fields: dict = {}
+        if rule.needs_body:
+            messages, body = [], b""
+            while True:
+                message = await receive()
+                messages.append(message)
+                body += message.get("body", b"")
+                if message["type"] != "http.request" or not message.get("more_body"):
+                    break
+                if len(body) > MAX_BODY_BYTES:
+                    break
+            fields = _body_fields(scope, body)
+            receive = self._replay(messages, receive)
+
+        buckets: List[BucketRequest] = []
+        for limit in rule.limits:
+            identity = self._identity(limit.key_type, scope, fields)
+            if identity is not None:
+                key = f"{rule.route}|{limit.key_type}:{identity}"
+                buckets.append((key, limit.capacity, limit.refill_per_second))
+        retry_after = await (self.store or get_bucket_store()).acquire(buckets) if buckets else 0.0
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.inc(route=rule.route)
+        body = b'{"detail":"Too many requests"}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def _identity(self, key_type: str, scope, fields: dict) -> Optional[str]:
+        if key_type == "ip":
+            return _client_ip(scope, self.trust_proxy)
+        if key_type == "user":
+            subject = bearer_subject(scope)
+            if subject is not None:
+                return subject
+            username = fields.get("username")
+            return str(username).lower() if username else None
+        merchant_id = fields.get("merchant_id")
+        return str(merchant_id) if merchant_id is not None else None
+
+    @staticmethod
+    def _replay(messages, receive):
+        pending = list(messages)
+
+        async def replay():
+            if pending:
+                return pending.pop(0)
+            return await receive()
+
+        return replay
@@ -1,5 +1,8 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -9,22 +12,102 @@ from .config import get_settings
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class CachedClaims(NamedTuple):
+    subject: Optional[str]
+    expires_at: float
+    kid: Optional[str]
+
+
+# token -> claims of a token that already passed signature and expiry checks.
+# Entries are dropped once ``exp`` passes or their signing key is retired.
+_claims_cache: Dict[str, CachedClaims] = {}
+
+
+@lru_cache
+def _keyring() -> Tuple[Dict[str, str], str]:
+    settings = get_settings()
+    return settings.signing_keys, settings.active_kid
+
+
+def reset_token_cache() -> None:
+    """Forget cached claims and re-read the signing keys from settings."""
+    _claims_cache.clear()
+    _keyring.cache_clear()
+
+
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
     settings = get_settings()
     if expires_delta is None:
         expires_delta = settings.access_token_expires
     expire = datetime.utcnow() + expires_delta
     to_encode = {"sub": subject, "exp": expire}
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
+    keys, kid = _keyring()
+    return jwt.encode(to_encode, keys[kid], algorithm="HS256", headers={"kid": kid})
 
 
-def verify_access_token(token: str) -> Optional[str]:
-    settings = get_settings()
+def _verifying_kid(kid: Optional[str]) -> str:
+    # tokens issued before key rotation carry no kid; they verify against kid "default"
+    return kid if kid is not None else "default"
+
+
+def decode_access_token(token: str) -> Optional[CachedClaims]:
+    keys, _ = _keyring()
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        return payload.get("sub")
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = keys.get(_verifying_kid(kid))
+        if key is None:
+            return None
+        payload = jwt.decode(token, key, algorithms=["HS256"])
     except JWTError:
         return None
+    expires_at = payload.get("exp")
+    return CachedClaims(payload.get("sub"), float(expires_at) if expires_at is not None else 0.0, kid)
+
+
+def verify_access_token(token: str) -> Optional[str]:
+    cached = _claims_cache.get(token)
+    if cached is not None:
+        if cached.expires_at > time.time() and _verifying_kid(cached.kid) in _keyring()[0]:
+            return cached.subject
+        _claims_cache.pop(token, None)
+
+    claims = decode_access_token(token)
+    if claims is None:
+        return None
+    if claims.expires_at:
+        # the cache expires entries by time.time(); hold fresh decodes to the same clock
+        if claims.expires_at <= time.time():
+            return None
+        if len(_claims_cache) >= get_settings().TOKEN_CACHE_SIZE:
+            _evict_claims()
+        _claims_cache[token] = claims
+    return claims.subject
+
+
+def bearer_subject(scope) -> Optional[str]:
+    """Subject of the request's bearer token, verified once per request.
+
+    The result is kept in the ASGI scope's ``state`` (``request.state``), so
+    the rate limiter, ``get_session`` and ``get_current_user`` share one check.
+    """
+    state = scope.setdefault("state", {})
+    if "auth_subject" not in state:
+        authorization = next(
+            (value.decode("latin-1") for name, value in scope.get("headers", ()) if name == b"authorization"),
+            "",
+        )
+        is_bearer = authorization[:7].lower() == "bearer "
+        state["auth_subject"] = verify_access_token(authorization[7:]) if is_bearer else None
+    return state["auth_subject"]
+
+
+def _evict_claims() -> None:
+    now = time.time()
+    for token in [t for t, claims in _claims_cache.items() if claims.expires_at <= now]:
+        del _claims_cache[token]
+    if len(_claims_cache) >= get_settings().TOKEN_CACHE_SIZE:
+        # drop the oldest insertion; dicts preserve insertion order
+        _claims_cache.pop(next(iter(_claims_cache)))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -33,3 +116,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def hash_qr_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
@@ -1,16 +1,211 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import declarative_base
+import time
+from typing import Callable, Dict, Optional
 
-from .core.config import get_settings
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from .core.config import Settings, get_settings
+from .core.metrics import registry
+from .core.security import bearer_subject
 
 settings = get_settings()
 
-engine = create_async_engine(settings.DATABASE_URL, future=True, echo=False)
+
+def engine_options(settings: Settings, database_url: Optional[str] = None) -> dict:
+    url = make_url(database_url or settings.DATABASE_URL)
+    options = {"future": True, "echo": False, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite":
+        # SQLite picks its own pool class; only the busy timeout applies.
+        options["connect_args"] = {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+        return options
+
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if url.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def create_database_engine(database_url: str) -> AsyncEngine:
+    created = create_async_engine(database_url, **engine_options(settings, database_url))
+    if created.dialect.name == "sqlite":
+        event.listen(created.sync_engine, "connect", _set_sqlite_pragmas)
+    return created
+
+
+engine = create_database_engine(settings.DATABASE_URL)
+# without a replica, opted-in reads use the primary through a read-only session
+replica_engine = engine
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_database_engine(settings.DATABASE_REPLICA_URL)
+
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+ReadSessionLocal = async_sessionmaker(
+    replica_engine, expire_on_commit=False, class_=AsyncSession, info={"read_only": True}
+)
 
 Base = declarative_base()
 
 
-async def get_session() -> AsyncSession:
-    async with SessionLocal() as session:
+def _pool_stat(name: str) -> float:
+    stat = getattr(engine.sync_engine.pool, name, None)
+    return float(stat()) if callable(stat) else 0.0
+
+
+def pool_saturation() -> float:
+    """Share of the pool's capacity (size + max overflow) currently checked out."""
+    if not hasattr(engine.sync_engine.pool, "overflow"):
+        return 0.0
+    # the engine was created with settings.DB_MAX_OVERFLOW (see engine_options)
+    capacity = _pool_stat("size") + max(settings.DB_MAX_OVERFLOW, 0)
+    return _pool_stat("checkedout") / capacity if capacity else 0.0
+
+
+POOL_CHECKOUT_SECONDS = registry.histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+registry.gauge("db_pool_size", "Configured pool size", callback=lambda: _pool_stat("size"))
+registry.gauge("db_pool_checked_out", "Connections currently in use", callback=lambda: _pool_stat("checkedout"))
+registry.gauge(
+    "db_pool_overflow",
+    "Connections opened beyond the pool size",
+    callback=lambda: max(0.0, _pool_stat("overflow")),
+)
+
+
+class ReadOnlySessionError(RuntimeError):
+    pass
+
+
+class RecentWriters:
+    """Subjects that committed a write in the last ``window`` seconds.
+
+    Their reads stay on the primary so they see their own writes despite
+    replica lag. The record is per process, like the other in-memory state.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        max_entries: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+        self._written_at: Dict[str, float] = {}
+
+    def mark(self, subject: str) -> None:
+        now = self.clock()
+        if len(self._written_at) >= self.max_entries:
+            cutoff = now - self.window
+            self._written_at = {key: at for key, at in self._written_at.items() if at > cutoff}
+            while len(self._written_at) >= self.max_entries:
+                self._written_at.pop(next(iter(self._written_at)))
+        self._written_at.pop(subject, None)
+        self._written_at[subject] = now
+
+    def is_recent(self, subject: Optional[str]) -> bool:
+        written_at = self._written_at.get(subject) if subject else None
+        return written_at is not None and self.clock() - written_at < self.window
+
+
+recent_writers = RecentWriters(settings.READ_YOUR_WRITES_SECONDS)
+
+
+def _mark_write(session: Session) -> None:
+    if session.info.get("read_only"):
+        raise ReadOnlySessionError("Writes are not allowed in a read-only session")
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "before_flush")
+def _check_flush(session, flush_context, instances):
+    _mark_write(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _check_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write(orm_execute_state.session)
+
+
+def _start_checkout_timer(session: Session) -> None:
+    # flushes and statements run before the session checks out a connection for
+    # its transaction; the pool emits no event of its own before a checkout waits
+    if "connected" not in session.info:
+        session.info.setdefault("checkout_started", time.perf_counter())
+
+
+@event.listens_for(Session, "before_flush")
+def _time_flush_checkout(session, flush_context, instances):
+    _start_checkout_timer(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _time_statement_checkout(orm_execute_state):
+    _start_checkout_timer(orm_execute_state.session)
+
+
+@event.listens_for(Session, "after_begin")
+def _observe_checkout(session, transaction, connection):
+    started = session.info.pop("checkout_started", None)
+    session.info["connected"] = True
+    if started is not None:
+        POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_connection(session, transaction):
+    if transaction.parent is None:
+        # the connection went back to the pool; the next statement checks one out again
+        session.info.pop("connected", None)
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session):
+    if session.info.pop("wrote", False) and session.info.get("subject"):
+        recent_writers.mark(session.info["subject"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
+
+async def use_read_replica(request: Request) -> None:
+    """Route dependency: serve this GET route's ``get_session`` from the read replica."""
+    request.state.read_replica = True
+
+
+async def get_session(request: Request) -> AsyncSession:
+    # no connection is checked out until the handler runs its first statement
+    subject = bearer_subject(request.scope)
+    factory, info = SessionLocal, {"subject": subject}
+    if request.method in {"GET", "HEAD"} and getattr(request.state, "read_replica", False):
+        info["read_only"] = True
+        if not recent_writers.is_recent(subject):
+            factory = ReadSessionLocal
+    async with factory(info=info) as session:
         yield session
@@ -1,18 +1,44 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from .api.routes import admin, auth, merchants, stamp_books
+from .api.routes import admin, auth, merchant_directory, merchants, stamp_books
 from .core.config import get_settings
-from .database import Base, engine
+from .core.instrumentation import PerformanceMiddleware, install_query_hooks
+from .core.metrics import registry
+from .core.rate_limit import RateLimitMiddleware
+from .database import SessionLocal, engine
+from .migrate import ensure_schema
+from .services.campaigns import campaign_events
+from .services.health import loop_lag_monitor, readiness
+from .services.jobs import job_queue
+from .shards import shard_router
 
 settings = get_settings()
 
 app = FastAPI(title=settings.PROJECT_NAME)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(PerformanceMiddleware)
+install_query_hooks(engine.sync_engine)
+for shard in shard_router.shards[1:]:
+    install_query_hooks(shard.engine.sync_engine)
 
 
 @app.on_event("startup")
 async def on_startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await ensure_schema(engine)
+    loop_lag_monitor.start()
+    campaign_events.start(SessionLocal)
+    job_queue.start(SessionLocal)
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await loop_lag_monitor.stop()
+    # jobs may still add campaign events, so drain them first
+    await job_queue.stop()
+    await campaign_events.stop()
+    await shard_router.dispose()
+    await engine.dispose()
 
 
 @app.get("/health", tags=["health"])
@@ -20,7 +46,24 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/health/live", tags=["health"])
+async def liveness_check():
+    return {"status": "ok"}
+
+
+@app.get("/health/ready", tags=["health"])
+async def readiness_check():
+    report = await readiness()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 app.include_router(auth.router, prefix=settings.API_V1_STR)
 app.include_router(stamp_books.router, prefix=settings.API_V1_STR)
 app.include_router(merchants.router, prefix=settings.API_V1_STR)
+app.include_router(merchant_directory.router, prefix=settings.API_V1_STR)
 app.include_router(admin.router, prefix=settings.API_V1_STR)
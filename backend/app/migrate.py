@@ -0,0 +1,147 @@
+"""Schema migrations.
+
+Run ``python -m backend.app.migrate`` once per deploy, before starting the
+workers, followed by ``python -m backend.app.shards`` when sharding is on.
+Workers only compare the database and shard revisions with the migration
+head on startup (see :func:`ensure_schema`).
+"""
+import argparse
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from .core.config import get_settings
+from .database import engine
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+# the schema ``create_all`` produced before migrations were introduced
+BASELINE_REVISION = "0001"
+# arbitrary key shared by every process that may run migrations
+MIGRATION_LOCK_KEY = 0x7C4A5453
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def alembic_config() -> Config:
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    return config
+
+
+def head_revision(config: Optional[Config] = None) -> Optional[str]:
+    return ScriptDirectory.from_config(config or alembic_config()).get_current_head()
+
+
+async def current_revision(bind: AsyncEngine = engine) -> Optional[str]:
+    async with bind.connect() as conn:
+        return await conn.run_sync(lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision())
+
+
+@asynccontextmanager
+async def _sqlite_file_lock(database: Optional[str]):
+    if fcntl is None or not database or database == ":memory:":
+        yield
+        return
+    fd = os.open(f"{database}.migrate.lock", os.O_CREAT | os.O_RDWR)
+    try:
+        await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+@asynccontextmanager
+async def migration_lock(bind: AsyncEngine = engine):
+    """Yield a connection on which only one process at a time may migrate."""
+    url = make_url(str(bind.url))
+    async with _sqlite_file_lock(url.database if url.get_backend_name() == "sqlite" else None):
+        async with bind.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                # released automatically when the migration transaction ends
+                await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            yield conn
+            await conn.commit()
+
+
+async def _run(conn: AsyncConnection, operation, revision: str) -> None:
+    config = alembic_config()
+
+    def run(sync_conn):
+        config.attributes["connection"] = sync_conn
+        operation(config, revision)
+
+    await conn.run_sync(run)
+
+
+async def upgrade(revision: str = "head", bind: AsyncEngine = engine) -> None:
+    async with migration_lock(bind) as conn:
+        await _run(conn, command.upgrade, revision)
+
+
+async def stamp(revision: str = "head", bind: AsyncEngine = engine) -> None:
+    async with migration_lock(bind) as conn:
+        await _run(conn, command.stamp, revision)
+
+
+async def ensure_schema(bind: AsyncEngine = engine) -> None:
+    """Startup check: one cheap query against ``alembic_version``, and one per extra shard."""
+    # shards builds its schema with the helpers of this module
+    from .shards import ensure_shard_schemas
+
+    head = head_revision()
+    current = await current_revision(bind)
+    if current != head:
+        if not get_settings().DB_AUTO_MIGRATE:
+            raise SchemaOutOfDate(
+                f"Database schema revision is {current!r}, expected {head!r}. "
+                "Run `python -m backend.app.migrate` before starting the API."
+            )
+        await upgrade("head", bind)
+    await ensure_shard_schemas()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument("revision", nargs="?", help="target revision (default: head)")
+    parser.add_argument(
+        "--stamp",
+        action="store_true",
+        help="mark an existing database as being at REVISION without running migrations "
+        f"(a database created by create_all before migrations is at {BASELINE_REVISION})",
+    )
+    args = parser.parse_args()
+    if args.stamp and args.revision is None:
+        # stamping head would skip every migration the database has not actually run
+        parser.error(f"--stamp needs an explicit REVISION, e.g. --stamp {BASELINE_REVISION}")
+
+    async def run():
+        try:
+            if args.stamp:
+                await stamp(args.revision)
+            else:
+                await upgrade(args.revision or "head")
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
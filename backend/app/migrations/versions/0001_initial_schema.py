@@ -0,0 +1,179 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("full_name", sa.String(255), nullable=True),
+        sa.Column("role", sa.String(50), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "merchants",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("category", sa.String(120), nullable=True),
+        sa.Column("address", sa.String(255), nullable=True),
+        sa.Column("latitude", sa.Float(), nullable=True),
+        sa.Column("longitude", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_merchants_id", "merchants", ["id"])
+
+    op.create_table(
+        "merchant_contracts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("merchant_id", sa.Integer(), sa.ForeignKey("merchants.id"), nullable=False),
+        sa.Column("start_at", sa.DateTime(), nullable=False),
+        sa.Column("end_at", sa.DateTime(), nullable=True),
+        sa.Column("fee_plan", sa.String(120), nullable=True),
+        sa.Column("discount_rate", sa.Float(), nullable=True),
+    )
+    op.create_index("ix_merchant_contracts_id", "merchant_contracts", ["id"])
+
+    op.create_table(
+        "performances",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("venue", sa.String(255), nullable=True),
+        sa.Column("start_at", sa.DateTime(), nullable=False),
+        sa.Column("end_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_performances_id", "performances", ["id"])
+
+    op.create_table(
+        "stamp_books",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("performance_id", sa.Integer(), sa.ForeignKey("performances.id"), nullable=False),
+        sa.Column("issued_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.UniqueConstraint("user_id", "performance_id", name="uq_stampbook_user_performance"),
+    )
+    op.create_index("ix_stamp_books_id", "stamp_books", ["id"])
+
+    op.create_table(
+        "qr_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("merchant_id", sa.Integer(), sa.ForeignKey("merchants.id"), nullable=False),
+        sa.Column("token_hash", sa.String(255), nullable=False, unique=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("usage_limit", sa.Integer(), nullable=True),
+        sa.Column("usage_count", sa.Integer(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_qr_tokens_id", "qr_tokens", ["id"])
+
+    op.create_table(
+        "stamps",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("stamp_book_id", sa.Integer(), sa.ForeignKey("stamp_books.id"), nullable=False),
+        sa.Column("merchant_id", sa.Integer(), sa.ForeignKey("merchants.id"), nullable=False),
+        sa.Column("qr_token_id", sa.Integer(), sa.ForeignKey("qr_tokens.id"), nullable=True),
+        sa.Column("visit_at", sa.DateTime(), nullable=False),
+        sa.Column("discount_amount", sa.Float(), nullable=True),
+        sa.Column("approval_method", sa.String(50), nullable=True),
+        sa.Column("photo_url", sa.String(255), nullable=True),
+        sa.Column("status", sa.String(50), nullable=False),
+    )
+    op.create_index("ix_stamps_id", "stamps", ["id"])
+
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("stamp_id", sa.Integer(), sa.ForeignKey("stamps.id"), nullable=False),
+        sa.Column("amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("payment_method", sa.String(50), nullable=False),
+        sa.Column("receipt_reference", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_transactions_id", "transactions", ["id"])
+
+    op.create_table(
+        "campaigns",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("type", sa.String(50), nullable=False),
+        sa.Column("start_at", sa.DateTime(), nullable=False),
+        sa.Column("end_at", sa.DateTime(), nullable=True),
+        sa.Column("target_rules", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_campaigns_id", "campaigns", ["id"])
+
+    op.create_table(
+        "campaign_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("merchant_id", sa.Integer(), sa.ForeignKey("merchants.id"), nullable=True),
+        sa.Column("stamp_id", sa.Integer(), sa.ForeignKey("stamps.id"), nullable=True),
+        sa.Column("event_type", sa.String(50), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_campaign_events_id", "campaign_events", ["id"])
+
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("actor_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("actor_role", sa.String(50), nullable=False),
+        sa.Column("action", sa.String(255), nullable=False),
+        sa.Column("target_type", sa.String(120), nullable=False),
+        sa.Column("target_id", sa.Integer(), nullable=True),
+        sa.Column("metadata_json", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+
+    op.create_table(
+        "fraud_alerts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("stamp_id", sa.Integer(), sa.ForeignKey("stamps.id"), nullable=False),
+        sa.Column("reason", sa.String(255), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("resolved_by", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("resolved_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_fraud_alerts_id", "fraud_alerts", ["id"])
+
+
+def downgrade() -> None:
+    for table in (
+        "fraud_alerts",
+        "audit_logs",
+        "campaign_events",
+        "campaigns",
+        "transactions",
+        "stamps",
+        "qr_tokens",
+        "stamp_books",
+        "performances",
+        "merchant_contracts",
+        "merchants",
+        "users",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,38 @@
+"""merchant settlements
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_transactions_stamp_id", "transactions", ["stamp_id"])
+    op.create_table(
+        "merchant_settlements",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("merchant_id", sa.Integer(), sa.ForeignKey("merchants.id"), nullable=False),
+        sa.Column("period_start", sa.DateTime(), nullable=False),
+        sa.Column("period_end", sa.DateTime(), nullable=False),
+        sa.Column("stamp_count", sa.Integer(), nullable=False),
+        sa.Column("uncontracted_stamp_count", sa.Integer(), nullable=False),
+        sa.Column("gross_amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("discount_amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("fee_amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("net_amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("merchant_id", "period_start", "period_end", name="uq_settlement_merchant_period"),
+    )
+    op.create_index("ix_merchant_settlements_id", "merchant_settlements", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("merchant_settlements")
+    op.drop_index("ix_transactions_stamp_id", table_name="transactions")
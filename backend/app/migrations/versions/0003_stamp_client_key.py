@@ -0,0 +1,25 @@
+"""stamp client idempotency key
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("stamps") as batch_op:
+        batch_op.add_column(sa.Column("client_key", sa.String(64), nullable=True))
+        batch_op.create_unique_constraint("uq_stamp_merchant_client_key", ["merchant_id", "client_key"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("stamps") as batch_op:
+        batch_op.drop_constraint("uq_stamp_merchant_client_key", type_="unique")
+        batch_op.drop_column("client_key")
@@ -0,0 +1,121 @@
+"""partition audit logs by month
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+PostgreSQL: ``audit_logs`` becomes a table range-partitioned on
+``created_at`` with one partition per month and a default partition.
+Other databases keep a plain table; cold months are rolled into
+``audit_logs_YYYYMM`` tables by ``backend.app.services.audit_partitions``.
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, actor_id, actor_role, action, target_type, target_id, metadata_json, created_at"
+INDEXES = [
+    ("ix_audit_logs_created_at_id", ["created_at", "id"]),
+    ("ix_audit_logs_actor_created_at", ["actor_id", "created_at"]),
+    ("ix_audit_logs_target_created_at", ["target_type", "target_id", "created_at"]),
+]
+MONTHS_AHEAD = 2
+
+
+def _next_month(month: datetime) -> datetime:
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def _create_indexes() -> None:
+    for name, columns in INDEXES:
+        op.create_index(name, "audit_logs", columns)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        _create_indexes()
+        return
+
+    bind = op.get_bind()
+    op.drop_index("ix_audit_logs_id", table_name="audit_logs")
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned")
+    # primary key names share the index namespace; free it for the new table
+    op.execute("ALTER INDEX audit_logs_pkey RENAME TO audit_logs_unpartitioned_pkey")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    op.execute(
+        """
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            actor_id INTEGER NOT NULL REFERENCES users (id),
+            actor_role VARCHAR(50) NOT NULL,
+            action VARCHAR(255) NOT NULL,
+            target_type VARCHAR(120) NOT NULL,
+            target_id INTEGER,
+            metadata_json TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    now = datetime.utcnow()
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM audit_logs_unpartitioned")).scalar() or now
+    month = min(oldest, now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        upper = _next_month(month)
+        op.execute(
+            f"CREATE TABLE audit_logs_{month:%Y%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_unpartitioned")
+    op.execute("DROP TABLE audit_logs_unpartitioned")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+    _create_indexes()
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name="audit_logs")
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    # primary key names share the index namespace; free it for the new table
+    op.execute("ALTER INDEX audit_logs_pkey RENAME TO audit_logs_partitioned_pkey")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX {name}")
+    op.execute("DROP INDEX ix_audit_logs_id")
+    op.execute(
+        """
+        CREATE TABLE audit_logs (
+            id INTEGER PRIMARY KEY DEFAULT nextval('audit_logs_id_seq'),
+            actor_id INTEGER NOT NULL REFERENCES users (id),
+            actor_role VARCHAR(50) NOT NULL,
+            action VARCHAR(255) NOT NULL,
+            target_type VARCHAR(120) NOT NULL,
+            target_id INTEGER,
+            metadata_json TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+        """
+    )
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    op.execute("DROP TABLE audit_logs_partitioned CASCADE")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
@@ -0,0 +1,50 @@
+"""stamp book counters
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+COUNTERS = ("approved_count", "pending_count", "rejected_count")
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("stamp_books") as batch_op:
+        for name in COUNTERS:
+            batch_op.add_column(sa.Column(name, sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("total_discount", sa.Float(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("last_stamp_at", sa.DateTime(), nullable=True))
+    # backs the backfill below, recounts and loading a book's stamps
+    op.create_index("ix_stamps_stamp_book_id", "stamps", ["stamp_book_id"])
+
+    op.execute(
+        """
+        UPDATE stamp_books SET
+            approved_count = (SELECT count(*) FROM stamps
+                              WHERE stamps.stamp_book_id = stamp_books.id AND stamps.status = 'approved'),
+            pending_count = (SELECT count(*) FROM stamps
+                             WHERE stamps.stamp_book_id = stamp_books.id AND stamps.status = 'pending'),
+            rejected_count = (SELECT count(*) FROM stamps
+                              WHERE stamps.stamp_book_id = stamp_books.id AND stamps.status = 'rejected'),
+            total_discount = COALESCE((SELECT sum(discount_amount) FROM stamps
+                                       WHERE stamps.stamp_book_id = stamp_books.id
+                                       AND stamps.status = 'approved'), 0),
+            last_stamp_at = (SELECT max(visit_at) FROM stamps WHERE stamps.stamp_book_id = stamp_books.id)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stamps_stamp_book_id", table_name="stamps")
+    with op.batch_alter_table("stamp_books") as batch_op:
+        batch_op.drop_column("last_stamp_at")
+        batch_op.drop_column("total_discount")
+        for name in reversed(COUNTERS):
+            batch_op.drop_column(name)
@@ -0,0 +1,33 @@
+"""dead letter jobs
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dead_letter_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("job_name", sa.String(100), nullable=False),
+        sa.Column("payload_json", sa.Text(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_dead_letter_jobs_id", "dead_letter_jobs", ["id"])
+    op.create_index("ix_dead_letter_jobs_job_name", "dead_letter_jobs", ["job_name"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_dead_letter_jobs_job_name", table_name="dead_letter_jobs")
+    op.drop_index("ix_dead_letter_jobs_id", table_name="dead_letter_jobs")
+    op.drop_table("dead_letter_jobs")
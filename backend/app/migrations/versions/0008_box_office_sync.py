@@ -0,0 +1,35 @@
+"""box office sync
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(sa.Column("phone", sa.String(32), nullable=True))
+        batch_op.create_index("ix_users_phone", ["phone"])
+    op.create_table(
+        "box_office_links",
+        sa.Column("source_performance_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("performance_id", sa.Integer(), sa.ForeignKey("performances.id"), nullable=False),
+        sa.Column("source_updated_at", sa.DateTime(), nullable=True),
+        sa.Column("synced_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_box_office_links_performance_id", "box_office_links", ["performance_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_box_office_links_performance_id", table_name="box_office_links")
+    op.drop_table("box_office_links")
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_index("ix_users_phone")
+        batch_op.drop_column("phone")
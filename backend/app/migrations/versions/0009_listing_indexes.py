@@ -0,0 +1,52 @@
+"""merchant queue and fraud alert listing indexes
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 00:00:00
+
+0001 describes the schema ``create_all`` produced before migrations, so a
+database stamped at 0001 still needs these. ``if_not_exists`` keeps the
+revision safe for databases created after the indexes were added to the models.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_merchants_owner_id", "merchants", ["owner_id"], if_not_exists=True)
+    op.create_index(
+        "ix_stamps_merchant_status_visit_at",
+        "stamps",
+        ["merchant_id", "status", "visit_at", "id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_stamps_pending_merchant_visit_at",
+        "stamps",
+        ["merchant_id", "visit_at", "id"],
+        postgresql_where=sa.text("status = 'pending'"),
+        sqlite_where=sa.text("status = 'pending'"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_fraud_alerts_created_at_id", "fraud_alerts", ["created_at", "id"], if_not_exists=True)
+    op.create_index(
+        "ix_fraud_alerts_status_created_at_id",
+        "fraud_alerts",
+        ["status", "created_at", "id"],
+        if_not_exists=True,
+    )
+    op.create_index("ix_fraud_alerts_status_score", "fraud_alerts", ["status", "score"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_fraud_alerts_status_score", table_name="fraud_alerts")
+    op.drop_index("ix_fraud_alerts_status_created_at_id", table_name="fraud_alerts")
+    op.drop_index("ix_fraud_alerts_created_at_id", table_name="fraud_alerts")
+    op.drop_index("ix_stamps_pending_merchant_visit_at", table_name="stamps")
+    op.drop_index("ix_stamps_merchant_status_visit_at", table_name="stamps")
+    op.drop_index("ix_merchants_owner_id", table_name="merchants")
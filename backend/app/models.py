@@ -7,11 +7,13 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
     Text,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -43,6 +45,8 @@ class User(Base):
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     hashed_password: Mapped[str] = mapped_column(String(255))
     full_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # digits only (utils/phone.py); matches box-office buyers to accounts
+    phone: Mapped[Optional[str]] = mapped_column(String(32), nullable=True, index=True)
     role: Mapped[str] = mapped_column(String(50), default=RoleEnum.USER.value)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -55,7 +59,7 @@ class Merchant(Base):
     __tablename__ = "merchants"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     name: Mapped[str] = mapped_column(String(255))
     category: Mapped[Optional[str]] = mapped_column(String(120))
     address: Mapped[Optional[str]] = mapped_column(String(255))
@@ -95,6 +99,18 @@ class Performance(Base):
     stamp_books: Mapped[List["StampBook"]] = relationship("StampBook", back_populates="performance")
 
 
+class BoxOfficeLink(Base):
+    """Integrated box-office performance mapped to a stamp network performance."""
+
+    __tablename__ = "box_office_links"
+
+    source_performance_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    performance_id: Mapped[int] = mapped_column(ForeignKey("performances.id"), index=True)
+    # updated_at of the source row at the last sync; re-uploads move it forward
+    source_updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    synced_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
 class StampBook(Base):
     __tablename__ = "stamp_books"
     __table_args__ = (
@@ -107,6 +123,12 @@ class StampBook(Base):
     issued_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     status: Mapped[str] = mapped_column(String(50), default="active")
+    # maintained by services/stamp_counters.py in the same transaction as stamp writes
+    approved_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    pending_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rejected_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_discount: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+    last_stamp_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     user: Mapped[User] = relationship("User", back_populates="stamp_books")
     performance: Mapped[Performance] = relationship("Performance", back_populates="stamp_books")
@@ -130,9 +152,21 @@ class QRToken(Base):
 
 class Stamp(Base):
     __tablename__ = "stamps"
+    __table_args__ = (
+        Index("ix_stamps_merchant_status_visit_at", "merchant_id", "status", "visit_at", "id"),
+        Index(
+            "ix_stamps_pending_merchant_visit_at",
+            "merchant_id",
+            "visit_at",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+        UniqueConstraint("merchant_id", "client_key", name="uq_stamp_merchant_client_key"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    stamp_book_id: Mapped[int] = mapped_column(ForeignKey("stamp_books.id"))
+    stamp_book_id: Mapped[int] = mapped_column(ForeignKey("stamp_books.id"), index=True)
     merchant_id: Mapped[int] = mapped_column(ForeignKey("merchants.id"))
     qr_token_id: Mapped[Optional[int]] = mapped_column(ForeignKey("qr_tokens.id"), nullable=True)
     visit_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -140,6 +174,7 @@ class Stamp(Base):
     approval_method: Mapped[Optional[str]] = mapped_column(String(50))
     photo_url: Mapped[Optional[str]] = mapped_column(String(255))
     status: Mapped[str] = mapped_column(String(50), default=StampStatus.PENDING.value)
+    client_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     stamp_book: Mapped[StampBook] = relationship("StampBook", back_populates="stamps")
     merchant: Mapped[Merchant] = relationship("Merchant", back_populates="stamp_books")
@@ -154,7 +189,7 @@ class Transaction(Base):
     __tablename__ = "transactions"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    stamp_id: Mapped[int] = mapped_column(ForeignKey("stamps.id"))
+    stamp_id: Mapped[int] = mapped_column(ForeignKey("stamps.id"), index=True)
     amount: Mapped[float] = mapped_column(Numeric(10, 2))
     payment_method: Mapped[str] = mapped_column(String(50))
     receipt_reference: Mapped[Optional[str]] = mapped_column(String(255))
@@ -190,8 +225,25 @@ class CampaignEvent(Base):
     campaign: Mapped[Campaign] = relationship("Campaign", back_populates="events")
 
 
+class ResourceVersion(Base):
+    """Change counter per owner, bumped in the same transaction as the data it covers."""
+
+    __tablename__ = "resource_versions"
+
+    scope: Mapped[str] = mapped_column(String(32), primary_key=True)
+    owner_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # On PostgreSQL the table is partitioned by month and its primary key is
+    # (id, created_at); see migration 0004 and services/audit_partitions.py.
+    __table_args__ = (
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        Index("ix_audit_logs_actor_created_at", "actor_id", "created_at"),
+        Index("ix_audit_logs_target_created_at", "target_type", "target_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     actor_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -203,8 +255,26 @@ class AuditLog(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+class DeadLetterJob(Base):
+    """Background job that failed every attempt or was cut off by shutdown."""
+
+    __tablename__ = "dead_letter_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    job_name: Mapped[str] = mapped_column(String(100), index=True)
+    payload_json: Mapped[str] = mapped_column(Text)
+    error: Mapped[str] = mapped_column(Text)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
 class FraudAlert(Base):
     __tablename__ = "fraud_alerts"
+    __table_args__ = (
+        Index("ix_fraud_alerts_created_at_id", "created_at", "id"),
+        Index("ix_fraud_alerts_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_fraud_alerts_status_score", "status", "score"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     stamp_id: Mapped[int] = mapped_column(ForeignKey("stamps.id"))
@@ -216,3 +286,24 @@ class FraudAlert(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     stamp: Mapped[Stamp] = relationship("Stamp", back_populates="fraud_alerts")
+
+
+class MerchantSettlement(Base):
+    __tablename__ = "merchant_settlements"
+    __table_args__ = (
+        UniqueConstraint("merchant_id", "period_start", "period_end", name="uq_settlement_merchant_period"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    merchant_id: Mapped[int] = mapped_column(ForeignKey("merchants.id"))
+    period_start: Mapped[datetime] = mapped_column(DateTime)
+    period_end: Mapped[datetime] = mapped_column(DateTime)
+    stamp_count: Mapped[int] = mapped_column(Integer, default=0)
+    uncontracted_stamp_count: Mapped[int] = mapped_column(Integer, default=0)
+    gross_amount: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
+    discount_amount: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
+    fee_amount: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
+    net_amount: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    merchant: Mapped[Merchant] = relationship("Merchant")
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, List, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -18,6 +18,7 @@ class TokenPayload(BaseModel):
 class UserBase(BaseModel):
     email: EmailStr
     full_name: Optional[str] = None
+    phone: Optional[str] = None
 
 
 class UserCreate(UserBase):
@@ -55,6 +56,7 @@ class StampBase(BaseModel):
 
 class StampCreate(StampBase):
     qr_token_id: Optional[int] = None
+    qr_token: Optional[str] = None
 
 
 class StampRead(StampBase):
@@ -67,6 +69,40 @@ class StampRead(StampBase):
         from_attributes = True
 
 
+class StampPage(BaseModel):
+    items: List[StampRead]
+    next_cursor: Optional[str] = None
+
+
+class StampBulkApprove(BaseModel):
+    stamp_ids: List[int] = Field(min_length=1, max_length=500)
+
+
+class StampBulkApproveResult(BaseModel):
+    approved_ids: List[int]
+
+
+class StampBatchItem(StampBase):
+    idempotency_key: str = Field(min_length=1, max_length=64)
+    stamp_book_id: int
+    visit_at: Optional[datetime] = None
+
+
+class StampBatchCreate(BaseModel):
+    items: List[StampBatchItem] = Field(min_length=1, max_length=500)
+
+
+class StampBatchItemResult(BaseModel):
+    idempotency_key: str
+    status: str
+    stamp_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class StampBatchResult(BaseModel):
+    results: List[StampBatchItemResult]
+
+
 class StampBookBase(BaseModel):
     performance_id: int
     expires_at: Optional[datetime] = None
@@ -87,6 +123,21 @@ class StampBookRead(StampBookBase):
         from_attributes = True
 
 
+class StampBookSummary(BaseModel):
+    id: int
+    performance_id: int
+    status: str
+    expires_at: Optional[datetime] = None
+    approved_count: int
+    pending_count: int
+    rejected_count: int
+    total_discount: float
+    last_stamp_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class MerchantRead(BaseModel):
     id: int
     name: str
@@ -98,6 +149,12 @@ class MerchantRead(BaseModel):
         from_attributes = True
 
 
+class NearbyMerchantRead(MerchantRead):
+    latitude: float
+    longitude: float
+    distance_m: float
+
+
 class FraudAlertRead(BaseModel):
     id: int
     stamp_id: int
@@ -110,6 +167,16 @@ class FraudAlertRead(BaseModel):
         from_attributes = True
 
 
+class FraudAlertPage(BaseModel):
+    items: List[FraudAlertRead]
+    next_cursor: Optional[str] = None
+
+
+class CountRead(BaseModel):
+    count: int
+    estimated: bool = False
+
+
 class FraudAlertResolve(BaseModel):
     status: str = Field(pattern="^(reviewing|resolved)$")
 
@@ -126,3 +193,16 @@ class AuditLogRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogRead]
+    next_cursor: Optional[str] = None
+
+
+class SlowQueryRead(BaseModel):
+    statement: str
+    parameters: Any = None
+    duration_ms: float
+    path: Optional[str] = None
+    recorded_at: datetime
@@ -0,0 +1,363 @@
+"""Monthly audit log partitions.
+
+On PostgreSQL ``audit_logs`` is range-partitioned on ``created_at``
+(migration 0004): one ``audit_logs_YYYYMM`` partition per month plus
+``audit_logs_default``, and the planner prunes partitions outside the
+``created_at`` bounds of a query. ``ensure_partitions`` creates the next
+months ahead of time so new rows never land in the default partition.
+
+Other databases write to a plain ``audit_logs`` table; ``roll_over`` moves
+the rows of finished months into standalone ``audit_logs_YYYYMM`` tables so
+the hot table and its indexes only hold the current month, and
+``query_audit_logs`` reads only the tables that overlap the requested range.
+
+Partitions older than ``AUDIT_LOG_HOT_MONTHS`` are written to
+``AUDIT_LOG_ARCHIVE_DIR/audit_logs_YYYYMM.jsonl.gz`` and dropped.
+
+With sharding every extra shard keeps its own ``audit_logs`` (partitioned
+the same way on PostgreSQL, see :func:`create_partitioned_table`); the
+command maintains each of them and archives shard ``k`` under
+``AUDIT_LOG_ARCHIVE_DIR/shardk``.
+
+    python -m backend.app.services.audit_partitions
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Column,
+    Index,
+    MetaData,
+    Table,
+    and_,
+    delete,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from ..core.config import get_settings
+from ..models import AuditLog
+
+MONTHS_AHEAD = 2
+ARCHIVE_CHUNK_SIZE = 5_000
+_PARTITION_NAME = re.compile(r"^audit_logs_(\d{4})(\d{2})$")
+_tables: Dict[str, Table] = {}
+
+
+class ArchivedPartition(NamedTuple):
+    name: str
+    path: str
+    rows: int
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{AuditLog.__tablename__}_{month:%Y%m}"
+
+
+def partition_table(name: str) -> Table:
+    """Core table for ``name`` with the columns and indexes of ``audit_logs``."""
+    table = _tables.get(name)
+    if table is None:
+        source = AuditLog.__table__
+        table = Table(
+            name,
+            MetaData(),
+            *(Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in source.columns),
+        )
+        for index in source.indexes:
+            # index names are database-wide on SQLite
+            Index(index.name.replace(source.name, name, 1), *(table.c[c.name] for c in index.columns))
+        _tables[name] = table
+    return table
+
+
+async def list_partitions(conn: AsyncConnection) -> List[Tuple[datetime, str]]:
+    """Return ``(month, table name)`` of every monthly partition, oldest first."""
+    if conn.dialect.name == "postgresql":
+        result = await conn.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": AuditLog.__tablename__},
+        )
+        names = result.scalars().all()
+    else:
+        names = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions.append((datetime(int(match.group(1)), int(match.group(2)), 1), name))
+    return sorted(partitions)
+
+
+async def create_partitioned_table(conn: AsyncConnection) -> None:
+    """Create a month-partitioned ``audit_logs`` on a PostgreSQL shard.
+
+    Same table as migration 0004 builds on the primary, without the
+    ``users`` foreign key a shard cannot hold. Indexes and monthly
+    partitions are added afterwards like for any other table.
+    """
+    name = AuditLog.__tablename__
+    await conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {name}_id_seq"))
+    await conn.execute(
+        text(
+            f"""
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER NOT NULL DEFAULT nextval('{name}_id_seq'),
+                actor_id INTEGER NOT NULL,
+                actor_role VARCHAR(50) NOT NULL,
+                action VARCHAR(255) NOT NULL,
+                target_type VARCHAR(120) NOT NULL,
+                target_id INTEGER,
+                metadata_json TEXT,
+                created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+            """
+        )
+    )
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name}_default PARTITION OF {name} DEFAULT"))
+    await conn.execute(text(f"ALTER SEQUENCE {name}_id_seq OWNED BY {name}.id"))
+
+
+async def ensure_partitions(
+    conn: AsyncConnection,
+    now: datetime,
+    months_ahead: int = MONTHS_AHEAD,
+) -> List[str]:
+    """Create PostgreSQL partitions for the current and next ``months_ahead`` months."""
+    if conn.dialect.name != "postgresql":
+        return []
+    existing = {name for _, name in await list_partitions(conn)}
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(month_start(now), offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        await conn.execute(
+            text(
+                f"CREATE TABLE {name} PARTITION OF {AuditLog.__tablename__} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+        )
+        created.append(name)
+    return created
+
+
+async def roll_over(conn: AsyncConnection, now: datetime) -> Dict[str, int]:
+    """Move rows of finished months out of the hot table (non-PostgreSQL only)."""
+    if conn.dialect.name == "postgresql":
+        return {}
+    source = AuditLog.__table__
+    cutoff = month_start(now)
+    oldest = await conn.scalar(select(func.min(source.c.created_at)).where(source.c.created_at < cutoff))
+    moved = {}
+    month = month_start(oldest) if oldest is not None else cutoff
+    while month < cutoff:
+        upper = add_months(month, 1)
+        table = partition_table(partition_name(month))
+        await conn.run_sync(table.create, checkfirst=True)
+        in_month = and_(source.c.created_at >= month, source.c.created_at < upper)
+        result = await conn.execute(
+            insert(table).from_select([c.name for c in source.columns], select(source).where(in_month))
+        )
+        await conn.execute(delete(source).where(in_month))
+        if result.rowcount:
+            moved[table.name] = result.rowcount
+        month = upper
+    return moved
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def archive_partitions(
+    conn: AsyncConnection,
+    now: datetime,
+    hot_months: int,
+    archive_dir: str,
+) -> List[ArchivedPartition]:
+    """Write partitions older than ``hot_months`` to gzipped JSON lines and drop them."""
+    cutoff = add_months(month_start(now), -hot_months)
+    archived = []
+    for month, name in await list_partitions(conn):
+        if month >= cutoff:
+            continue
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{name}.jsonl.gz")
+        table = partition_table(name)
+        rows = 0
+        result = await conn.stream(
+            select(table).order_by(table.c.id).execution_options(yield_per=ARCHIVE_CHUNK_SIZE)
+        )
+        # the table is only dropped once the complete file is in place
+        with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as handle:
+            async for chunk in result.partitions(ARCHIVE_CHUNK_SIZE):
+                for row in chunk:
+                    handle.write(json.dumps(row._asdict(), default=_json_default) + "\n")
+                    rows += 1
+        os.replace(f"{path}.tmp", path)
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text(f"ALTER TABLE {AuditLog.__tablename__} DETACH PARTITION {name}"))
+        await conn.execute(text(f"DROP TABLE {name}"))
+        archived.append(ArchivedPartition(name, path, rows))
+    return archived
+
+
+def _filters(
+    table: Table,
+    actor_id: Optional[int],
+    action: Optional[str],
+    target_type: Optional[str],
+    target_id: Optional[int],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    cursor: Optional[Tuple[datetime, int]],
+) -> list:
+    conditions = []
+    if actor_id is not None:
+        conditions.append(table.c.actor_id == actor_id)
+    if action is not None:
+        conditions.append(table.c.action == action)
+    if target_type is not None:
+        conditions.append(table.c.target_type == target_type)
+    if target_id is not None:
+        conditions.append(table.c.target_id == target_id)
+    if created_from is not None:
+        conditions.append(table.c.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(table.c.created_at < created_to)
+    if cursor is not None:
+        # the plain bound lets PostgreSQL prune partitions; the row comparison pages
+        conditions.append(table.c.created_at <= cursor[0])
+        conditions.append(tuple_(table.c.created_at, table.c.id) < tuple_(*cursor))
+    return conditions
+
+
+async def query_audit_logs(
+    session: AsyncSession,
+    *,
+    actor_id: Optional[int] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    target_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[Tuple[datetime, int]] = None,
+    limit: int = 50,
+) -> Sequence:
+    """Return up to ``limit + 1`` audit rows, newest first."""
+    conn = await session.connection()
+    tables = [AuditLog.__table__]
+    if conn.dialect.name != "postgresql":
+        # Rolled-over months only hold rows older than anything left in the hot
+        # table, so reading the hot table and then months newest-first keeps order.
+        for month, name in reversed(await list_partitions(conn)):
+            if created_from is not None and add_months(month, 1) <= created_from:
+                continue
+            if created_to is not None and month >= created_to:
+                continue
+            if cursor is not None and month > cursor[0]:
+                continue
+            tables.append(partition_table(name))
+
+    rows: List = []
+    for table in tables:
+        conditions = _filters(table, actor_id, action, target_type, target_id, created_from, created_to, cursor)
+        query = (
+            select(table)
+            .where(*conditions)
+            .order_by(table.c.created_at.desc(), table.c.id.desc())
+            .limit(limit + 1 - len(rows))
+        )
+        rows.extend((await session.execute(query)).all())
+        if len(rows) > limit:
+            break
+    return rows
+
+
+async def maintain(
+    engine: AsyncEngine,
+    now: Optional[datetime] = None,
+    archive_dir: Optional[str] = None,
+) -> dict:
+    settings = get_settings()
+    now = now or datetime.utcnow()
+    async with engine.begin() as conn:
+        created = await ensure_partitions(conn, now)
+    async with engine.begin() as conn:
+        moved = await roll_over(conn, now)
+    async with engine.begin() as conn:
+        archived = await archive_partitions(
+            conn, now, settings.AUDIT_LOG_HOT_MONTHS, archive_dir or settings.AUDIT_LOG_ARCHIVE_DIR
+        )
+    return {"created": created, "rolled_over": moved, "archived": archived}
+
+
+async def maintain_shards(shards: Sequence, now: Optional[datetime] = None) -> Dict[int, dict]:
+    """Run :func:`maintain` on the primary and every extra shard, keyed by shard index."""
+    archive_dir = get_settings().AUDIT_LOG_ARCHIVE_DIR
+    reports = {}
+    for shard in shards:
+        # partition names repeat across shards, so each shard archives to its own directory
+        shard_dir = archive_dir if shard.index == 0 else os.path.join(archive_dir, f"shard{shard.index}")
+        reports[shard.index] = await maintain(shard.engine, now, shard_dir)
+    return reports
+
+
+def main() -> None:
+    from ..database import engine
+    from ..shards import shard_router
+
+    parser = argparse.ArgumentParser(description="Create, roll over and archive monthly audit log partitions.")
+    parser.parse_args()
+
+    async def run():
+        try:
+            reports = await maintain_shards(shard_router.shards)
+        finally:
+            await shard_router.dispose()
+            await engine.dispose()
+        for index, report in reports.items():
+            for name in report["created"]:
+                print(f"shard {index}: created partition {name}")
+            for name, rows in report["rolled_over"].items():
+                print(f"shard {index}: rolled {rows} rows into {name}")
+            for partition in report["archived"]:
+                print(
+                    f"shard {index}: archived {partition.rows} rows of {partition.name} to {partition.path}"
+                )
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
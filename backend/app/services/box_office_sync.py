@@ -0,0 +1,246 @@
+"""Integrated box-office list -> stamp network sync.
+
+The Streamlit tool (``app.py``) keeps its own ``performances`` table
+(``performance_name`` plus TEXT ``performance_date``/``performance_time``)
+and the ``reservations`` uploaded for each show. This module maps every
+such show onto a backend :class:`~..models.Performance` (matched on title
+and start time, created when missing) and records the mapping in
+``box_office_links``. It then issues a :class:`~..models.StampBook` to each
+active user whose phone number matches a reservation of the show.
+
+Books are issued with one ``INSERT ... SELECT`` per batch of phone
+numbers. The anti-join on existing books makes reruns only add new
+buyers. Shows whose ``updated_at`` has not moved since the last sync are
+skipped; ``--full`` rescans them too, e.g. to pick up buyers who have
+since registered. Each show is synced in its own transaction, together
+with its link row.
+
+    BOX_OFFICE_DATABASE_URL=postgresql+asyncpg://... python -m backend.app.services.box_office_sync
+"""
+import argparse
+import asyncio
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    insert,
+    literal,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from ..core.config import get_settings
+from ..models import BoxOfficeLink, Performance, StampBook, User
+from ..utils.phone import normalize_phone
+from .versions import USER_STAMP_BOOKS, bump_versions
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+_SHOW_DATE = re.compile(r"(\d{4})\D(\d{1,2})\D(\d{1,2})")
+_SHOW_TIME = re.compile(r"(\d{1,2}):(\d{2})")
+
+# Tables of the Streamlit tool's database, as created by app.py's init_db.
+source_metadata = MetaData()
+source_performances = Table(
+    "performances",
+    source_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("performance_name", Text, nullable=False),
+    Column("performance_date", Text, nullable=False),
+    Column("performance_time", Text, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    Column("total_reservations", Integer),
+)
+source_reservations = Table(
+    "reservations",
+    source_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("performance_id", Integer, nullable=False),
+    Column("platform", Text, nullable=False),
+    Column("reservation_number", Text),
+    Column("name", Text),
+    Column("phone", Text),
+    Column("seat_info", Text),
+    Column("quantity", Integer),
+    Column("status", Text),
+    Column("created_at", DateTime, nullable=False),
+)
+
+
+class PerformanceSync(NamedTuple):
+    source_performance_id: int
+    performance_id: int
+    buyers: int  # distinct valid phone numbers among the reservations
+    issued: int  # stamp books created by this run
+
+
+def parse_show_time(date_text: Optional[str], time_text: Optional[str]) -> Optional[datetime]:
+    """``"2026.10.18"``, ``"19:30"`` -> ``datetime(2026, 10, 18, 19, 30)``; no time means midnight."""
+    date_match = _SHOW_DATE.search(date_text or "")
+    if not date_match:
+        return None
+    time_match = _SHOW_TIME.search(time_text or "")
+    hour, minute = (int(time_match.group(1)), int(time_match.group(2))) if time_match else (0, 0)
+    try:
+        return datetime(*(int(part) for part in date_match.groups()), hour, minute)
+    except ValueError:
+        return None
+
+
+async def link_performance(
+    session: AsyncSession,
+    source_row,
+    start_at: datetime,
+    link: Optional[BoxOfficeLink],
+) -> BoxOfficeLink:
+    """Return the link for ``source_row``, creating the performance it points to if needed."""
+    if link is not None:
+        return await session.merge(link)
+    title = source_row.performance_name.strip()
+    performance_id = await session.scalar(
+        select(Performance.id)
+        .where(Performance.title == title, Performance.start_at == start_at)
+        .order_by(Performance.id)
+        .limit(1)
+    )
+    if performance_id is None:
+        performance = Performance(title=title, start_at=start_at)
+        session.add(performance)
+        await session.flush()
+        performance_id = performance.id
+    link = BoxOfficeLink(source_performance_id=source_row.id, performance_id=performance_id)
+    session.add(link)
+    return link
+
+
+async def issue_stamp_books(session: AsyncSession, performance_id: int, phones: Sequence[str]) -> List[int]:
+    """Issue books for the active users owning ``phones``; return the users that got one."""
+    if not phones:
+        return []
+    already_issued = (
+        select(StampBook.id)
+        .where(StampBook.user_id == User.id, StampBook.performance_id == performance_id)
+        .exists()
+    )
+    buyers = select(
+        User.id,
+        literal(performance_id),
+        literal(datetime.utcnow(), DateTime),
+        literal("active"),
+    ).where(User.phone.in_(phones), User.is_active.is_(True), ~already_issued)
+    table = StampBook.__table__
+    result = await session.execute(
+        insert(table)
+        .from_select(["user_id", "performance_id", "issued_at", "status"], buyers)
+        .returning(table.c.user_id)
+    )
+    user_ids = result.scalars().all()
+    await bump_versions(session, USER_STAMP_BOOKS, user_ids)
+    return user_ids
+
+
+async def _sync_performance(
+    source: AsyncEngine,
+    session: AsyncSession,
+    source_row,
+    start_at: datetime,
+    link: Optional[BoxOfficeLink],
+    batch_size: int,
+) -> PerformanceSync:
+    link = await link_performance(session, source_row, start_at, link)
+    seen: set = set()
+    issued = 0
+    async with source.connect() as conn:
+        result = await conn.stream(
+            select(source_reservations.c.phone)
+            .where(
+                source_reservations.c.performance_id == source_row.id,
+                source_reservations.c.phone.is_not(None),
+            )
+            .distinct()
+        )
+        async for chunk in result.partitions(batch_size):
+            phones = {normalize_phone(row.phone) for row in chunk} - seen - {None}
+            seen |= phones
+            issued += len(await issue_stamp_books(session, link.performance_id, sorted(phones)))
+    link.source_updated_at = source_row.updated_at
+    link.synced_at = datetime.utcnow()
+    await session.commit()
+    return PerformanceSync(source_row.id, link.performance_id, len(seen), issued)
+
+
+async def sync_box_office(
+    source: AsyncEngine,
+    session_factory: async_sessionmaker,
+    *,
+    full: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> List[PerformanceSync]:
+    async with session_factory() as session:
+        result = await session.execute(select(BoxOfficeLink))
+        links: Dict[int, BoxOfficeLink] = {link.source_performance_id: link for link in result.scalars()}
+    async with source.connect() as conn:
+        shows = (await conn.execute(select(source_performances).order_by(source_performances.c.id))).all()
+
+    synced = []
+    for show in shows:
+        link = links.get(show.id)
+        if not full and link is not None and link.source_updated_at is not None:
+            if show.updated_at <= link.source_updated_at:
+                continue
+        start_at = parse_show_time(show.performance_date, show.performance_time)
+        if start_at is None:
+            logger.warning("Skipping box-office performance %s: bad date %r", show.id, show.performance_date)
+            continue
+        async with session_factory() as session:
+            synced.append(await _sync_performance(source, session, show, start_at, link, batch_size))
+    return synced
+
+
+def main() -> None:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from ..database import SessionLocal, engine
+    from ..shards import shard_router
+
+    parser = argparse.ArgumentParser(description="Issue stamp books to integrated box-office buyers.")
+    parser.add_argument(
+        "--source", default=get_settings().BOX_OFFICE_DATABASE_URL, help="box-office database URL"
+    )
+    parser.add_argument("--full", action="store_true", help="rescan performances that have not changed")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    if not args.source:
+        parser.error("set BOX_OFFICE_DATABASE_URL or pass --source")
+    if shard_router.enabled:
+        # books are issued with one INSERT ... SELECT over users, which stay in the primary
+        parser.error("box-office sync does not support SHARD_DATABASE_URLS yet")
+
+    async def run():
+        source = create_async_engine(args.source)
+        try:
+            synced = await sync_box_office(source, SessionLocal, full=args.full, batch_size=args.batch_size)
+        finally:
+            await source.dispose()
+            await engine.dispose()
+        for item in synced:
+            print(
+                f"box office {item.source_performance_id} -> performance {item.performance_id}: "
+                f"{item.buyers} buyers, {item.issued} stamp books issued"
+            )
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Campaign targeting.
+
+``Campaign.target_rules`` holds a JSON object whose keys narrow the stamps a
+campaign applies to; every key is optional and an empty/NULL rule set
+matches every stamp::
+
+    {
+        "merchant_ids": [1, 2],
+        "categories": ["cafe", "bar"],
+        "performance_ids": [10],
+        "approval_methods": ["qr"],
+        "min_discount": 1000,
+        "hours": [18, 23],          # inclusive visit hour range
+        "weekdays": [4, 5, 6]       # Monday == 0
+    }
+
+Rules are compiled once per campaign into a predicate; the engine keeps the
+active set in memory and buckets merchant-restricted campaigns by merchant so
+each stamp only runs the predicates that can possibly match.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models import Campaign, CampaignEvent
+from ..utils.orm_events import on_committed_change
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_CACHE_TTL_SECONDS = 60.0
+EVENT_BATCH_SIZE = 500
+EVENT_FLUSH_INTERVAL_SECONDS = 1.0
+STAMP_MATCHED_EVENT = "stamp_matched"
+
+
+class StampFacts(NamedTuple):
+    stamp_id: int
+    user_id: int
+    merchant_id: int
+    merchant_category: Optional[str]
+    performance_id: int
+    discount_amount: Optional[float]
+    approval_method: Optional[str]
+    visit_at: datetime
+
+
+Predicate = Callable[[StampFacts], bool]
+
+
+class InvalidTargetRules(ValueError):
+    pass
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    return _is_int(value) or isinstance(value, float)
+
+
+def _value_set(rules: dict, key: str, kind: type) -> frozenset:
+    values = rules[key]
+    check = _is_int if kind is int else (lambda value: isinstance(value, kind))
+    if not isinstance(values, list) or not all(check(value) for value in values):
+        raise InvalidTargetRules(f"{key} must be a list of {kind.__name__} values")
+    return frozenset(values)
+
+
+def compile_target_rules(raw: Optional[str]) -> Tuple[Optional[frozenset], Predicate]:
+    """Return ``(merchant_ids, predicate)`` for a ``target_rules`` string.
+
+    ``merchant_ids`` is returned separately so the engine can index on it; the
+    predicate covers every other condition.
+    """
+    if raw is None or not raw.strip():
+        return None, lambda facts: True
+    try:
+        rules = json.loads(raw)
+    except ValueError as exc:
+        raise InvalidTargetRules(str(exc)) from exc
+    if not isinstance(rules, dict):
+        raise InvalidTargetRules("target_rules must be a JSON object")
+
+    unknown = set(rules) - {
+        "merchant_ids",
+        "categories",
+        "performance_ids",
+        "approval_methods",
+        "min_discount",
+        "hours",
+        "weekdays",
+    }
+    if unknown:
+        raise InvalidTargetRules(f"unknown rule keys: {sorted(unknown)}")
+
+    merchant_ids = _value_set(rules, "merchant_ids", int) if "merchant_ids" in rules else None
+    checks: List[Predicate] = []
+    if "categories" in rules:
+        categories = _value_set(rules, "categories", str)
+        checks.append(lambda facts: facts.merchant_category in categories)
+    if "performance_ids" in rules:
+        performance_ids = _value_set(rules, "performance_ids", int)
+        checks.append(lambda facts: facts.performance_id in performance_ids)
+    if "approval_methods" in rules:
+        methods = _value_set(rules, "approval_methods", str)
+        checks.append(lambda facts: facts.approval_method in methods)
+    if "min_discount" in rules:
+        min_discount = rules["min_discount"]
+        if not _is_number(min_discount):
+            raise InvalidTargetRules("min_discount must be a number")
+        checks.append(lambda facts: (facts.discount_amount or 0) >= min_discount)
+    if "hours" in rules:
+        hours = rules["hours"]
+        valid_hours = isinstance(hours, list) and len(hours) == 2
+        if not (valid_hours and all(_is_int(hour) and 0 <= hour <= 23 for hour in hours)):
+            raise InvalidTargetRules("hours must be [first_hour, last_hour] between 0 and 23")
+        first_hour, last_hour = hours
+        if first_hour <= last_hour:
+            checks.append(lambda facts: first_hour <= facts.visit_at.hour <= last_hour)
+        else:
+            # overnight window such as [22, 2]
+            checks.append(lambda facts: facts.visit_at.hour >= first_hour or facts.visit_at.hour <= last_hour)
+    if "weekdays" in rules:
+        weekdays = _value_set(rules, "weekdays", int)
+        if not weekdays <= frozenset(range(7)):
+            raise InvalidTargetRules("weekdays must be between 0 (Monday) and 6")
+        checks.append(lambda facts: facts.visit_at.weekday() in weekdays)
+
+    if not checks:
+        return merchant_ids, lambda facts: True
+    if len(checks) == 1:
+        return merchant_ids, checks[0]
+    checks_tuple = tuple(checks)
+    return merchant_ids, lambda facts: all(check(facts) for check in checks_tuple)
+
+
+class CompiledCampaign(NamedTuple):
+    id: int
+    start_at: datetime
+    end_at: Optional[datetime]
+    predicate: Predicate
+
+
+class CampaignEngine:
+    def __init__(self, ttl: float = CAMPAIGN_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._unrestricted: Tuple[CompiledCampaign, ...] = ()
+        self._by_merchant: Dict[int, Tuple[CompiledCampaign, ...]] = {}
+        self._loaded_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+
+    def load(self, campaigns: Iterable[Campaign]) -> None:
+        unrestricted: List[CompiledCampaign] = []
+        by_merchant: Dict[int, List[CompiledCampaign]] = defaultdict(list)
+        for campaign in campaigns:
+            try:
+                merchant_ids, predicate = compile_target_rules(campaign.target_rules)
+            except InvalidTargetRules as exc:
+                logger.warning("Skipping campaign %s with invalid target_rules: %s", campaign.id, exc)
+                continue
+            compiled = CompiledCampaign(campaign.id, campaign.start_at, campaign.end_at, predicate)
+            if merchant_ids is None:
+                unrestricted.append(compiled)
+            else:
+                for merchant_id in merchant_ids:
+                    by_merchant[merchant_id].append(compiled)
+        self._unrestricted = tuple(unrestricted)
+        self._by_merchant = {merchant_id: tuple(items) for merchant_id, items in by_merchant.items()}
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Call after creating, editing or deleting campaigns."""
+        self._loaded_at = None
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    async def refresh(self, session: AsyncSession) -> None:
+        async with self._refresh_lock:
+            if not self.is_stale():
+                return
+            now = datetime.utcnow()
+            result = await session.execute(
+                select(Campaign).where(or_(Campaign.end_at.is_(None), Campaign.end_at > now))
+            )
+            self.load(result.scalars().all())
+
+    def evaluate(self, facts: StampFacts) -> List[int]:
+        visit_at = facts.visit_at
+        matched = []
+        for campaigns in (self._unrestricted, self._by_merchant.get(facts.merchant_id, ())):
+            for campaign in campaigns:
+                if campaign.start_at > visit_at or (campaign.end_at is not None and campaign.end_at <= visit_at):
+                    continue
+                if campaign.predicate(facts):
+                    matched.append(campaign.id)
+        return matched
+
+
+class CampaignEventBuffer:
+    """Collects CampaignEvent rows and writes them with multi-row inserts."""
+
+    def __init__(self, batch_size: int = EVENT_BATCH_SIZE, interval: float = EVENT_FLUSH_INTERVAL_SECONDS):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._rows: List[dict] = []
+        self._session_factory: Optional[async_sessionmaker] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    def add(self, facts: StampFacts, campaign_ids: Iterable[int]) -> None:
+        created_at = datetime.utcnow()
+        self._rows.extend(
+            {
+                "campaign_id": campaign_id,
+                "user_id": facts.user_id,
+                "merchant_id": facts.merchant_id,
+                "stamp_id": facts.stamp_id,
+                "event_type": STAMP_MATCHED_EVENT,
+                "created_at": created_at,
+            }
+            for campaign_id in campaign_ids
+        )
+        if len(self._rows) >= self.batch_size and self._task is not None:
+            # the loop only keeps weak references to tasks
+            task = asyncio.get_running_loop().create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    async def flush(self) -> int:
+        if not self._rows or self._session_factory is None:
+            return 0
+        rows, self._rows = self._rows, []
+        try:
+            async with self._session_factory() as session:
+                for start in range(0, len(rows), self.batch_size):
+                    await session.execute(insert(CampaignEvent), rows[start : start + self.batch_size])
+                await session.commit()
+        except Exception:
+            logger.exception("Failed to write %d campaign events; requeueing", len(rows))
+            self._rows[:0] = rows
+            return 0
+        return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self, session_factory: async_sessionmaker) -> None:
+        self._session_factory = session_factory
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.gather(*self._flushes)
+        await self.flush()
+
+
+campaign_engine = CampaignEngine()
+campaign_events = CampaignEventBuffer()
+# recompile on the next match after any committed campaign change, not only when the TTL runs out
+on_committed_change(Campaign, lambda action, values: campaign_engine.invalidate())
+
+
+async def record_campaign_matches(session: AsyncSession, facts: StampFacts) -> List[int]:
+    if campaign_engine.is_stale():
+        await campaign_engine.refresh(session)
+    matched = campaign_engine.evaluate(facts)
+    if matched:
+        campaign_events.add(facts, matched)
+    return matched
@@ -0,0 +1,200 @@
+import asyncio
+import math
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Merchant
+from ..utils.orm_events import DELETE, on_committed_change
+
+EARTH_RADIUS_M = 6_371_008.8
+# ~1.1 km at the equator; a 1 km query touches at most a 3x3 block of cells.
+DEFAULT_CELL_DEGREES = 0.01
+INDEX_RELOAD_SECONDS = 300.0
+
+Cell = Tuple[int, int]
+
+
+class MerchantPoint(NamedTuple):
+    id: int
+    name: str
+    category: Optional[str]
+    address: Optional[str]
+    status: str
+    latitude: float
+    longitude: float
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _wrap_lon(longitude: float) -> float:
+    """Normalize to [-180, 180)."""
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+def _lon_span(latitude: float, angle: float) -> Optional[float]:
+    """Half-width in degrees of longitude of a circle of ``angle`` radians; None if it covers a pole."""
+    if abs(latitude) + math.degrees(angle) >= 90.0:
+        return None
+    return math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(latitude))))
+
+
+class SpatialIndex:
+    """Uniform lat/lon grid over merchant locations."""
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._points: Dict[int, MerchantPoint] = {}
+        self._cells: Dict[Cell, Set[int]] = defaultdict(set)
+
+    def _cell(self, latitude: float, longitude: float) -> Cell:
+        cell_degrees = self.cell_degrees
+        return (math.floor(latitude / cell_degrees), math.floor(_wrap_lon(longitude) / cell_degrees))
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def clear(self) -> None:
+        self._points.clear()
+        self._cells.clear()
+
+    def upsert(self, point: MerchantPoint) -> None:
+        self.remove(point.id)
+        self._points[point.id] = point
+        self._cells[self._cell(point.latitude, point.longitude)].add(point.id)
+
+    def remove(self, merchant_id: int) -> None:
+        point = self._points.pop(merchant_id, None)
+        if point is None:
+            return
+        cell = self._cell(point.latitude, point.longitude)
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(merchant_id)
+            if not members:
+                del self._cells[cell]
+
+    def query(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float,
+        *,
+        category: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[float, MerchantPoint]]:
+        """Return ``(distance_m, point)`` pairs within ``radius_m``, nearest first."""
+        angle = radius_m / EARTH_RADIUS_M
+        lat_span = math.degrees(angle)
+        lon_span = _lon_span(latitude, angle)
+        if lon_span is None:
+            lon_ranges = [(-180.0, 180.0)]
+        else:
+            west, east = _wrap_lon(longitude - lon_span), _wrap_lon(longitude + lon_span)
+            # a box across the antimeridian is two boxes
+            lon_ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        x_range = range(
+            math.floor(max(latitude - lat_span, -90.0) / self.cell_degrees),
+            math.floor(min(latitude + lat_span, 90.0) / self.cell_degrees) + 1,
+        )
+        y_ranges = [
+            range(math.floor(west / self.cell_degrees), math.floor(east / self.cell_degrees) + 1)
+            for west, east in lon_ranges
+        ]
+
+        cells = self._cells
+        if len(x_range) * sum(len(y_range) for y_range in y_ranges) > len(cells):
+            # wide or polar queries: fewer occupied cells than cells in the box
+            candidates = [
+                members
+                for (x, y), members in cells.items()
+                if x in x_range and any(y in y_range for y_range in y_ranges)
+            ]
+        else:
+            candidates = [
+                cells[(x, y)]
+                for x in x_range
+                for y_range in y_ranges
+                for y in y_range
+                if (x, y) in cells
+            ]
+
+        points = self._points
+        hits = []
+        for members in candidates:
+            for merchant_id in members:
+                point = points[merchant_id]
+                if category is not None and point.category != category:
+                    continue
+                if status is not None and point.status != status:
+                    continue
+                # cheap bounding-box rejection before the trigonometry
+                if abs(point.latitude - latitude) > lat_span:
+                    continue
+                if lon_span is not None:
+                    lon_delta = abs(point.longitude - longitude) % 360.0
+                    if min(lon_delta, 360.0 - lon_delta) > lon_span:
+                        continue
+                distance = haversine_m(latitude, longitude, point.latitude, point.longitude)
+                if distance <= radius_m:
+                    hits.append((distance, point))
+        hits.sort(key=lambda hit: hit[0])
+        return hits[:limit] if limit is not None else hits
+
+
+class MerchantLocator:
+    """Process-wide merchant index, loaded lazily and kept current by commit hooks."""
+
+    def __init__(self, reload_seconds: float = INDEX_RELOAD_SECONDS):
+        self.index = SpatialIndex()
+        self.reload_seconds = reload_seconds
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def load(self, points: Iterable[MerchantPoint]) -> None:
+        self.index.clear()
+        for point in points:
+            self.index.upsert(point)
+        self._loaded_at = time.monotonic()
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        # the periodic full reload picks up merchants changed by other workers
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.reload_seconds:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.reload_seconds:
+                return
+            result = await session.execute(
+                select(
+                    Merchant.id,
+                    Merchant.name,
+                    Merchant.category,
+                    Merchant.address,
+                    Merchant.status,
+                    Merchant.latitude,
+                    Merchant.longitude,
+                ).where(Merchant.latitude.is_not(None), Merchant.longitude.is_not(None))
+            )
+            self.load(MerchantPoint(*row) for row in result.all())
+
+    def apply_change(self, action: str, values: Dict[str, Any]) -> None:
+        if self._loaded_at is None:
+            return
+        if action == DELETE or values.get("latitude") is None or values.get("longitude") is None:
+            self.index.remove(values["id"])
+            return
+        self.index.upsert(MerchantPoint(*(values[field] for field in MerchantPoint._fields)))
+
+
+merchant_locator = MerchantLocator()
+on_committed_change(Merchant, merchant_locator.apply_change)
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from ..core.config import get_settings
+from ..core.metrics import registry
+from ..database import engine, pool_saturation
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task."""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - started - self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_lag_monitor = LoopLagMonitor()
+registry.gauge("event_loop_lag_seconds", "Event loop wake-up delay", callback=lambda: loop_lag_monitor.lag)
+registry.gauge("db_pool_saturation", "Checked-out share of pool capacity", callback=pool_saturation)
+
+_db_check_lock = asyncio.Lock()
+_db_check: Dict[str, Any] = {}
+_db_checked_at = 0.0
+
+
+async def _ping_database() -> Dict[str, Any]:
+    settings = get_settings()
+    started = time.perf_counter()
+
+    async def ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        # the timeout covers the pool checkout too: an exhausted pool is what this probe must report
+        await asyncio.wait_for(ping(), timeout=settings.READINESS_DB_TIMEOUT_SECONDS)
+    except Exception as exc:  # any failure means the worker should be drained
+        return {"ok": False, "error": exc.__class__.__name__}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+async def check_database() -> Dict[str, Any]:
+    """DB ping shared by all probes within READINESS_CACHE_SECONDS."""
+    global _db_check, _db_checked_at
+    ttl = get_settings().READINESS_CACHE_SECONDS
+    if time.monotonic() - _db_checked_at < ttl:
+        return _db_check
+    async with _db_check_lock:
+        if time.monotonic() - _db_checked_at >= ttl:
+            _db_check = await _ping_database()
+            _db_checked_at = time.monotonic()
+    return _db_check
+
+
+async def readiness() -> Dict[str, Any]:
+    settings = get_settings()
+    database = await check_database()
+    saturation = pool_saturation()
+    lag = loop_lag_monitor.lag
+    ready = (
+        database["ok"]
+        and saturation < settings.READINESS_MAX_POOL_SATURATION
+        and lag < settings.READINESS_MAX_LOOP_LAG_SECONDS
+    )
+    return {
+        "status": "ready" if ready else "unavailable",
+        "database": database,
+        "pool_saturation": round(saturation, 3),
+        "event_loop_lag_ms": round(lag * 1000, 2),
+    }
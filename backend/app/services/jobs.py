@@ -0,0 +1,200 @@
+"""In-process background jobs.
+
+Request handlers commit their core write and hand side effects (audit rows,
+campaign matching, ...) to :data:`job_queue`::
+
+    await job_queue.enqueue(AUDIT_LOG_JOB, {...})
+
+Jobs are named; a handler is registered per name and receives its own
+session, which is committed when the handler returns. ``JOB_WORKERS``
+workers run jobs concurrently and a handler may be capped further with
+``register(..., concurrency=n)``. A failing job is retried with exponential
+backoff up to ``JOB_MAX_ATTEMPTS`` times and then stored in
+``dead_letter_jobs``; so are jobs still queued or running when shutdown
+gives up waiting after ``JOB_DRAIN_TIMEOUT_SECONDS``.
+
+The queue only lives in this process: a crash between the commit and the
+job loses the side effect. Until :meth:`JobQueue.start` is called (tests,
+scripts, an app without its startup event) and when the queue is full,
+``enqueue`` runs the job inline instead.
+"""
+import asyncio
+import json
+import logging
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.config import get_settings
+from ..core.metrics import registry
+from ..models import DeadLetterJob
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]
+
+JOBS = registry.counter("jobs_total", "Background job outcomes", labelnames=("job", "result"))
+
+
+class Job:
+    __slots__ = ("name", "payload", "attempts")
+
+    def __init__(self, name: str, payload: Dict[str, Any]):
+        self.name = name
+        self.payload = payload
+        self.attempts = 0
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class JobQueue:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_base_seconds: Optional[float] = None,
+        maxsize: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.workers = workers or settings.JOB_WORKERS
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        self.retry_base_seconds = (
+            settings.JOB_RETRY_BASE_SECONDS if retry_base_seconds is None else retry_base_seconds
+        )
+        self.maxsize = settings.JOB_QUEUE_MAXSIZE if maxsize is None else maxsize
+        self._handlers: Dict[str, Tuple[Handler, Optional[asyncio.Semaphore]]] = {}
+        self._session_factory: Optional[async_sessionmaker] = None
+        self._queue: "asyncio.Queue[Job]" = asyncio.Queue(self.maxsize)
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[asyncio.Task, Job] = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def register(self, name: str, handler: Handler, concurrency: Optional[int] = None) -> None:
+        self._handlers[name] = (handler, asyncio.Semaphore(concurrency) if concurrency else None)
+
+    def handler(self, name: str, concurrency: Optional[int] = None) -> Callable[[Handler], Handler]:
+        def decorator(func: Handler) -> Handler:
+            self.register(name, func, concurrency)
+            return func
+
+        return decorator
+
+    def _sessions(self) -> async_sessionmaker:
+        if self._session_factory is None:
+            from ..database import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    async def enqueue(self, name: str, payload: Dict[str, Any]) -> None:
+        if name not in self._handlers:
+            raise KeyError(f"No handler registered for job {name!r}")
+        job = Job(name, payload)
+        if self.running:
+            try:
+                self._queue.put_nowait(job)
+                return
+            except asyncio.QueueFull:
+                logger.warning("Job queue full; running %s inline", name)
+        await self._execute(job)
+
+    async def _execute(self, job: Job) -> None:
+        """Run ``job`` until it succeeds or is dead-lettered."""
+        handler, semaphore = self._handlers[job.name]
+        while True:
+            job.attempts += 1
+            try:
+                async with semaphore or nullcontext():
+                    async with self._sessions()() as session:
+                        await handler(session, job.payload)
+                        await session.commit()
+            except Exception as exc:
+                if job.attempts >= self.max_attempts:
+                    logger.exception("Job %s failed %d times; dead-lettering", job.name, job.attempts)
+                    await self._dead_letter(job, f"{type(exc).__name__}: {exc}")
+                    return
+                JOBS.inc(job=job.name, result="retried")
+                # the worker stays with the job while it backs off
+                await asyncio.sleep(self.retry_base_seconds * 2 ** (job.attempts - 1))
+                continue
+            JOBS.inc(job=job.name, result="succeeded")
+            return
+
+    async def _dead_letter(self, job: Job, error: str) -> None:
+        JOBS.inc(job=job.name, result="dead_lettered")
+        try:
+            async with self._sessions()() as session:
+                session.add(
+                    DeadLetterJob(
+                        job_name=job.name,
+                        payload_json=json.dumps(job.payload, default=_json_default),
+                        error=error,
+                        attempts=job.attempts,
+                        created_at=datetime.utcnow(),
+                    )
+                )
+                await session.commit()
+        except Exception:
+            logger.exception("Failed to store dead letter for job %s: %r", job.name, job.payload)
+
+    async def _work(self) -> None:
+        task = asyncio.current_task()
+        while True:
+            job = await self._queue.get()
+            self._running[task] = job
+            try:
+                await self._execute(job)
+            except asyncio.CancelledError:
+                # stop() dead-letters the job this worker was running
+                self._queue.task_done()
+                raise
+            del self._running[task]
+            self._queue.task_done()
+
+    def start(self, session_factory: async_sessionmaker) -> None:
+        self._session_factory = session_factory
+        if not self._workers:
+            loop = asyncio.get_running_loop()
+            self._workers = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def drain(self) -> None:
+        """Wait until every queued job has finished."""
+        await self._queue.join()
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Drain for up to ``timeout`` seconds, then dead-letter what is left."""
+        if not self._workers:
+            return
+        timeout = get_settings().JOB_DRAIN_TIMEOUT_SECONDS if timeout is None else timeout
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Job queue not drained after %.1fs; %d jobs left", timeout, len(self))
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        leftovers = list(self._running.values())
+        self._running.clear()
+        while not self._queue.empty():
+            leftovers.append(self._queue.get_nowait())
+            self._queue.task_done()
+        for job in leftovers:
+            await self._dead_letter(job, "interrupted by shutdown")
+
+
+job_queue = JobQueue()
+registry.gauge("job_queue_depth", "Background jobs waiting for a worker", callback=lambda: len(job_queue))
@@ -0,0 +1,86 @@
+import abc
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Set
+
+Message = Dict[str, Any]
+
+
+class Subscription:
+    def __init__(self, channels: Iterable[str], maxsize: int = 100):
+        self.channels = frozenset(channels)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def get(self) -> Message:
+        return await self.queue.get()
+
+    def deliver(self, message: Message) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # a slow consumer must never block the publishing request
+            pass
+
+
+class Broker(abc.ABC):
+    """Interface for pub/sub backends.
+
+    The in-memory implementation only reaches subscribers of the same
+    process; a multi-worker deployment plugs in a shared backend (Redis,
+    Postgres LISTEN/NOTIFY, ...) through :func:`set_broker`.
+    """
+
+    @abc.abstractmethod
+    async def publish(self, channel: str, message: Message) -> None:
+        ...
+
+    @abc.abstractmethod
+    def subscribe(self, channels: Iterable[str]):
+        """Async context manager yielding a :class:`Subscription`."""
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryBroker(Broker):
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    async def publish(self, channel: str, message: Message) -> None:
+        for subscription in tuple(self._subscribers.get(channel, ())):
+            subscription.deliver(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channels: Iterable[str]) -> AsyncIterator[Subscription]:
+        subscription = Subscription(channels)
+        for channel in subscription.channels:
+            self._subscribers[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscribers.get(channel, ()))
+
+
+_broker: Broker = InMemoryBroker()
+
+
+def get_broker() -> Broker:
+    return _broker
+
+
+def set_broker(broker: Broker) -> None:
+    global _broker
+    _broker = broker
+
+
+def merchant_channel(merchant_id: int) -> str:
+    return f"merchant:{merchant_id}"
@@ -0,0 +1,107 @@
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.security import hash_qr_token
+from ..models import QRToken
+
+NEGATIVE_CACHE_TTL_SECONDS = 60.0
+NEGATIVE_CACHE_MAX_ENTRIES = 10_000
+
+# (merchant_id, token_hash) -> (monotonic expiry, rejection detail). Keyed per merchant so a
+# scan at the wrong merchant cannot block the token where it belongs.
+_invalid_tokens: Dict[Tuple[int, str], Tuple[float, str]] = {}
+
+
+class QRTokenRejected(Exception):
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+def _cached_rejection(key: Tuple[int, str]) -> Optional[str]:
+    entry = _invalid_tokens.get(key)
+    if entry is None:
+        return None
+    expires, detail = entry
+    if expires < time.monotonic():
+        _invalid_tokens.pop(key, None)
+        return None
+    return detail
+
+
+def _remember_rejection(key: Tuple[int, str], detail: str) -> None:
+    if len(_invalid_tokens) >= NEGATIVE_CACHE_MAX_ENTRIES:
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in _invalid_tokens.items() if expires < now]:
+            del _invalid_tokens[key]
+        if len(_invalid_tokens) >= NEGATIVE_CACHE_MAX_ENTRIES:
+            _invalid_tokens.clear()
+    _invalid_tokens[key] = (time.monotonic() + NEGATIVE_CACHE_TTL_SECONDS, detail)
+
+
+def clear_negative_cache() -> None:
+    _invalid_tokens.clear()
+
+
+async def redeem_qr_token(
+    session: AsyncSession,
+    *,
+    merchant_id: int,
+    token: Optional[str] = None,
+    token_id: Optional[int] = None,
+) -> int:
+    """Atomically validate a QR token and consume one use of it.
+
+    Expiry and usage limit are checked inside a single conditional UPDATE, so
+    concurrent scans of the same token can never redeem it more than
+    ``usage_limit`` times. Returns the token id.
+    """
+    if token is None and token_id is None:
+        raise ValueError("token or token_id is required")
+
+    token_hash = hash_qr_token(token) if token is not None else None
+    if token_hash is not None:
+        detail = _cached_rejection((merchant_id, token_hash))
+        if detail is not None:
+            raise QRTokenRejected(detail)
+        lookup = QRToken.token_hash == token_hash
+    else:
+        lookup = QRToken.id == token_id
+
+    now = datetime.utcnow()
+    result = await session.execute(
+        update(QRToken)
+        .where(
+            lookup,
+            QRToken.merchant_id == merchant_id,
+            or_(QRToken.expires_at.is_(None), QRToken.expires_at > now),
+            or_(QRToken.usage_limit.is_(None), QRToken.usage_count < QRToken.usage_limit),
+        )
+        .values(usage_count=QRToken.usage_count + 1, last_used_at=now)
+        .returning(QRToken.id)
+        .execution_options(synchronize_session=False)
+    )
+    redeemed_id = result.scalar_one_or_none()
+    if redeemed_id is not None:
+        return redeemed_id
+
+    detail = await _rejection_reason(session, lookup, merchant_id, now)
+    if token_hash is not None:
+        _remember_rejection((merchant_id, token_hash), detail)
+    raise QRTokenRejected(detail)
+
+
+async def _rejection_reason(session: AsyncSession, lookup, merchant_id: int, now: datetime) -> str:
+    result = await session.execute(
+        select(QRToken.merchant_id, QRToken.expires_at, QRToken.usage_limit, QRToken.usage_count).where(lookup)
+    )
+    row = result.one_or_none()
+    if row is None or row.merchant_id != merchant_id:
+        return "Invalid QR token"
+    if row.expires_at is not None and row.expires_at <= now:
+        return "QR token expired"
+    return "QR token usage limit reached"
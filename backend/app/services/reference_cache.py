@@ -0,0 +1,116 @@
+"""Process-local read-through caches for rarely changing reference rows.
+
+Entries are plain snapshots, not ORM instances, so they are safe to share
+across sessions and requests. Concurrent misses for the same key share one
+database load. Committed ORM changes invalidate entries automatically;
+bulk statements and other workers are covered by the TTL, or by calling
+``invalidate`` explicitly.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, NamedTuple, Optional, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import get_settings
+from ..core.metrics import registry
+from ..models import Merchant, Performance
+from ..utils.cache import TTLCache
+from ..utils.orm_events import on_committed_change
+
+V = TypeVar("V")
+Loader = Callable[[AsyncSession, Hashable], Awaitable[Optional[V]]]
+
+CACHE_REQUESTS = registry.counter(
+    "reference_cache_requests_total",
+    "Reference cache lookups by result",
+    labelnames=("cache", "result"),
+)
+
+
+class PerformanceSnapshot(NamedTuple):
+    id: int
+    title: str
+    venue: Optional[str]
+    start_at: datetime
+    end_at: Optional[datetime]
+
+
+class MerchantSnapshot(NamedTuple):
+    id: int
+    owner_id: int
+    name: str
+    category: Optional[str]
+    status: str
+
+
+class ReadThroughCache(Generic[V]):
+    def __init__(self, name: str, loader: Loader, ttl: float, maxsize: int = 10_000):
+        self.name = name
+        self.loader = loader
+        self._entries: TTLCache[V] = TTLCache(ttl=ttl, maxsize=maxsize)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def get(self, session: AsyncSession, key: Hashable) -> Optional[V]:
+        value = self._entries.get(key)
+        if value is not None:
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+            return value
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self.loader(session, key)
+        except BaseException as exc:
+            future.set_exception(exc)
+            # mark retrieved so an unawaited failure is not logged as never retrieved
+            future.exception()
+            raise
+        else:
+            if value is not None:
+                self._entries.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.invalidate(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def invalidate_on_change(self, action: str, values: Dict[str, Any]) -> None:
+        self.invalidate(values["id"])
+
+
+async def _load_performance(session: AsyncSession, performance_id: int) -> Optional[PerformanceSnapshot]:
+    result = await session.execute(
+        select(*(getattr(Performance, field) for field in PerformanceSnapshot._fields)).where(
+            Performance.id == performance_id
+        )
+    )
+    row = result.one_or_none()
+    return PerformanceSnapshot(*row) if row is not None else None
+
+
+async def _load_merchant(session: AsyncSession, merchant_id: int) -> Optional[MerchantSnapshot]:
+    result = await session.execute(
+        select(*(getattr(Merchant, field) for field in MerchantSnapshot._fields)).where(Merchant.id == merchant_id)
+    )
+    row = result.one_or_none()
+    return MerchantSnapshot(*row) if row is not None else None
+
+
+_ttl = get_settings().REFERENCE_CACHE_TTL_SECONDS
+performance_cache: ReadThroughCache[PerformanceSnapshot] = ReadThroughCache("performance", _load_performance, _ttl)
+merchant_cache: ReadThroughCache[MerchantSnapshot] = ReadThroughCache("merchant", _load_merchant, _ttl)
+
+on_committed_change(Performance, performance_cache.invalidate_on_change)
+on_committed_change(Merchant, merchant_cache.invalidate_on_change)
@@ -0,0 +1,236 @@
+"""Merchant settlement.
+
+For every approved stamp visited in ``[period_start, period_end)`` the
+contract active at ``visit_at`` decides what the merchant is owed:
+
+* ``gross``    - the stamp's transaction amount (0 without a transaction)
+* ``discount`` - ``Stamp.discount_amount``, or ``gross * discount_rate`` when
+  the stamp carries no explicit amount; the platform reimburses it
+* ``fee``      - ``gross * fee rate``, where ``fee_plan`` is either a named
+  plan from ``FEE_PLAN_RATES`` or a numeric rate such as ``"0.025"``
+* ``net``      - ``discount - fee``
+
+Stamps without an active contract are counted but not paid. Each merchant is
+settled in its own transaction that replaces any earlier row for the same
+period, so reruns are idempotent.
+
+    python -m backend.app.services.settlements 2026-10-01 2026-11-01
+"""
+import argparse
+import asyncio
+import bisect
+import logging
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models import Merchant, MerchantContract, MerchantSettlement, Stamp, StampStatus, Transaction
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 10_000
+DEFAULT_CONCURRENCY = 4
+FEE_PLAN_RATES: Dict[str, Decimal] = {
+    "standard": Decimal("0.03"),
+    "premium": Decimal("0.015"),
+    "free": Decimal("0"),
+}
+CENT = Decimal("0.01")
+ZERO = Decimal("0")
+
+
+class ContractTerms(NamedTuple):
+    start_at: datetime
+    end_at: Optional[datetime]
+    discount_rate: Decimal
+    fee_rate: Decimal
+
+
+class SettlementTotals:
+    __slots__ = ("stamp_count", "uncontracted_stamp_count", "gross", "discount", "fee")
+
+    def __init__(self):
+        self.stamp_count = 0
+        self.uncontracted_stamp_count = 0
+        self.gross = ZERO
+        self.discount = ZERO
+        self.fee = ZERO
+
+    @property
+    def net(self) -> Decimal:
+        return self.discount - self.fee
+
+
+def _decimal(value) -> Decimal:
+    if value is None:
+        return ZERO
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def fee_rate(fee_plan: Optional[str]) -> Decimal:
+    if not fee_plan:
+        return ZERO
+    plan = fee_plan.strip().lower()
+    if plan in FEE_PLAN_RATES:
+        return FEE_PLAN_RATES[plan]
+    try:
+        return Decimal(plan)
+    except ArithmeticError:
+        logger.warning("Unknown fee plan %r; charging no fee", fee_plan)
+        return ZERO
+
+
+class ContractTimeline:
+    """Contracts of one merchant, looked up by visit time with bisect."""
+
+    def __init__(self, contracts: Iterable[MerchantContract]):
+        terms = sorted(
+            (
+                ContractTerms(c.start_at, c.end_at, _decimal(c.discount_rate), fee_rate(c.fee_plan))
+                for c in contracts
+            ),
+            key=lambda t: t.start_at,
+        )
+        self._terms = terms
+        self._starts = [t.start_at for t in terms]
+
+    def active_at(self, moment: datetime) -> Optional[ContractTerms]:
+        index = bisect.bisect_right(self._starts, moment) - 1
+        # a later contract wins when contracts overlap
+        while index >= 0:
+            terms = self._terms[index]
+            if terms.end_at is None or terms.end_at > moment:
+                return terms
+            index -= 1
+        return None
+
+
+def accumulate(totals: SettlementTotals, timeline: ContractTimeline, rows: Sequence) -> None:
+    """Fold ``(visit_at, discount_amount, amount)`` rows into ``totals``."""
+    for visit_at, discount_amount, amount in rows:
+        totals.stamp_count += 1
+        terms = timeline.active_at(visit_at)
+        if terms is None:
+            totals.uncontracted_stamp_count += 1
+            continue
+        gross = _decimal(amount)
+        discount = _decimal(discount_amount) if discount_amount is not None else gross * terms.discount_rate
+        totals.gross += gross
+        totals.discount += discount
+        totals.fee += gross * terms.fee_rate
+
+
+async def settle_merchant(
+    session: AsyncSession,
+    merchant_id: int,
+    period_start: datetime,
+    period_end: datetime,
+    chunk_size: int = CHUNK_SIZE,
+) -> SettlementTotals:
+    contracts = await session.execute(
+        select(MerchantContract).where(
+            MerchantContract.merchant_id == merchant_id,
+            MerchantContract.start_at < period_end,
+            or_(MerchantContract.end_at.is_(None), MerchantContract.end_at > period_start),
+        )
+    )
+    timeline = ContractTimeline(contracts.scalars().all())
+
+    totals = SettlementTotals()
+    # server-side cursor: rows arrive chunk by chunk instead of all at once
+    result = await session.stream(
+        select(Stamp.visit_at, Stamp.discount_amount, Transaction.amount)
+        .outerjoin(Transaction, Transaction.stamp_id == Stamp.id)
+        .where(
+            Stamp.merchant_id == merchant_id,
+            Stamp.status == StampStatus.APPROVED.value,
+            Stamp.visit_at >= period_start,
+            Stamp.visit_at < period_end,
+        )
+        .execution_options(yield_per=chunk_size)
+    )
+    async for rows in result.partitions(chunk_size):
+        accumulate(totals, timeline, rows)
+
+    await session.execute(
+        delete(MerchantSettlement).where(
+            MerchantSettlement.merchant_id == merchant_id,
+            MerchantSettlement.period_start == period_start,
+            MerchantSettlement.period_end == period_end,
+        )
+    )
+    await session.execute(
+        insert(MerchantSettlement).values(
+            merchant_id=merchant_id,
+            period_start=period_start,
+            period_end=period_end,
+            stamp_count=totals.stamp_count,
+            uncontracted_stamp_count=totals.uncontracted_stamp_count,
+            gross_amount=totals.gross.quantize(CENT, ROUND_HALF_UP),
+            discount_amount=totals.discount.quantize(CENT, ROUND_HALF_UP),
+            fee_amount=totals.fee.quantize(CENT, ROUND_HALF_UP),
+            net_amount=totals.net.quantize(CENT, ROUND_HALF_UP),
+            computed_at=datetime.utcnow(),
+        )
+    )
+    await session.commit()
+    return totals
+
+
+async def run_settlement(
+    session_factory: async_sessionmaker,
+    period_start: datetime,
+    period_end: datetime,
+    merchant_ids: Optional[List[int]] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    chunk_size: int = CHUNK_SIZE,
+) -> Dict[int, SettlementTotals]:
+    if period_end <= period_start:
+        raise ValueError("period_end must be after period_start")
+    if merchant_ids is None:
+        async with session_factory() as session:
+            result = await session.execute(select(Merchant.id).order_by(Merchant.id))
+            merchant_ids = list(result.scalars().all())
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def settle(merchant_id: int) -> SettlementTotals:
+        async with semaphore, session_factory() as session:
+            return await settle_merchant(session, merchant_id, period_start, period_end, chunk_size)
+
+    totals = await asyncio.gather(*(settle(merchant_id) for merchant_id in merchant_ids))
+    return dict(zip(merchant_ids, totals))
+
+
+def main() -> None:
+    from ..database import SessionLocal, engine
+    from ..shards import shard_router
+
+    parser = argparse.ArgumentParser(description="Settle merchants for [START, END).")
+    parser.add_argument("start", type=datetime.fromisoformat)
+    parser.add_argument("end", type=datetime.fromisoformat)
+    parser.add_argument("--merchant", type=int, action="append", dest="merchant_ids")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+    if shard_router.enabled:
+        # stamps are joined with transactions and contracts, which stay in the primary
+        parser.error("settlement does not support SHARD_DATABASE_URLS yet")
+
+    async def run():
+        try:
+            results = await run_settlement(
+                SessionLocal, args.start, args.end, args.merchant_ids, concurrency=args.concurrency
+            )
+        finally:
+            await engine.dispose()
+        for merchant_id, totals in results.items():
+            print(f"merchant {merchant_id}: {totals.stamp_count} stamps, net {totals.net.quantize(CENT)}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
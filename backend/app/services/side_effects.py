@@ -0,0 +1,59 @@
+"""Side effects of stamp writes, run on the job queue after the commit."""
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..utils.audit import record_audit_logs
+from .campaigns import StampFacts, record_campaign_matches
+from ..shards import shard_router
+from .jobs import job_queue
+
+AUDIT_LOG_JOB = "audit_log"
+CAMPAIGN_MATCH_JOB = "campaign_match"
+
+
+@job_queue.handler(AUDIT_LOG_JOB)
+async def _write_audit_logs(session: AsyncSession, payload: dict) -> None:
+    # audit rows live next to the stamps they describe
+    fields = dict(payload)  # the payload is reused if the job is retried
+    shard = shard_router.shards[fields.pop("shard_index", 0)]
+    async with shard_router.session(session, shard) as shard_session:
+        await record_audit_logs(shard_session, **fields)
+        if shard_session is not session:
+            await shard_session.commit()
+
+
+@job_queue.handler(CAMPAIGN_MATCH_JOB)
+async def _match_campaigns(session: AsyncSession, payload: dict) -> None:
+    await record_campaign_matches(session, StampFacts(**payload))
+
+
+async def enqueue_audit_logs(
+    *,
+    actor_id: int,
+    actor_role: str,
+    action: str,
+    target_type: str,
+    target_ids: Iterable[int],
+    shard_index: int = 0,
+) -> None:
+    target_ids = list(target_ids)
+    if target_ids:
+        await job_queue.enqueue(
+            AUDIT_LOG_JOB,
+            {
+                "actor_id": actor_id,
+                "actor_role": actor_role,
+                "action": action,
+                "target_type": target_type,
+                "target_ids": target_ids,
+                # stamped now: the row records when the action happened, not when the job ran
+                "created_at": datetime.utcnow(),
+                "shard_index": shard_index,
+            },
+        )
+
+
+async def enqueue_campaign_match(facts: StampFacts) -> None:
+    await job_queue.enqueue(CAMPAIGN_MATCH_JOB, facts._asdict())
@@ -0,0 +1,59 @@
+"""Local stand-in for a streaming read replica.
+
+Point ``DATABASE_URL`` and ``DATABASE_REPLICA_URL`` at two SQLite files and
+run this module next to the app. It copies the primary over the replica
+every ``--interval`` seconds, so reads routed to the replica lag behind
+writes the way they would on a real replica::
+
+    DATABASE_URL=sqlite+aiosqlite:///./tcats.db \\
+    DATABASE_REPLICA_URL=sqlite+aiosqlite:///./tcats-replica.db \\
+    python -m backend.app.services.sqlite_replica --interval 2
+"""
+import argparse
+import asyncio
+import sqlite3
+
+from sqlalchemy.engine import make_url
+
+from ..core.config import get_settings
+
+
+def copy_database(primary_path: str, replica_path: str) -> None:
+    """Replace the replica's contents with a consistent snapshot of the primary."""
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+async def replicate(primary_path: str, replica_path: str) -> None:
+    await asyncio.to_thread(copy_database, primary_path, replica_path)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Copy the primary SQLite database to the replica file.")
+    parser.add_argument("--interval", type=float, default=0, help="repeat every N seconds (0: copy once)")
+    args = parser.parse_args()
+    primary = make_url(settings.DATABASE_URL)
+    if not settings.DATABASE_REPLICA_URL:
+        parser.error("DATABASE_REPLICA_URL is not set")
+    replica = make_url(settings.DATABASE_REPLICA_URL)
+    if primary.get_backend_name() != "sqlite" or replica.get_backend_name() != "sqlite":
+        parser.error("both DATABASE_URL and DATABASE_REPLICA_URL must be SQLite files")
+
+    async def run():
+        while True:
+            await replicate(primary.database, replica.database)
+            if args.interval <= 0:
+                return
+            await asyncio.sleep(args.interval)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
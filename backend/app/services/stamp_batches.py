@@ -0,0 +1,190 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import get_settings
+from ..models import Merchant, Stamp, StampBook, StampStatus, User
+from ..schemas import StampBatchItem, StampBatchItemResult
+from .campaigns import StampFacts
+from .side_effects import enqueue_audit_logs, enqueue_campaign_match
+from .stamp_counters import StampChange, apply_stamp_changes
+from .versions import MERCHANT_PENDING, USER_STAMP_BOOKS, bump_versions
+
+CREATED = "created"
+DUPLICATE = "duplicate"
+REJECTED = "rejected"
+OFFLINE_APPROVAL_METHOD = "offline_batch"
+
+StampKey = Tuple[int, str]
+
+
+def _insert_ignoring_duplicates(session: AsyncSession):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(Stamp).on_conflict_do_nothing(index_elements=["merchant_id", "client_key"])
+    if dialect == "sqlite":
+        return sqlite.insert(Stamp).on_conflict_do_nothing(index_elements=["merchant_id", "client_key"])
+    return insert(Stamp)
+
+
+def _visit_at(item: StampBatchItem, now: datetime) -> datetime:
+    visit_at = item.visit_at or now
+    if visit_at.tzinfo is not None:
+        visit_at = visit_at.astimezone(timezone.utc).replace(tzinfo=None)
+    # device clocks drift; a stamp can never be visited in the future
+    return min(visit_at, now)
+
+
+async def _existing_stamp_ids(session: AsyncSession, keys: Sequence[StampKey]) -> Dict[StampKey, int]:
+    if not keys:
+        return {}
+    result = await session.execute(
+        select(Stamp.id, Stamp.merchant_id, Stamp.client_key).where(
+            tuple_(Stamp.merchant_id, Stamp.client_key).in_(keys)
+        )
+    )
+    return {(merchant_id, client_key): stamp_id for stamp_id, merchant_id, client_key in result.all()}
+
+
+async def ingest_stamp_batch(
+    session: AsyncSession,
+    current_user: User,
+    items: Sequence[StampBatchItem],
+) -> List[StampBatchItemResult]:
+    """Create stamps uploaded by a merchant device in one transaction.
+
+    Stamps are keyed by ``(merchant_id, idempotency_key)``: re-uploading an
+    item returns the stamp created the first time instead of a new one.
+    Merchants and stamp books are validated with one query each. Like stamps
+    added by fans, uploaded stamps wait in the merchant's pending queue: the
+    device is not trusted to approve them (or their discount) on its own.
+    """
+    merchant_result = await session.execute(
+        select(Merchant.id, Merchant.category).where(
+            Merchant.id.in_({item.merchant_id for item in items}),
+            Merchant.owner_id == current_user.id,
+        )
+    )
+    merchant_categories: Dict[int, Optional[str]] = dict(merchant_result.all())
+
+    book_result = await session.execute(
+        select(
+            StampBook.id,
+            StampBook.user_id,
+            StampBook.performance_id,
+            StampBook.status,
+            StampBook.expires_at,
+        ).where(StampBook.id.in_({item.stamp_book_id for item in items}))
+    )
+    books = {row.id: row for row in book_result.all()}
+
+    now = datetime.utcnow()
+    max_discount = get_settings().MAX_STAMP_DISCOUNT_AMOUNT
+    results: List[Optional[StampBatchItemResult]] = [None] * len(items)
+    accepted: Dict[StampKey, int] = {}
+    for index, item in enumerate(items):
+        key = (item.merchant_id, item.idempotency_key)
+        book = books.get(item.stamp_book_id)
+        if item.merchant_id not in merchant_categories:
+            detail = "Merchant not found"
+        elif book is None:
+            detail = "Stamp book not found"
+        elif book.status != "active" or (book.expires_at is not None and book.expires_at <= now):
+            detail = "Stamp book is not active"
+        elif item.discount_amount is not None and not 0 <= item.discount_amount <= max_discount:
+            detail = "Discount amount out of range"
+        else:
+            detail = None
+        if detail is not None:
+            results[index] = StampBatchItemResult(
+                idempotency_key=item.idempotency_key, status=REJECTED, detail=detail
+            )
+        elif key not in accepted:
+            accepted[key] = index
+
+    stamp_ids = await _existing_stamp_ids(session, list(accepted))
+    new_keys = [key for key in accepted if key not in stamp_ids]
+    created: Dict[StampKey, int] = {}
+    if new_keys:
+        rows = []
+        for key in new_keys:
+            item = items[accepted[key]]
+            rows.append(
+                {
+                    "stamp_book_id": item.stamp_book_id,
+                    "merchant_id": item.merchant_id,
+                    "client_key": item.idempotency_key,
+                    "visit_at": _visit_at(item, now),
+                    "discount_amount": item.discount_amount,
+                    "approval_method": item.approval_method or OFFLINE_APPROVAL_METHOD,
+                    "photo_url": item.photo_url,
+                    "status": StampStatus.PENDING.value,
+                }
+            )
+        result = await session.execute(
+            _insert_ignoring_duplicates(session)
+            .values(rows)
+            .returning(Stamp.id, Stamp.merchant_id, Stamp.client_key)
+        )
+        created = {(merchant_id, client_key): stamp_id for stamp_id, merchant_id, client_key in result.all()}
+        # keys inserted concurrently by another upload of the same backlog
+        raced = [key for key in new_keys if key not in created]
+        stamp_ids.update(await _existing_stamp_ids(session, raced))
+        stamp_ids.update(created)
+
+    for index, item in enumerate(items):
+        if results[index] is not None:
+            continue
+        key = (item.merchant_id, item.idempotency_key)
+        is_new = key in created and accepted[key] == index
+        results[index] = StampBatchItemResult(
+            idempotency_key=item.idempotency_key,
+            status=CREATED if is_new else DUPLICATE,
+            stamp_id=stamp_ids.get(key),
+        )
+
+    new_items = [items[accepted[key]] for key in created]
+    await apply_stamp_changes(
+        session,
+        [
+            StampChange(
+                item.stamp_book_id,
+                None,
+                StampStatus.PENDING.value,
+                item.discount_amount,
+                _visit_at(item, now),
+            )
+            for item in new_items
+        ],
+    )
+    await bump_versions(session, USER_STAMP_BOOKS, {books[item.stamp_book_id].user_id for item in new_items})
+    await bump_versions(session, MERCHANT_PENDING, {item.merchant_id for item in new_items})
+    await session.commit()
+
+    # audit rows and campaign matches are written by the job queue, off the request
+    await enqueue_audit_logs(
+        actor_id=current_user.id,
+        actor_role=current_user.role,
+        action="stamp_created",
+        target_type="stamp",
+        target_ids=sorted(created.values()),
+    )
+    for key, stamp_id in created.items():
+        item = items[accepted[key]]
+        book = books[item.stamp_book_id]
+        await enqueue_campaign_match(
+            StampFacts(
+                stamp_id=stamp_id,
+                user_id=book.user_id,
+                merchant_id=item.merchant_id,
+                merchant_category=merchant_categories[item.merchant_id],
+                performance_id=book.performance_id,
+                discount_amount=item.discount_amount,
+                approval_method=item.approval_method or OFFLINE_APPROVAL_METHOD,
+                visit_at=_visit_at(item, now),
+            ),
+        )
+    return results
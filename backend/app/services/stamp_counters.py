@@ -0,0 +1,103 @@
+"""Denormalized per-book stamp counters.
+
+``StampBook`` carries approved/pending/rejected counts, the latest stamp
+visit and the approved discount total, so progress can be shown without
+loading stamps. Every path that creates a stamp or changes its status
+calls :func:`apply_stamp_changes` before committing. The counters are
+updated with relative ``UPDATE`` statements in that same transaction, so
+concurrent requests never overwrite each other's increments.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence
+
+from sqlalchemy import DateTime, and_, bindparam, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Stamp, StampBook, StampStatus
+from .versions import USER_STAMP_BOOKS, bump_versions
+
+_COUNT_KEYS = {
+    StampStatus.PENDING.value: "pending",
+    StampStatus.APPROVED.value: "approved",
+    StampStatus.REJECTED.value: "rejected",
+}
+
+
+class StampChange(NamedTuple):
+    stamp_book_id: int
+    old_status: Optional[str]  # None for a new stamp
+    new_status: str
+    discount_amount: Optional[float]
+    visit_at: Optional[datetime]
+
+
+def _counter_update():
+    table = StampBook.__table__
+    last_at = bindparam("last_at", type_=DateTime)
+    newer = or_(table.c.last_stamp_at.is_(None), table.c.last_stamp_at < last_at)
+    return (
+        update(table)
+        .where(table.c.id == bindparam("book_id"))
+        .values(
+            pending_count=table.c.pending_count + bindparam("pending"),
+            approved_count=table.c.approved_count + bindparam("approved"),
+            rejected_count=table.c.rejected_count + bindparam("rejected"),
+            total_discount=table.c.total_discount + bindparam("discount"),
+            last_stamp_at=case((and_(last_at.is_not(None), newer), last_at), else_=table.c.last_stamp_at),
+        )
+    )
+
+
+async def apply_stamp_changes(session: AsyncSession, changes: Iterable[StampChange]) -> None:
+    deltas: Dict[int, Dict[str, Any]] = {}
+    for change in changes:
+        delta = deltas.get(change.stamp_book_id)
+        if delta is None:
+            delta = deltas[change.stamp_book_id] = {
+                "book_id": change.stamp_book_id,
+                "pending": 0,
+                "approved": 0,
+                "rejected": 0,
+                "discount": 0.0,
+                "last_at": None,
+            }
+        if change.old_status != change.new_status:
+            if change.old_status is not None:
+                delta[_COUNT_KEYS[change.old_status]] -= 1
+            delta[_COUNT_KEYS[change.new_status]] += 1
+            discount = change.discount_amount or 0.0
+            if change.old_status == StampStatus.APPROVED.value:
+                delta["discount"] -= discount
+            if change.new_status == StampStatus.APPROVED.value:
+                delta["discount"] += discount
+        if change.visit_at is not None and (delta["last_at"] is None or change.visit_at > delta["last_at"]):
+            delta["last_at"] = change.visit_at
+    if deltas:
+        # ORM instances of these books in the session keep their old counter values
+        await session.execute(_counter_update(), list(deltas.values()))
+
+
+async def recount_stamp_books(session: AsyncSession, stamp_book_ids: Optional[Sequence[int]] = None) -> None:
+    """Recompute counters from the stamps table, e.g. after manual data fixes."""
+
+    def aggregate(expression, status: Optional[str] = None):
+        query = select(expression).where(Stamp.stamp_book_id == StampBook.id)
+        if status is not None:
+            query = query.where(Stamp.status == status)
+        return query.scalar_subquery()
+
+    approved = StampStatus.APPROVED.value
+    statement = update(StampBook).values(
+        pending_count=aggregate(func.count(), StampStatus.PENDING.value),
+        approved_count=aggregate(func.count(), approved),
+        rejected_count=aggregate(func.count(), StampStatus.REJECTED.value),
+        total_discount=func.coalesce(aggregate(func.sum(Stamp.discount_amount), approved), 0),
+        last_stamp_at=aggregate(func.max(Stamp.visit_at)),
+    )
+    owners = select(StampBook.user_id).distinct()
+    if stamp_book_ids is not None:
+        statement = statement.where(StampBook.id.in_(stamp_book_ids))
+        owners = owners.where(StampBook.id.in_(stamp_book_ids))
+    await session.execute(statement.execution_options(synchronize_session=False))
+    # summaries served from the old counters must not be revalidated as current
+    await bump_versions(session, USER_STAMP_BOOKS, (await session.execute(owners)).scalars().all())
@@ -0,0 +1,76 @@
+"""Version counters behind the ETags of polled list endpoints.
+
+Writers call :func:`bump_versions` in the same transaction as the change,
+so a committed change always comes with a new version. Readers fetch the
+version by primary key before running the list query and answer ``304``
+when the client already holds that version.
+
+Scopes:
+
+* ``USER_STAMP_BOOKS`` - keyed by user id; a user's books and their stamps
+* ``MERCHANT_PENDING`` - keyed by merchant id; the merchant's pending stamps
+"""
+from typing import Iterable, List, Tuple, Union
+
+from sqlalchemy import Select, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ResourceVersion
+
+USER_STAMP_BOOKS = "user_stamp_books"
+MERCHANT_PENDING = "merchant_pending"
+
+
+def _upsert(session: AsyncSession):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(ResourceVersion)
+    if dialect == "sqlite":
+        return sqlite.insert(ResourceVersion)
+    return None
+
+
+async def bump_versions(session: AsyncSession, scope: str, owner_ids: Iterable[int]) -> None:
+    # a fixed order keeps concurrent transactions from deadlocking on the rows
+    ids = sorted(set(owner_ids))
+    if not ids:
+        return
+    statement = _upsert(session)
+    if statement is not None:
+        rows = [{"scope": scope, "owner_id": owner_id, "version": 1} for owner_id in ids]
+        await session.execute(
+            statement.values(rows).on_conflict_do_update(
+                index_elements=["scope", "owner_id"],
+                set_={"version": ResourceVersion.version + 1},
+            )
+        )
+        return
+
+    result = await session.execute(
+        update(ResourceVersion)
+        .where(ResourceVersion.scope == scope, ResourceVersion.owner_id.in_(ids))
+        .values(version=ResourceVersion.version + 1)
+        .returning(ResourceVersion.owner_id)
+        .execution_options(synchronize_session=False)
+    )
+    missing = set(ids) - set(result.scalars().all())
+    for owner_id in sorted(missing):
+        session.add(ResourceVersion(scope=scope, owner_id=owner_id, version=1))
+    await session.flush()
+
+
+async def current_versions(
+    session: AsyncSession,
+    scope: str,
+    owner_ids: Union[Iterable[int], Select],
+) -> List[Tuple[int, int]]:
+    """``(owner_id, version)`` pairs for owners that have a version row, by owner id."""
+    if not isinstance(owner_ids, Select):
+        owner_ids = list(owner_ids)
+    result = await session.execute(
+        select(ResourceVersion.owner_id, ResourceVersion.version)
+        .where(ResourceVersion.scope == scope, ResourceVersion.owner_id.in_(owner_ids))
+        .order_by(ResourceVersion.owner_id)
+    )
+    return [tuple(row) for row in result.all()]
@@ -0,0 +1,266 @@
+"""Optional sharding of stamp data by performance.
+
+``SHARD_DATABASE_URLS`` lists extra databases. With ``n`` of them,
+``stamp_books``, ``stamps`` and ``audit_logs`` rows of a performance live
+in shard ``performance_id % (n + 1)``. Shard 0 is the primary database,
+which also keeps every other table. Shard ``k`` hands out ids from
+``k * SHARD_ID_SPAN + 1`` upwards, so a stamp book or stamp id alone names
+its shard. Rows written before sharding was enabled stay reachable in
+shard 0.
+
+Work scoped to one performance, book or stamp runs on one shard session.
+Queries across a user, a merchant or the whole audit log run on every
+shard concurrently through :meth:`ShardRouter.fan_out`. Without extra
+databases every helper hands back the request's own session, so callers
+have one code path. Callers commit the shard session before the primary
+one.
+
+The command below owns the shard schema: it creates missing tables, adds
+the columns and indexes the models gained since, and records the migration
+head it was built for. Workers only compare that revision on startup (see
+:func:`ensure_shard_schemas`).
+
+    SHARD_DATABASE_URLS=sqlite+aiosqlite:///./shard1.db python -m backend.app.shards
+"""
+import argparse
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import (
+    Column,
+    Index,
+    MetaData,
+    String,
+    Table,
+    UniqueConstraint,
+    delete,
+    inspect,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker
+
+from .core.config import get_settings
+from .database import SessionLocal, create_database_engine, engine
+from .migrate import SchemaOutOfDate, head_revision, migration_lock
+from .models import AuditLog, Stamp, StampBook
+from .services.audit_partitions import create_partitioned_table, ensure_partitions
+
+T = TypeVar("T")
+
+SHARD_ID_SPAN = 100_000_000  # 21 shards fit in a 32-bit id
+SHARDED_MODELS = (StampBook, Stamp, AuditLog)
+
+shard_metadata = MetaData()
+
+
+def _shard_column(source: Column) -> Column:
+    # no foreign keys: users, merchants and performances only exist in the primary
+    return Column(
+        source.name,
+        source.type,
+        primary_key=source.primary_key,
+        nullable=source.nullable,
+        server_default=source.server_default.arg if source.server_default is not None else None,
+    )
+
+
+def _shard_table(source: Table) -> Table:
+    table = Table(
+        source.name,
+        shard_metadata,
+        *(_shard_column(c) for c in source.columns),
+        sqlite_autoincrement=True,
+    )
+    for index in source.indexes:
+        Index(index.name, *(table.c[c.name] for c in index.columns), unique=index.unique)
+    for constraint in source.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            Index(constraint.name, *(table.c[c.name] for c in constraint.columns), unique=True)
+    return table
+
+
+for model in SHARDED_MODELS:
+    _shard_table(model.__table__)
+
+# the migration head the shard's tables were last brought up to
+shard_schema_revision = Table(
+    "shard_schema_revision",
+    shard_metadata,
+    Column("revision", String(32), primary_key=True),
+)
+
+
+class Shard(NamedTuple):
+    index: int
+    engine: AsyncEngine
+    sessions: async_sessionmaker
+
+
+class ShardRouter:
+    def __init__(self, urls: Sequence[str] = ()):
+        self.shards: List[Shard] = [Shard(0, engine, SessionLocal)]
+        for index, url in enumerate(urls, start=1):
+            shard_engine = create_database_engine(url)
+            sessions = async_sessionmaker(shard_engine, expire_on_commit=False, class_=AsyncSession)
+            self.shards.append(Shard(index, shard_engine, sessions))
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.shards) > 1
+
+    def for_performance(self, performance_id: int) -> Shard:
+        return self.shards[performance_id % len(self.shards)]
+
+    def for_id(self, record_id: int) -> Shard:
+        # ids outside every range land on the last shard and are simply not found there
+        return self.shards[min(max(record_id // SHARD_ID_SPAN, 0), len(self.shards) - 1)]
+
+    def group_ids(self, record_ids: Iterable[int]) -> Dict[Shard, List[int]]:
+        groups: Dict[Shard, List[int]] = {}
+        for record_id in record_ids:
+            groups.setdefault(self.for_id(record_id), []).append(record_id)
+        return groups
+
+    @asynccontextmanager
+    async def session(self, primary: AsyncSession, shard: Shard) -> AsyncIterator[AsyncSession]:
+        """Session for ``shard``; shard 0 is the caller's primary session itself."""
+        if shard.index == 0:
+            yield primary
+            return
+        async with shard.sessions() as session:
+            yield session
+
+    async def fan_out(
+        self,
+        primary: AsyncSession,
+        query: Callable[[AsyncSession], Awaitable[T]],
+    ) -> List[T]:
+        """Run ``query`` on every shard concurrently; results are in shard order."""
+
+        async def run(shard: Shard) -> T:
+            async with self.session(primary, shard) as session:
+                return await query(session)
+
+        return list(await asyncio.gather(*(run(shard) for shard in self.shards)))
+
+    async def dispose(self) -> None:
+        await asyncio.gather(*(shard.engine.dispose() for shard in self.shards[1:]))
+
+
+async def _seed_id_range(conn: AsyncConnection, table: str, floor: int) -> None:
+    if conn.dialect.name == "postgresql":
+        await conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), :floor) "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE id > :floor)"
+            ),
+            {"floor": floor},
+        )
+    elif conn.dialect.name == "sqlite":
+        await conn.execute(
+            text(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT :table, :floor "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :table)"
+            ),
+            {"table": table, "floor": floor},
+        )
+
+
+def _add_missing_columns_and_indexes(sync_conn) -> None:
+    # create_all skips existing tables, so bring those up to the models here
+    inspector = inspect(sync_conn)
+    operations = Operations(MigrationContext.configure(sync_conn))
+    for table in shard_metadata.sorted_tables:
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                operations.add_column(table.name, _shard_column(column))
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(sync_conn)
+
+
+async def create_shard_schema(shard: Shard, revision: Optional[str] = None) -> None:
+    """Bring an extra shard's tables up to the models and start its ids at its range.
+
+    Runs under the migration lock of the shard, so concurrent runs apply it once.
+    """
+    revision = revision or head_revision()
+    async with migration_lock(shard.engine) as conn:
+        if conn.dialect.name == "postgresql":
+            # partitioned like the primary's (migration 0004); create_all then skips it
+            await create_partitioned_table(conn)
+        await conn.run_sync(shard_metadata.create_all)
+        await conn.run_sync(_add_missing_columns_and_indexes)
+        for model in SHARDED_MODELS:
+            await _seed_id_range(conn, model.__tablename__, shard.index * SHARD_ID_SPAN)
+        await ensure_partitions(conn, datetime.utcnow())
+        await conn.execute(delete(shard_schema_revision))
+        await conn.execute(insert(shard_schema_revision).values(revision=revision))
+
+
+async def shard_revision(shard: Shard) -> Optional[str]:
+    async with shard.engine.connect() as conn:
+        try:
+            return await conn.scalar(select(shard_schema_revision.c.revision))
+        except DBAPIError:
+            # the shard has never been set up
+            return None
+
+
+async def ensure_shard_schemas(shards: Optional[Sequence[Shard]] = None) -> None:
+    """Startup check: one query per extra shard against ``shard_schema_revision``."""
+    head = head_revision()
+    for shard in shard_router.shards[1:] if shards is None else shards:
+        current = await shard_revision(shard)
+        if current == head:
+            continue
+        if get_settings().DB_AUTO_MIGRATE:
+            await create_shard_schema(shard, head)
+            continue
+        raise SchemaOutOfDate(
+            f"Shard {shard.index} schema revision is {current!r}, expected {head!r}. "
+            "Run `python -m backend.app.shards` before starting the API."
+        )
+
+
+shard_router = ShardRouter(get_settings().shard_database_urls)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create or update the stamp tables in every shard database.")
+    parser.parse_args()
+
+    async def run():
+        try:
+            for shard in shard_router.shards[1:]:
+                await create_shard_schema(shard)
+                print(f"shard {shard.index}: ids from {shard.index * SHARD_ID_SPAN + 1}")
+        finally:
+            await shard_router.dispose()
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+import pytest_asyncio
+from sqlalchemy import MetaData
+
+_db_dir = tempfile.mkdtemp(prefix="tcats-test-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_db_dir}/test.db")
+
+from backend.app.database import Base, engine  # noqa: E402
+from backend.app import models  # noqa: E402,F401
+
+
+def _drop_all_tables(sync_conn):
+    # reflected, so tables created outside the models (audit log partitions) go too
+    metadata = MetaData()
+    metadata.reflect(sync_conn)
+    metadata.drop_all(sync_conn)
+
+
+@pytest_asyncio.fixture
+async def db_engine():
+    async with engine.begin() as conn:
+        await conn.run_sync(_drop_all_tables)
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
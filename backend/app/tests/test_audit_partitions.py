@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, insert, select, text
+
+from backend.app.core.config import get_settings
+from backend.app.database import SessionLocal
+from backend.app.models import AuditLog, User
+from backend.app.services.audit_partitions import (
+    archive_partitions,
+    list_partitions,
+    maintain_shards,
+    query_audit_logs,
+    roll_over,
+)
+from backend.app.shards import ShardRouter, create_shard_schema
+
+NOW = datetime(2026, 10, 18, 12, 0)
+
+
+async def _seed(engine, actor_id=None) -> int:
+    async with engine.begin() as conn:
+        for _, name in await list_partitions(conn):
+            await conn.execute(text(f"DROP TABLE {name}"))
+        if actor_id is None:
+            actor_id = (
+                await conn.execute(
+                    insert(User).values(email="admin@example.com", hashed_password="x", role="admin")
+                )
+            ).inserted_primary_key[0]
+        rows = []
+        for month in (7, 8, 9, 10):
+            for day in (3, 17):
+                rows.append(
+                    {
+                        "actor_id": actor_id,
+                        "actor_role": "admin",
+                        "action": "stamp_approved" if day == 3 else "stamp_created",
+                        "target_type": "stamp",
+                        "target_id": month * 100 + day,
+                        "created_at": datetime(2026, month, day),
+                    }
+                )
+        await conn.execute(insert(AuditLog), rows)
+    return actor_id
+
+
+@pytest.mark.asyncio
+async def test_roll_over_keeps_only_the_current_month_hot(db_engine):
+    await _seed(db_engine)
+    async with db_engine.begin() as conn:
+        moved = await roll_over(conn, NOW)
+        assert moved == {"audit_logs_202607": 2, "audit_logs_202608": 2, "audit_logs_202609": 2}
+        assert await conn.scalar(select(func.count()).select_from(AuditLog)) == 2
+        assert [name for _, name in await list_partitions(conn)] == list(moved)
+        assert await roll_over(conn, NOW) == {}
+
+
+@pytest.mark.asyncio
+async def test_query_pages_across_rolled_tables(db_engine):
+    await _seed(db_engine)
+    async with db_engine.begin() as conn:
+        await roll_over(conn, NOW)
+
+    async with SessionLocal() as session:
+        seen, cursor = [], None
+        while True:
+            rows = await query_audit_logs(session, cursor=cursor, limit=3)
+            page = rows[:3]
+            seen.extend(row.target_id for row in page)
+            if len(rows) <= 3:
+                break
+            cursor = (page[-1].created_at, page[-1].id)
+        assert seen == [1017, 1003, 917, 903, 817, 803, 717, 703]
+
+        rows = await query_audit_logs(
+            session,
+            action="stamp_approved",
+            created_from=datetime(2026, 8, 1),
+            created_to=datetime(2026, 10, 1),
+        )
+        assert [row.target_id for row in rows] == [903, 803]
+
+
+@pytest.mark.asyncio
+async def test_cold_partitions_are_archived_and_dropped(db_engine, tmp_path):
+    await _seed(db_engine)
+    async with db_engine.begin() as conn:
+        await roll_over(conn, NOW)
+        archived = await archive_partitions(conn, NOW, hot_months=2, archive_dir=str(tmp_path))
+        assert [(partition.name, partition.rows) for partition in archived] == [("audit_logs_202607", 2)]
+        assert [name for _, name in await list_partitions(conn)] == ["audit_logs_202608", "audit_logs_202609"]
+
+    with gzip.open(archived[0].path, "rt", encoding="utf-8") as handle:
+        records = [json.loads(line) for line in handle]
+    assert [record["target_id"] for record in records] == [703, 717]
+    assert records[0]["created_at"] == "2026-07-03T00:00:00"
+
+
+@pytest.mark.asyncio
+async def test_every_shard_is_maintained(db_engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "AUDIT_LOG_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(get_settings(), "AUDIT_LOG_HOT_MONTHS", 2)
+    router = ShardRouter([f"sqlite+aiosqlite:///{tmp_path}/shard1.db"])
+    try:
+        await create_shard_schema(router.shards[1])
+        actor_id = await _seed(db_engine)
+        await _seed(router.shards[1].engine, actor_id)
+
+        reports = await maintain_shards(router.shards, NOW)
+        rolled = ["audit_logs_202607", "audit_logs_202608", "audit_logs_202609"]
+        for index, directory in ((0, tmp_path / "archive"), (1, tmp_path / "archive" / "shard1")):
+            assert list(reports[index]["rolled_over"]) == rolled
+            assert [partition.path for partition in reports[index]["archived"]] == [
+                os.path.join(str(directory), "audit_logs_202607.jsonl.gz")
+            ]
+        async with router.shards[1].engine.connect() as conn:
+            assert await conn.scalar(select(func.count()).select_from(AuditLog)) == 2
+    finally:
+        await router.dispose()
@@ -0,0 +1,128 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.app.database import SessionLocal
+from backend.app.models import BoxOfficeLink, Performance, StampBook, User
+from backend.app.services.box_office_sync import (
+    parse_show_time,
+    source_metadata,
+    source_performances,
+    source_reservations,
+    sync_box_office,
+)
+from backend.app.utils.phone import normalize_phone
+
+
+@pytest_asyncio.fixture
+async def source(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/box_office.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(source_metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+def _reservation(performance_id: int, phone: str) -> dict:
+    return {
+        "performance_id": performance_id,
+        "platform": "인터파크",
+        "phone": phone,
+        "created_at": datetime(2026, 10, 1),
+    }
+
+
+async def _books():
+    async with SessionLocal() as session:
+        query = select(StampBook.user_id, StampBook.performance_id).order_by(StampBook.user_id)
+        return (await session.execute(query)).all()
+
+
+def _counts(synced):
+    return [(item.source_performance_id, item.buyers, item.issued) for item in synced]
+
+
+def test_parse_show_time_and_phone():
+    assert parse_show_time("2026.10.18", "19:30") == datetime(2026, 10, 18, 19, 30)
+    assert parse_show_time("2026-10-18", "") == datetime(2026, 10, 18)
+    assert parse_show_time("미정", "19:30") is None
+    assert normalize_phone("010-1234-5678") == normalize_phone("1012345678.0") == "01012345678"
+    assert normalize_phone("nan") is None
+
+
+@pytest.mark.asyncio
+async def test_sync_issues_books_incrementally(db_engine, source):
+    async with SessionLocal() as session:
+        session.add_all(
+            [
+                User(email="a@example.com", hashed_password="x", phone="01011112222"),
+                User(email="b@example.com", hashed_password="x", phone="01033334444"),
+                User(email="c@example.com", hashed_password="x", phone="01055556666"),
+                Performance(title="Hamlet", start_at=datetime(2026, 10, 18, 19, 30)),
+            ]
+        )
+        await session.commit()
+        users = dict((await session.execute(select(User.email, User.id))).all())
+        hamlet_id = await session.scalar(select(Performance.id))
+
+    async with source.begin() as conn:
+        await conn.execute(
+            insert(source_performances),
+            [
+                {
+                    "id": 1,
+                    "performance_name": "Hamlet",
+                    "performance_date": "2026.10.18",
+                    "performance_time": "19:30",
+                    "created_at": datetime(2026, 10, 1),
+                    "updated_at": datetime(2026, 10, 1),
+                },
+                {
+                    "id": 2,
+                    "performance_name": "Macbeth",
+                    "performance_date": "2026.10.19",
+                    "performance_time": "",
+                    "created_at": datetime(2026, 10, 1),
+                    "updated_at": datetime(2026, 10, 1),
+                },
+            ],
+        )
+        await conn.execute(
+            insert(source_reservations),
+            [
+                _reservation(1, "010-1111-2222"),
+                _reservation(1, "1011112222.0"),
+                _reservation(1, "010-9999-0000"),  # no account
+                _reservation(2, "010-3333-4444"),
+            ],
+        )
+
+    synced = await sync_box_office(source, SessionLocal, batch_size=1)
+    assert _counts(synced) == [(1, 2, 1), (2, 1, 1)]
+    assert synced[0].performance_id == hamlet_id
+    async with SessionLocal() as session:
+        macbeth = await session.get(Performance, synced[1].performance_id)
+        assert (macbeth.title, macbeth.start_at) == ("Macbeth", datetime(2026, 10, 19))
+        assert len((await session.execute(select(BoxOfficeLink))).all()) == 2
+    assert await _books() == [(users["a@example.com"], hamlet_id), (users["b@example.com"], macbeth.id)]
+
+    assert await sync_box_office(source, SessionLocal) == []
+
+    # a re-upload replaces the reservations and moves updated_at forward
+    async with source.begin() as conn:
+        await conn.execute(delete(source_reservations).where(source_reservations.c.performance_id == 1))
+        await conn.execute(
+            insert(source_reservations), [_reservation(1, "01011112222"), _reservation(1, "010-5555-6666")]
+        )
+        await conn.execute(
+            update(source_performances)
+            .where(source_performances.c.id == 1)
+            .values(updated_at=datetime(2026, 10, 2))
+        )
+    synced = await sync_box_office(source, SessionLocal)
+    assert _counts(synced) == [(1, 2, 1)]
+    assert (users["c@example.com"], hamlet_id) in await _books()
+    assert len(await _books()) == 3
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.database import SessionLocal
+from backend.app.models import Campaign
+from backend.app.services.campaigns import (
+    CampaignEngine,
+    InvalidTargetRules,
+    StampFacts,
+    campaign_engine,
+    compile_target_rules,
+)
+
+NOW = datetime(2026, 10, 17, 19, 30)
+
+
+def _facts(**overrides) -> StampFacts:
+    values = dict(
+        stamp_id=1,
+        user_id=1,
+        merchant_id=7,
+        merchant_category="cafe",
+        performance_id=3,
+        discount_amount=2000.0,
+        approval_method="qr",
+        visit_at=NOW,
+    )
+    values.update(overrides)
+    return StampFacts(**values)
+
+
+def _campaign(campaign_id: int, rules, **overrides):
+    values = dict(id=campaign_id, start_at=NOW - timedelta(days=1), end_at=None, target_rules=rules)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_engine_matches_compiled_rules():
+    engine = CampaignEngine()
+    engine.load(
+        [
+            _campaign(1, None),
+            _campaign(2, '{"merchant_ids": [7], "categories": ["cafe"], "hours": [18, 22]}'),
+            _campaign(3, '{"merchant_ids": [8]}'),
+            _campaign(4, '{"min_discount": 5000}'),
+            _campaign(5, None, end_at=NOW - timedelta(minutes=1)),
+            _campaign(6, "not json"),
+        ]
+    )
+    assert sorted(engine.evaluate(_facts())) == [1, 2]
+    assert engine.evaluate(_facts(merchant_id=8, visit_at=NOW.replace(hour=21))) == [1, 3]
+
+
+def test_hour_windows_can_wrap_past_midnight():
+    _, overnight = compile_target_rules('{"hours": [22, 2]}')
+    matched = [hour for hour in range(24) if overnight(_facts(visit_at=NOW.replace(hour=hour)))]
+    assert matched == [0, 1, 2, 22, 23]
+
+
+def test_unknown_rule_keys_are_rejected():
+    with pytest.raises(InvalidTargetRules):
+        compile_target_rules('{"merchant": 1}')
+
+
+@pytest.mark.parametrize(
+    "rules",
+    [
+        '{"hours": [18]}',
+        '{"hours": [18, 30]}',
+        '{"merchant_ids": 5}',
+        '{"categories": [["cafe"]]}',
+        '{"min_discount": "x"}',
+        '{"weekdays": [7]}',
+    ],
+)
+def test_malformed_rule_values_are_rejected(rules):
+    with pytest.raises(InvalidTargetRules):
+        compile_target_rules(rules)
+
+
+def test_one_malformed_campaign_does_not_break_loading():
+    engine = CampaignEngine()
+    engine.load([_campaign(1, '{"hours": [18]}'), _campaign(2, '{"merchant_ids": 5}'), _campaign(3, None)])
+    assert engine.evaluate(_facts()) == [3]
+
+
+@pytest.mark.asyncio
+async def test_committed_campaign_changes_invalidate_the_engine(db_engine):
+    campaign_engine.load([])
+    assert not campaign_engine.is_stale()
+    async with SessionLocal() as session:
+        session.add(
+            Campaign(title="Autumn", type="stamp", start_at=NOW, target_rules='{"categories": ["cafe"]}')
+        )
+        await session.commit()
+    assert campaign_engine.is_stale()
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+
+from backend.app.core.security import create_access_token
+from backend.app.database import SessionLocal
+from backend.app.main import app
+from backend.app.models import Merchant, Performance, StampBook, User
+
+
+async def _seed():
+    async with SessionLocal() as session:
+        fan = User(email="fan@example.com", hashed_password="x")
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        performance = Performance(title="Show", start_at=datetime(2026, 10, 10))
+        session.add_all([fan, owner, performance])
+        await session.flush()
+        merchant = Merchant(owner_id=owner.id, name="Cafe")
+        book = StampBook(user_id=fan.id, performance_id=performance.id)
+        session.add_all([merchant, book])
+        await session.commit()
+        return book.id, merchant.id
+
+
+def _auth(email: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(email)}"}
+
+
+@pytest.mark.asyncio
+async def test_polling_gets_304_until_a_write_bumps_the_version(db_engine):
+    book_id, merchant_id = await _seed()
+    fan, owner = _auth("fan@example.com"), _auth("owner@example.com")
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        books = await client.get("/api/stamp-books/", headers=fan)
+        pending = await client.get("/api/merchant/stamps/pending", headers=owner)
+        assert books.status_code == pending.status_code == 200
+        books_etag, pending_etag = books.headers["etag"], pending.headers["etag"]
+
+        unchanged = await client.get("/api/stamp-books/", headers={**fan, "If-None-Match": books_etag})
+        assert unchanged.status_code == 304
+        assert unchanged.content == b""
+        unchanged = await client.get(
+            "/api/merchant/stamps/pending", headers={**owner, "If-None-Match": pending_etag}
+        )
+        assert unchanged.status_code == 304
+
+        created = await client.post(
+            f"/api/stamp-books/{book_id}/stamps", headers=fan, json={"merchant_id": merchant_id}
+        )
+        assert created.status_code == 201
+
+        books = await client.get("/api/stamp-books/", headers={**fan, "If-None-Match": books_etag})
+        assert books.status_code == 200
+        assert len(books.json()[0]["stamps"]) == 1
+        pending = await client.get(
+            "/api/merchant/stamps/pending", headers={**owner, "If-None-Match": pending_etag}
+        )
+        assert pending.status_code == 200
+        assert [stamp["id"] for stamp in pending.json()["items"]] == [created.json()["id"]]
+        pending_etag = pending.headers["etag"]
+
+        approved = await client.post(f"/api/merchant/stamps/{created.json()['id']}/approve", headers=owner)
+        assert approved.status_code == 200
+        pending = await client.get(
+            "/api/merchant/stamps/pending", headers={**owner, "If-None-Match": pending_etag}
+        )
+        assert pending.status_code == 200
+        assert pending.json()["items"] == []
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from backend.app.api.routes import admin
+from backend.app.core.security import create_access_token
+from backend.app.database import SessionLocal
+from backend.app.main import app
+from backend.app.models import FraudAlert, User
+
+TIE = datetime(2026, 10, 12, 20, 0)
+
+
+def _alert(stamp_id: int, score: float, status: str, created_at: datetime) -> FraudAlert:
+    return FraudAlert(stamp_id=stamp_id, reason="burst", score=score, status=status, created_at=created_at)
+
+
+async def _seed_alerts() -> None:
+    async with SessionLocal() as session:
+        session.add(User(email="admin@example.com", hashed_password="x", role="admin"))
+        session.add_all(
+            [
+                # ids 1-3 share created_at, so only the id breaks the tie between them
+                _alert(1, 0.9, "open", TIE),
+                _alert(2, 0.5, "open", TIE),
+                _alert(3, 0.95, "open", TIE),
+                _alert(4, 0.9, "resolved", TIE - timedelta(hours=1)),
+                _alert(5, 0.2, "open", TIE + timedelta(hours=1)),
+            ]
+        )
+        await session.commit()
+
+
+async def _pages(client, headers, **params):
+    pages, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        body = (await client.get("/api/admin/fraud-alerts", params=query, headers=headers)).json()
+        pages.append([item["id"] for item in body["items"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cross_created_at_ties_and_keep_filters(db_engine):
+    await _seed_alerts()
+    headers = {"Authorization": f"Bearer {create_access_token('admin@example.com')}"}
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        assert await _pages(client, headers, limit=2) == [[5, 3], [2, 1], [4]]
+        assert await _pages(client, headers, limit=1, status="open", min_score=0.8) == [[3], [1]]
+        window = {"created_from": TIE.isoformat(), "created_to": (TIE + timedelta(minutes=1)).isoformat()}
+        assert await _pages(client, headers, limit=2, **window) == [[3, 2], [1]]
+
+
+@pytest.mark.asyncio
+async def test_count_applies_the_same_filters(db_engine):
+    admin._count_cache.clear()
+    await _seed_alerts()
+    headers = {"Authorization": f"Bearer {create_access_token('admin@example.com')}"}
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        counts = [
+            (await client.get("/api/admin/fraud-alerts/count", params=params, headers=headers)).json()
+            for params in (
+                {},
+                {"status": "open"},
+                {"min_score": 0.8},
+                {"status": "resolved", "min_score": 0.95},
+            )
+        ]
+    assert counts == [
+        {"count": 5, "estimated": False},
+        {"count": 4, "estimated": False},
+        {"count": 3, "estimated": False},
+        {"count": 0, "estimated": False},
+    ]
@@ -0,0 +1,49 @@
+import time
+
+from backend.app.services.geo import MerchantPoint, SpatialIndex, haversine_m
+
+CITY_HALL = (37.5663, 126.9779)
+
+
+def _point(merchant_id: int, lat: float, lon: float, category: str = "cafe", status: str = "active"):
+    return MerchantPoint(merchant_id, f"m{merchant_id}", category, None, status, lat, lon)
+
+
+def test_radius_query_filters_and_sorts_by_distance():
+    index = SpatialIndex()
+    index.upsert(_point(1, 37.5670, 126.9785))  # ~90 m
+    index.upsert(_point(2, 37.5700, 126.9800))  # ~450 m
+    index.upsert(_point(3, 37.5665, 126.9781, category="bar"))
+    index.upsert(_point(4, 37.5668, 126.9783, status="closed"))
+    index.upsert(_point(5, 37.6000, 127.0000))  # ~4 km
+
+    hits = index.query(*CITY_HALL, 500, category="cafe", status="active")
+    assert [point.id for _, point in hits] == [1, 2]
+    assert all(distance <= 500 for distance, _ in hits)
+
+    index.upsert(_point(1, 37.6001, 127.0001))
+    index.remove(2)
+    assert index.query(*CITY_HALL, 500, category="cafe", status="active") == []
+
+
+def test_haversine_matches_known_distance():
+    # Seoul City Hall to Gangnam Station is roughly 8.8 km
+    assert 8_500 < haversine_m(*CITY_HALL, 37.4979, 127.0276) < 9_200
+
+
+def test_polar_and_antimeridian_queries():
+    index = SpatialIndex()
+    index.upsert(_point(1, 89.95, 10.0))
+    index.upsert(_point(2, 89.95, -170.0))  # ~11 km across the pole from 1
+    index.upsert(_point(3, -16.5, 179.999))
+    index.upsert(_point(4, -16.5, -179.999))
+    index.upsert(_point(5, -16.5, 180.0))
+
+    start = time.perf_counter()
+    assert {point.id for _, point in index.query(90.0, 0.0, 20_000)} == {1, 2}
+    assert {point.id for _, point in index.query(89.999, 10.0, 20_000)} == {1, 2}
+    assert time.perf_counter() - start < 1.0
+    assert SpatialIndex().query(90.0, 0.0, 20_000) == []
+
+    assert {point.id for _, point in index.query(-16.5, 180.0, 500)} == {3, 4, 5}
+    assert {point.id for _, point in index.query(-16.5, -179.9995, 500)} == {3, 4, 5}
@@ -1,7 +1,13 @@
+import time
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
 
+from backend.app import database
+from backend.app.core.config import get_settings
 from backend.app.main import app
+from backend.app.services import health
 
 
 @pytest.mark.asyncio
@@ -10,3 +16,40 @@ async def test_health_check():
         response = await client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_readiness_pings_database(db_engine):
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["database"]["ok"] is True
+
+
+@pytest.mark.asyncio
+async def test_ping_times_out_on_an_exhausted_pool(db_engine, monkeypatch):
+    small_engine = create_async_engine(db_engine.url, pool_size=1, max_overflow=0, pool_timeout=30)
+    monkeypatch.setattr(health, "engine", small_engine)
+    monkeypatch.setattr(get_settings(), "READINESS_DB_TIMEOUT_SECONDS", 0.2)
+    try:
+        async with small_engine.connect():
+            started = time.perf_counter()
+            result = await health._ping_database()
+        assert result == {"ok": False, "error": "TimeoutError"}
+        assert time.perf_counter() - started < 5
+    finally:
+        await small_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_saturation_counts_the_configured_overflow(db_engine, monkeypatch):
+    small_engine = create_async_engine(db_engine.url, pool_size=1, max_overflow=1)
+    monkeypatch.setattr(database, "engine", small_engine)
+    monkeypatch.setattr(database.settings, "DB_MAX_OVERFLOW", 1)
+    try:
+        async with small_engine.connect():
+            assert database.pool_saturation() == 0.5
+    finally:
+        await small_engine.dispose()
@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from backend.app.database import SessionLocal
+from backend.app.models import DeadLetterJob
+from backend.app.services.jobs import JobQueue
+
+
+async def _dead_letters():
+    async with SessionLocal() as session:
+        return (await session.execute(select(DeadLetterJob).order_by(DeadLetterJob.id))).scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_failing_job_is_retried_then_succeeds(db_engine):
+    queue = JobQueue(workers=2, max_attempts=3, retry_base_seconds=0)
+    attempts = []
+
+    @queue.handler("flaky")
+    async def flaky(session, payload):
+        attempts.append(payload["n"])
+        if len(attempts) < 3:
+            raise RuntimeError("try again")
+
+    queue.start(SessionLocal)
+    await queue.enqueue("flaky", {"n": 1})
+    await queue.drain()
+    await queue.stop()
+
+    assert attempts == [1, 1, 1]
+    assert await _dead_letters() == []
+
+
+@pytest.mark.asyncio
+async def test_exhausted_job_is_dead_lettered(db_engine):
+    queue = JobQueue(workers=1, max_attempts=2, retry_base_seconds=0)
+
+    @queue.handler("broken")
+    async def broken(session, payload):
+        raise ValueError("boom")
+
+    queue.start(SessionLocal)
+    await queue.enqueue("broken", {"stamp_id": 7})
+    await queue.drain()
+    await queue.stop()
+
+    [dead] = await _dead_letters()
+    assert dead.job_name == "broken"
+    assert json.loads(dead.payload_json) == {"stamp_id": 7}
+    assert dead.error == "ValueError: boom"
+    assert dead.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_handler_concurrency_limit(db_engine):
+    queue = JobQueue(workers=8)
+    active, peak = 0, 0
+
+    @queue.handler("limited", concurrency=2)
+    async def limited(session, payload):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    queue.start(SessionLocal)
+    for n in range(10):
+        await queue.enqueue("limited", {"n": n})
+    await queue.drain()
+    await queue.stop()
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_and_dead_letters_what_does_not_finish(db_engine):
+    queue = JobQueue(workers=1)
+    done = []
+
+    @queue.handler("quick")
+    async def quick(session, payload):
+        done.append(payload["n"])
+
+    @queue.handler("stuck")
+    async def stuck(session, payload):
+        await asyncio.sleep(60)
+
+    queue.start(SessionLocal)
+    await queue.enqueue("quick", {"n": 1})
+    await queue.enqueue("quick", {"n": 2})
+    await queue.enqueue("stuck", {})
+    await queue.enqueue("quick", {"n": 3})
+    await queue.stop(timeout=0.2)
+
+    assert done == [1, 2]
+    assert [(dead.job_name, dead.error) for dead in await _dead_letters()] == [
+        ("stuck", "interrupted by shutdown"),
+        ("quick", "interrupted by shutdown"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_inline_until_started(db_engine):
+    queue = JobQueue()
+    done = []
+
+    @queue.handler("inline")
+    async def inline(session, payload):
+        done.append(payload["n"])
+
+    await queue.enqueue("inline", {"n": 1})
+    assert done == [1]
+    with pytest.raises(KeyError):
+        await queue.enqueue("unknown", {})
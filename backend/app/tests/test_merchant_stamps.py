@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from backend.app.core.security import create_access_token
+from backend.app.database import SessionLocal
+from backend.app.main import app
+from backend.app.models import Merchant, Performance, Stamp, StampBook, User
+
+VISIT = datetime(2026, 10, 11, 12, 0)
+
+
+def _auth(email: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(email)}"}
+
+
+async def _seed(stamps_per_merchant: int = 1):
+    """A fan's book with pending stamps at the owner's cafe and at a rival's bar."""
+    async with SessionLocal() as session:
+        fan = User(email="fan@example.com", hashed_password="x")
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        rival = User(email="rival@example.com", hashed_password="x", role="merchant")
+        performance = Performance(title="Show", start_at=datetime(2026, 10, 10))
+        session.add_all([fan, owner, rival, performance])
+        await session.flush()
+        cafe = Merchant(owner_id=owner.id, name="Cafe")
+        bar = Merchant(owner_id=rival.id, name="Bar")
+        book = StampBook(user_id=fan.id, performance_id=performance.id, pending_count=2 * stamps_per_merchant)
+        session.add_all([cafe, bar, book])
+        await session.flush()
+        stamps = {cafe.id: [], bar.id: []}
+        for n in range(stamps_per_merchant):
+            for merchant in (cafe, bar):
+                visit_at = VISIT + timedelta(minutes=n)
+                stamp = Stamp(stamp_book_id=book.id, merchant_id=merchant.id, visit_at=visit_at)
+                session.add(stamp)
+                stamps[merchant.id].append(stamp)
+        await session.commit()
+        return book.id, [stamp.id for stamp in stamps[cafe.id]], [stamp.id for stamp in stamps[bar.id]]
+
+
+async def _book_counts(book_id: int):
+    async with SessionLocal() as session:
+        book = await session.get(StampBook, book_id)
+        return book.approved_count, book.pending_count
+
+
+@pytest.mark.asyncio
+async def test_concurrent_approvals_count_once(db_engine):
+    book_id, (stamp_id,), _ = await _seed()
+    owner = _auth("owner@example.com")
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        responses = await asyncio.gather(
+            *(client.post(f"/api/merchant/stamps/{stamp_id}/approve", headers=owner) for _ in range(5))
+        )
+        assert {response.status_code for response in responses} == {200}
+        assert {response.json()["status"] for response in responses} == {"approved"}
+
+        again = await client.post(f"/api/merchant/stamps/{stamp_id}/approve", headers=owner)
+        assert again.json()["status"] == "approved"
+    assert await _book_counts(book_id) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_pending_pages_only_show_owned_stamps(db_engine):
+    _, cafe_stamps, _ = await _seed(stamps_per_merchant=3)
+    owner = _auth("owner@example.com")
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        first = (await client.get("/api/merchant/stamps/pending", params={"limit": 2}, headers=owner)).json()
+        assert [item["id"] for item in first["items"]] == cafe_stamps[:2]
+        rest = await client.get(
+            "/api/merchant/stamps/pending", params={"limit": 2, "cursor": first["next_cursor"]}, headers=owner
+        )
+        assert [item["id"] for item in rest.json()["items"]] == cafe_stamps[2:]
+        assert rest.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_approve_skips_foreign_missing_and_settled_stamps(db_engine):
+    book_id, cafe_stamps, bar_stamps = await _seed(stamps_per_merchant=2)
+    owner = _auth("owner@example.com")
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        approved = await client.post(
+            "/api/merchant/stamps/approve",
+            headers=owner,
+            json={"stamp_ids": [cafe_stamps[0], bar_stamps[0], 9999]},
+        )
+        assert approved.json()["approved_ids"] == [cafe_stamps[0]]
+
+        # already approved: not approved (or counted) again
+        again = await client.post(
+            "/api/merchant/stamps/approve", headers=owner, json={"stamp_ids": cafe_stamps}
+        )
+        assert again.json()["approved_ids"] == [cafe_stamps[1]]
+
+        pending = await client.get("/api/merchant/stamps/pending", headers=_auth("rival@example.com"))
+        assert [item["id"] for item in pending.json()["items"]] == bar_stamps
+    assert await _book_counts(book_id) == (2, 2)
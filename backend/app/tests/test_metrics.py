@@ -0,0 +1,59 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.exc import OperationalError
+
+from backend.app.core.instrumentation import install_query_hooks
+from backend.app.database import POOL_CHECKOUT_SECONDS, SessionLocal
+from backend.app.core.metrics import MetricsRegistry
+from backend.app.main import app
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", labelnames=("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+
+    rendered = registry.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in rendered
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in rendered
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 2' in rendered
+    assert 'latency_seconds_count{route="/a"} 2' in rendered
+
+
+@pytest.mark.asyncio
+async def test_requests_are_recorded_per_route():
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        await client.get("/health")
+        response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
+
+
+def test_failed_statements_do_not_leak_query_start_times():
+    engine = create_engine("sqlite://")
+    install_query_hooks(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        assert conn.info["query_started_at"] == []
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_checkout_is_timed_only_when_a_session_connects(db_engine):
+    before = POOL_CHECKOUT_SECONDS.count()
+    async with SessionLocal():
+        pass
+    assert POOL_CHECKOUT_SECONDS.count() == before
+
+    async with SessionLocal() as session:
+        await session.execute(select(1))
+        await session.execute(select(2))
+        assert POOL_CHECKOUT_SECONDS.count() == before + 1
+        await session.commit()
+        await session.execute(select(3))
+    assert POOL_CHECKOUT_SECONDS.count() == before + 2
@@ -0,0 +1,62 @@
+import sys
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.app import migrate
+from backend.app.database import Base
+
+LISTING_INDEXES = {
+    "merchants": {"ix_merchants_owner_id"},
+    "stamps": {"ix_stamps_merchant_status_visit_at", "ix_stamps_pending_merchant_visit_at"},
+    "fraud_alerts": {
+        "ix_fraud_alerts_created_at_id",
+        "ix_fraud_alerts_status_created_at_id",
+        "ix_fraud_alerts_status_score",
+    },
+}
+
+
+async def _indexes(bind, table):
+    def names(sync_conn):
+        return {index["name"] for index in inspect(sync_conn).get_indexes(table)}
+
+    async with bind.connect() as conn:
+        return await conn.run_sync(names)
+
+
+@pytest.mark.asyncio
+async def test_baseline_upgrade_adds_the_listing_indexes(tmp_path):
+    bind = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/migrate.db")
+    try:
+        await migrate.upgrade(migrate.BASELINE_REVISION, bind)
+        for table, names in LISTING_INDEXES.items():
+            assert not names & await _indexes(bind, table)
+
+        await migrate.upgrade("head", bind)
+        assert await migrate.current_revision(bind) == migrate.head_revision()
+        for table, names in LISTING_INDEXES.items():
+            assert names <= await _indexes(bind, table)
+    finally:
+        await bind.dispose()
+
+
+@pytest.mark.asyncio
+async def test_listing_indexes_revision_tolerates_existing_indexes(tmp_path):
+    bind = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/migrate.db")
+    try:
+        async with bind.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await migrate.stamp("0008", bind)
+        await migrate.upgrade("head", bind)
+        assert await migrate.current_revision(bind) == migrate.head_revision()
+    finally:
+        await bind.dispose()
+
+
+def test_stamp_requires_an_explicit_revision(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["migrate", "--stamp"])
+    with pytest.raises(SystemExit) as exc_info:
+        migrate.main()
+    assert exc_info.value.code == 2
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+
+from backend.app.core.security import create_access_token
+from backend.app.database import SessionLocal
+from backend.app.main import app
+from backend.app.models import Merchant, User
+from backend.app.services.pubsub import InMemoryBroker, get_broker, merchant_channel
+
+
+@pytest.mark.asyncio
+async def test_in_memory_broker_routes_by_channel():
+    broker = InMemoryBroker()
+    async with broker.subscribe([merchant_channel(1)]) as subscription:
+        await broker.publish(merchant_channel(2), {"id": 20})
+        await broker.publish(merchant_channel(1), {"id": 10})
+        message = await asyncio.wait_for(subscription.get(), timeout=1)
+        assert message == {"id": 10}
+        assert subscription.queue.empty()
+    assert broker.subscriber_count(merchant_channel(1)) == 0
+
+
+class _StreamClient:
+    """Drives the ASGI app directly: httpx's ASGI transport buffers whole responses."""
+
+    def __init__(self, path: str, email: str):
+        self.scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"authorization", f"Bearer {create_access_token(email)}".encode())],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self._requested = False
+        self.task = None
+
+    async def _receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def open(self) -> dict:
+        self.task = asyncio.create_task(app(self.scope, self._receive, self.messages.put))
+        return await asyncio.wait_for(self.messages.get(), timeout=5)
+
+    async def chunk(self) -> str:
+        message = await asyncio.wait_for(self.messages.get(), timeout=5)
+        return message["body"].decode()
+
+    async def close(self) -> None:
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_stream_delivers_owned_channels_and_unsubscribes_on_disconnect(db_engine):
+    async with SessionLocal() as session:
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        rival = User(email="rival@example.com", hashed_password="x", role="merchant")
+        session.add_all([owner, rival, User(email="fan@example.com", hashed_password="x")])
+        await session.flush()
+        cafe = Merchant(owner_id=owner.id, name="Cafe")
+        bar = Merchant(owner_id=rival.id, name="Bar")
+        session.add_all([cafe, bar])
+        await session.commit()
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        assert (await client.get("/api/merchant/stamps/stream")).status_code == 401
+        fan = {"Authorization": f"Bearer {create_access_token('fan@example.com')}"}
+        assert (await client.get("/api/merchant/stamps/stream", headers=fan)).status_code == 403
+
+    broker = get_broker()
+    stream = _StreamClient("/api/merchant/stamps/stream", "owner@example.com")
+    start = await stream.open()
+    assert start["status"] == 200
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in start["headers"]
+    assert await stream.chunk() == ": connected\n\n"
+    assert broker.subscriber_count(merchant_channel(cafe.id)) == 1
+    assert broker.subscriber_count(merchant_channel(bar.id)) == 0
+
+    await broker.publish(merchant_channel(bar.id), {"id": 2})
+    await broker.publish(merchant_channel(cafe.id), {"id": 1, "visit_at": datetime(2026, 10, 11).isoformat()})
+    assert await stream.chunk() == 'event: stamp\ndata: {"id": 1, "visit_at": "2026-10-11T00:00:00"}\n\n'
+
+    await stream.close()
+    assert broker.subscriber_count(merchant_channel(cafe.id)) == 0
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from backend.app.core.security import hash_qr_token
+from backend.app.database import SessionLocal
+from backend.app.models import Merchant, QRToken, User
+from backend.app.services.qr_tokens import QRTokenRejected, clear_negative_cache, redeem_qr_token
+
+
+async def _seed_token(**token_fields) -> int:
+    async with SessionLocal() as session:
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        session.add(owner)
+        await session.flush()
+        merchant = Merchant(owner_id=owner.id, name="Cafe")
+        session.add(merchant)
+        await session.flush()
+        token = QRToken(merchant_id=merchant.id, token_hash=hash_qr_token("hot-token"), **token_fields)
+        session.add(token)
+        await session.commit()
+        return merchant.id
+
+
+async def _redeem(merchant_id: int, token: str) -> bool:
+    async with SessionLocal() as session:
+        try:
+            await redeem_qr_token(session, merchant_id=merchant_id, token=token)
+        except QRTokenRejected:
+            await session.rollback()
+            return False
+        await session.commit()
+        return True
+
+
+@pytest.mark.asyncio
+async def test_concurrent_redemptions_never_exceed_limit(db_engine):
+    clear_negative_cache()
+    merchant_id = await _seed_token(usage_limit=50, usage_count=0)
+
+    results = await asyncio.gather(*(_redeem(merchant_id, "hot-token") for _ in range(2000)))
+
+    assert sum(results) == 50
+    async with SessionLocal() as session:
+        token = (await session.execute(QRToken.__table__.select())).one()
+    assert token.usage_count == 50
+    assert token.last_used_at is not None
+
+
+@pytest.mark.asyncio
+async def test_expired_and_unknown_tokens_are_rejected(db_engine):
+    clear_negative_cache()
+    merchant_id = await _seed_token(expires_at=datetime.utcnow() - timedelta(minutes=1))
+
+    async with SessionLocal() as session:
+        with pytest.raises(QRTokenRejected, match="expired"):
+            await redeem_qr_token(session, merchant_id=merchant_id, token="hot-token")
+        with pytest.raises(QRTokenRejected, match="Invalid"):
+            await redeem_qr_token(session, merchant_id=merchant_id, token="unknown")
+        # second lookup of an invalid token is answered from the negative cache
+        queries = []
+
+        def record(conn, cursor, statement, *args):
+            queries.append(statement)
+
+        event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            with pytest.raises(QRTokenRejected, match="Invalid"):
+                await redeem_qr_token(session, merchant_id=merchant_id, token="unknown")
+        finally:
+            event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+        assert queries == []
+
+
+@pytest.mark.asyncio
+async def test_wrong_merchant_scan_does_not_block_the_token(db_engine):
+    clear_negative_cache()
+    merchant_id = await _seed_token(usage_limit=5, usage_count=0)
+
+    assert not await _redeem(merchant_id + 1, "hot-token")
+    assert not await _redeem(merchant_id + 1, "hot-token")
+    assert await _redeem(merchant_id, "hot-token")
@@ -0,0 +1,83 @@
+import pytest
+from fastapi import FastAPI, Request
+from httpx import AsyncClient
+
+from backend.app.core.rate_limit import InMemoryBucketStore, RateLimitMiddleware, parse_limits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_bucket_refills_and_admits_all_or_nothing():
+    clock = FakeClock()
+    store = InMemoryBucketStore(clock=clock)
+    user, ip = ("user:a", 2, 2 / 60), ("ip:x", 3, 3 / 60)
+
+    assert await store.acquire([user, ip]) == 0
+    assert await store.acquire([user, ip]) == 0
+    assert await store.acquire([user, ip]) == pytest.approx(30)
+    # the rejected request did not spend the ip token
+    assert await store.acquire([ip]) == 0
+    assert await store.acquire([ip]) > 0
+
+    clock.now += 30
+    assert await store.acquire([user]) == 0
+
+
+@pytest.mark.asyncio
+async def test_full_buckets_are_evicted_first():
+    clock = FakeClock()
+    store = InMemoryBucketStore(max_keys=2, clock=clock)
+    await store.acquire([("a", 5, 1.0)])
+    clock.now += 10
+    await store.acquire([("b", 5, 1.0)])
+    await store.acquire([("c", 5, 1.0)])
+    assert len(store) == 2
+    assert await store.acquire([("b", 5, 1.0)]) == 0
+
+
+def test_parse_limits():
+    assert parse_limits("ip:20/60, user:5/10")[1].refill_per_second == 0.5
+    with pytest.raises(ValueError):
+        parse_limits("device:1/60")
+
+
+@pytest.mark.asyncio
+async def test_middleware_rejects_before_the_handler_runs():
+    calls = []
+    api = FastAPI()
+
+    @api.post("/stamp-books/{stamp_book_id}/stamps")
+    async def add_stamp(stamp_book_id: int, request: Request):
+        payload = await request.json()
+        calls.append((stamp_book_id, payload["merchant_id"]))
+        return {"ok": True}
+
+    @api.post("/other")
+    async def other():
+        return {"ok": True}
+
+    api.add_middleware(
+        RateLimitMiddleware,
+        rules={"POST /stamp-books/{stamp_book_id}/stamps": "merchant:2/60,ip:100/60"},
+        store=InMemoryBucketStore(clock=FakeClock()),
+    )
+
+    async with AsyncClient(app=api, base_url="http://testserver") as client:
+        statuses = [
+            (await client.post("/stamp-books/1/stamps", json={"merchant_id": 7})).status_code for _ in range(3)
+        ]
+        assert statuses == [200, 200, 429]
+        rejected = await client.post("/stamp-books/2/stamps", json={"merchant_id": 7})
+        assert rejected.status_code == 429
+        assert rejected.headers["retry-after"] == "30"
+        assert (await client.post("/stamp-books/1/stamps", json={"merchant_id": 8})).status_code == 200
+        assert (await client.post("/other")).status_code == 200
+
+    assert calls == [(1, 7), (1, 7), (1, 8)]
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.app import database
+from backend.app.core.security import create_access_token
+from backend.app.database import ReadOnlySessionError, RecentWriters, SessionLocal
+from backend.app.main import app
+from backend.app.models import Merchant, Performance, Stamp, StampBook, User
+from backend.app.services.sqlite_replica import copy_database
+
+
+@pytest_asyncio.fixture
+async def replicate(db_engine, tmp_path, monkeypatch):
+    path = str(tmp_path / "replica.db")
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(
+        replica_engine, expire_on_commit=False, class_=AsyncSession, info={"read_only": True}
+    )
+    monkeypatch.setattr(database, "ReadSessionLocal", sessions)
+    monkeypatch.setattr(database, "recent_writers", RecentWriters(window=60))
+    yield lambda: copy_database(db_engine.url.database, path)
+    await replica_engine.dispose()
+
+
+def _auth(email: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(email)}"}
+
+
+@pytest.mark.asyncio
+async def test_reads_use_the_replica_until_the_reader_writes(replicate):
+    async with SessionLocal() as session:
+        fan = User(email="fan@example.com", hashed_password="x")
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        performance = Performance(title="Show", start_at=datetime(2026, 10, 10))
+        session.add_all([fan, owner, performance])
+        await session.flush()
+        merchant = Merchant(owner_id=owner.id, name="Cafe")
+        book = StampBook(user_id=fan.id, performance_id=performance.id)
+        session.add_all([merchant, book])
+        await session.commit()
+    replicate()
+
+    # not replicated yet
+    async with SessionLocal() as session:
+        session.add(Stamp(stamp_book_id=book.id, merchant_id=merchant.id, visit_at=datetime(2026, 10, 11)))
+        await session.commit()
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        books = await client.get("/api/stamp-books/", headers=_auth("fan@example.com"))
+        assert [len(item["stamps"]) for item in books.json()] == [0]
+
+        created = await client.post(
+            f"/api/stamp-books/{book.id}/stamps",
+            headers=_auth("fan@example.com"),
+            json={"merchant_id": merchant.id},
+        )
+        assert created.status_code == 201
+
+        books = await client.get("/api/stamp-books/", headers=_auth("fan@example.com"))
+        assert [len(item["stamps"]) for item in books.json()] == [2]
+        pending = await client.get("/api/merchant/stamps/pending", headers=_auth("owner@example.com"))
+        assert pending.json()["items"] == []
+
+    replicate()
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        pending = await client.get("/api/merchant/stamps/pending", headers=_auth("owner@example.com"))
+        assert len(pending.json()["items"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_read_only_sessions_reject_writes(replicate):
+    async with database.ReadSessionLocal() as session:
+        session.add(User(email="nope@example.com", hashed_password="x"))
+        with pytest.raises(ReadOnlySessionError):
+            await session.flush()
+
+
+def test_recent_writers_expire():
+    now = [0.0]
+    writers = RecentWriters(window=5, max_entries=2, clock=lambda: now[0])
+    writers.mark("a@example.com")
+    assert writers.is_recent("a@example.com")
+    assert not writers.is_recent("b@example.com") and not writers.is_recent(None)
+    now[0] = 6.0
+    assert not writers.is_recent("a@example.com")
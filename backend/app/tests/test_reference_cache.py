@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from backend.app.services.reference_cache import CACHE_REQUESTS, ReadThroughCache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    loads = []
+
+    async def loader(session, key):
+        loads.append(key)
+        await asyncio.sleep(0.01)
+        return {"id": key}
+
+    cache = ReadThroughCache("test", loader, ttl=60)
+    values = await asyncio.gather(*(cache.get(None, 1) for _ in range(100)))
+
+    assert loads == [1]
+    assert all(value == {"id": 1} for value in values)
+    assert await cache.get(None, 1) == {"id": 1}
+    assert CACHE_REQUESTS.value(cache="test", result="hit") == 1
+
+    cache.invalidate_on_change("update", {"id": 1})
+    await cache.get(None, 1)
+    assert loads == [1, 1]
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+import pytest
+from httpx import AsyncClient
+from jose import jwt
+
+from backend.app.core import security
+from backend.app.core.config import get_settings
+from backend.app.core.security import create_access_token, reset_token_cache, verify_access_token
+from backend.app.database import SessionLocal
+from backend.app.main import app
+from backend.app.models import User
+
+
+@pytest.fixture
+def signing_keys(monkeypatch):
+    settings = get_settings()
+
+    def configure(keys: str, active: str = "") -> None:
+        monkeypatch.setattr(settings, "JWT_SIGNING_KEYS", keys)
+        monkeypatch.setattr(settings, "JWT_ACTIVE_KID", active)
+        security._keyring.cache_clear()
+
+    yield configure
+    monkeypatch.undo()
+    reset_token_cache()
+
+
+def test_verified_claims_are_served_from_cache(monkeypatch):
+    reset_token_cache()
+    token = create_access_token("fan@example.com")
+    assert verify_access_token(token) == "fan@example.com"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached token decoded again")
+
+    monkeypatch.setattr(security.jwt, "decode", fail)
+    assert verify_access_token(token) == "fan@example.com"
+
+
+def test_cached_claims_expire_with_the_token(monkeypatch):
+    reset_token_cache()
+    token = create_access_token("fan@example.com", timedelta(seconds=30))
+    assert verify_access_token(token) == "fan@example.com"
+
+    now = security.time.time()
+    monkeypatch.setattr(security.time, "time", lambda: now + 60)
+    assert verify_access_token(token) is None
+    assert token not in security._claims_cache
+
+
+def test_rotation_keeps_old_tokens_until_their_key_is_retired(signing_keys):
+    signing_keys("old:first-secret", active="old")
+    old_token = create_access_token("fan@example.com")
+    assert jwt.get_unverified_header(old_token)["kid"] == "old"
+    assert verify_access_token(old_token) == "fan@example.com"
+
+    signing_keys("old:first-secret,new:second-secret", active="new")
+    new_token = create_access_token("merchant@example.com")
+    assert jwt.get_unverified_header(new_token)["kid"] == "new"
+    assert verify_access_token(old_token) == "fan@example.com"
+    assert verify_access_token(new_token) == "merchant@example.com"
+
+    # retiring a key invalidates its tokens even when their claims are cached
+    signing_keys("new:second-secret", active="new")
+    assert verify_access_token(old_token) is None
+    assert verify_access_token(new_token) == "merchant@example.com"
+
+
+def test_unknown_kid_and_legacy_tokens(signing_keys):
+    signing_keys("")
+    legacy = jwt.encode(
+        {"sub": "legacy@example.com", "exp": 4102444800}, get_settings().SECRET_KEY, algorithm="HS256"
+    )
+    assert verify_access_token(legacy) == "legacy@example.com"
+
+    forged = jwt.encode(
+        {"sub": "admin@example.com", "exp": 4102444800}, "guess", algorithm="HS256", headers={"kid": "missing"}
+    )
+    assert verify_access_token(forged) is None
+    assert verify_access_token("not-a-token") is None
+
+
+def test_legacy_tokens_survive_rotation_until_default_is_retired(signing_keys, monkeypatch):
+    signing_keys("")
+    legacy = jwt.encode(
+        {"sub": "legacy@example.com", "exp": 4102444800}, get_settings().SECRET_KEY, algorithm="HS256"
+    )
+    assert verify_access_token(legacy) == "legacy@example.com"
+
+    signing_keys("new:second-secret")
+    assert jwt.get_unverified_header(create_access_token("fan@example.com"))["kid"] == "new"
+    reset_token_cache()
+    assert verify_access_token(legacy) == "legacy@example.com"
+
+    # retiring the default key drops kid-less tokens, cached or not
+    monkeypatch.setattr(get_settings(), "JWT_RETIRE_DEFAULT_KEY", True)
+    security._keyring.cache_clear()
+    assert verify_access_token(legacy) is None
+
+
+@pytest.mark.asyncio
+async def test_bearer_token_is_verified_once_per_request(db_engine, monkeypatch):
+    async with SessionLocal() as session:
+        session.add(User(email="fan@example.com", hashed_password="x"))
+        await session.commit()
+    calls = []
+
+    def counting_verify(token):
+        calls.append(token)
+        return verify_access_token(token)
+
+    monkeypatch.setattr(security, "verify_access_token", counting_verify)
+    headers = {"Authorization": f"Bearer {create_access_token('fan@example.com')}"}
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        # rate limited per user, then get_session and get_current_user
+        response = await client.post("/api/stamp-books/404/stamps", headers=headers, json={"merchant_id": 1})
+    assert response.status_code == 404
+    assert len(calls) == 1
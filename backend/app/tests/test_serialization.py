@@ -0,0 +1,25 @@
+import json
+from datetime import datetime
+
+from backend.app.models import Stamp
+from backend.app.schemas import StampPage, StampRead
+from backend.app.utils.serialization import FastJSONResponse, row_dicts, schema_columns
+
+
+def test_column_rows_render_like_the_response_model():
+    columns = schema_columns(Stamp, StampRead)
+    values = {
+        "id": 1,
+        "stamp_book_id": 2,
+        "merchant_id": 3,
+        "discount_amount": 1500.0,
+        "approval_method": "qr",
+        "photo_url": None,
+        "status": "pending",
+        "visit_at": datetime(2026, 10, 18, 12, 30, 0, 250000),
+    }
+    row = tuple(values[column.key] for column in columns)
+
+    fast = FastJSONResponse({"items": row_dicts(columns, [row]), "next_cursor": None})
+    expected = StampPage(items=[Stamp(**values)]).model_dump(mode="json")
+    assert json.loads(fast.body) == expected
@@ -0,0 +1,82 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from backend.app.database import SessionLocal
+from backend.app.models import (
+    Merchant,
+    MerchantContract,
+    MerchantSettlement,
+    Performance,
+    Stamp,
+    StampBook,
+    Transaction,
+    User,
+)
+from backend.app.services.settlements import run_settlement
+
+PERIOD = (datetime(2026, 10, 1), datetime(2026, 11, 1))
+
+
+async def _seed() -> int:
+    async with SessionLocal() as session:
+        user = User(email="fan@example.com", hashed_password="x")
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        performance = Performance(title="Show", start_at=datetime(2026, 10, 10))
+        session.add_all([user, owner, performance])
+        await session.flush()
+        merchant = Merchant(owner_id=owner.id, name="Cafe")
+        book = StampBook(user_id=user.id, performance_id=performance.id)
+        session.add_all([merchant, book])
+        await session.flush()
+        session.add_all(
+            [
+                MerchantContract(
+                    merchant_id=merchant.id,
+                    start_at=datetime(2026, 9, 1),
+                    end_at=datetime(2026, 10, 15),
+                    fee_plan="standard",
+                    discount_rate=0.1,
+                ),
+                MerchantContract(merchant_id=merchant.id, start_at=datetime(2026, 10, 15), fee_plan="0.01"),
+            ]
+        )
+        visits = [
+            (datetime(2026, 10, 5), None, Decimal("10000"), "approved"),  # discount 1000, fee 300
+            (datetime(2026, 10, 20), 500.0, Decimal("20000"), "approved"),  # discount 500, fee 200
+            (datetime(2026, 10, 21), 900.0, None, "pending"),
+            (datetime(2026, 11, 2), 900.0, None, "approved"),
+        ]
+        for visit_at, discount, amount, status in visits:
+            stamp = Stamp(
+                stamp_book_id=book.id,
+                merchant_id=merchant.id,
+                visit_at=visit_at,
+                discount_amount=discount,
+                status=status,
+            )
+            session.add(stamp)
+            await session.flush()
+            if amount is not None:
+                session.add(Transaction(stamp_id=stamp.id, amount=amount, payment_method="card"))
+        await session.commit()
+        return merchant.id
+
+
+@pytest.mark.asyncio
+async def test_settlement_applies_contract_at_visit_time_and_is_idempotent(db_engine):
+    merchant_id = await _seed()
+
+    await run_settlement(SessionLocal, *PERIOD)
+    totals = (await run_settlement(SessionLocal, *PERIOD))[merchant_id]
+
+    assert totals.stamp_count == 2
+    assert totals.gross == Decimal("30000")
+    assert totals.discount == Decimal("1500")
+    assert totals.net == Decimal("1000")
+    async with SessionLocal() as session:
+        rows = (await session.execute(select(MerchantSettlement))).scalars().all()
+    assert len(rows) == 1
+    assert rows[0].net_amount == Decimal("1000.00")
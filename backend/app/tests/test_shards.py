@@ -0,0 +1,155 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import inspect, select, text
+
+from backend.app.core.config import get_settings
+from backend.app.core.security import create_access_token
+from backend.app.database import SessionLocal
+from backend.app.main import app
+from backend.app.migrate import SchemaOutOfDate, head_revision
+from backend.app.models import AuditLog, Merchant, Performance, Stamp, StampBook, User
+from backend.app.shards import (
+    SHARD_ID_SPAN,
+    ShardRouter,
+    create_shard_schema,
+    ensure_shard_schemas,
+    shard_revision,
+    shard_router,
+)
+
+
+@pytest_asyncio.fixture
+async def shards(db_engine, tmp_path, monkeypatch):
+    router = ShardRouter([f"sqlite+aiosqlite:///{tmp_path}/shard{index}.db" for index in (1, 2)])
+    for shard in router.shards[1:]:
+        await create_shard_schema(shard)
+    monkeypatch.setattr(shard_router, "shards", router.shards)
+    yield router.shards
+    await router.dispose()
+
+
+def _auth(email: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(email)}"}
+
+
+async def _ids(shard, model):
+    async with shard.sessions() as session:
+        return (await session.execute(select(model.id).order_by(model.id))).scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_stamp_data_is_routed_by_performance(shards):
+    async with SessionLocal() as session:
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        session.add_all(
+            [
+                User(email="fan@example.com", hashed_password="x"),
+                User(email="admin@example.com", hashed_password="x", role="admin"),
+                owner,
+                *(Performance(title=f"Show {n}", start_at=datetime(2026, 10, n)) for n in (1, 2, 3)),
+            ]
+        )
+        await session.flush()
+        merchant = Merchant(owner_id=owner.id, name="Cafe")
+        session.add(merchant)
+        await session.commit()
+
+    fan = _auth("fan@example.com")
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        book_ids = {}
+        for performance_id in (1, 2, 3):
+            issued = await client.post(
+                "/api/stamp-books/", headers=fan, json={"performance_id": performance_id}
+            )
+            assert issued.status_code == 201
+            book_ids[performance_id] = issued.json()["id"]
+        # shard = performance_id % 3; each shard numbers its rows from its own range
+        assert book_ids == {1: SHARD_ID_SPAN + 1, 2: 2 * SHARD_ID_SPAN + 1, 3: 1}
+        duplicate = await client.post("/api/stamp-books/", headers=fan, json={"performance_id": 2})
+        assert duplicate.status_code == 400
+
+        created = await client.post(
+            f"/api/stamp-books/{book_ids[2]}/stamps", headers=fan, json={"merchant_id": merchant.id}
+        )
+        assert created.status_code == 201
+        stamp_id = created.json()["id"]
+        assert await _ids(shards[2], Stamp) == [stamp_id] and await _ids(shards[0], Stamp) == []
+
+        books = (await client.get("/api/stamp-books/", headers=fan)).json()
+        assert {book["id"]: len(book["stamps"]) for book in books} == {
+            1: 0,
+            SHARD_ID_SPAN + 1: 0,
+            2 * SHARD_ID_SPAN + 1: 1,
+        }
+        summary = (await client.get("/api/stamp-books/summary", headers=fan)).json()
+        assert [item["performance_id"] for item in summary] == [1, 2, 3]
+        assert summary[1]["pending_count"] == 1
+
+        owner_headers = _auth("owner@example.com")
+        pending = await client.get("/api/merchant/stamps/pending", headers=owner_headers)
+        assert [item["id"] for item in pending.json()["items"]] == [stamp_id]
+        approved = await client.post(
+            "/api/merchant/stamps/approve", headers=owner_headers, json={"stamp_ids": [stamp_id, 404]}
+        )
+        assert approved.json()["approved_ids"] == [stamp_id]
+
+        admin = _auth("admin@example.com")
+        page = (await client.get("/api/admin/audit-logs", params={"limit": 3}, headers=admin)).json()
+        actions = [item["action"] for item in page["items"]]
+        assert actions == ["stamp_approved", "stamp_created", "stamp_book_issued"]
+        assert page["next_cursor"] is not None
+        rest = await client.get(
+            "/api/admin/audit-logs", params={"cursor": page["next_cursor"]}, headers=admin
+        )
+        assert len(rest.json()["items"]) == 2
+
+    async with shards[2].sessions() as session:
+        book = await session.get(StampBook, book_ids[2])
+        assert (book.approved_count, book.pending_count) == (1, 0)
+    assert len(await _ids(shards[2], AuditLog)) == 3
+    assert len(await _ids(shards[0], AuditLog)) == 1
+
+
+@pytest.mark.asyncio
+async def test_ids_name_their_shard(shards):
+    assert shard_router.for_id(7) is shards[0]
+    assert shard_router.for_id(2 * SHARD_ID_SPAN + 5) is shards[2]
+    assert shard_router.for_id(9 * SHARD_ID_SPAN) is shards[2]
+    groups = shard_router.group_ids([1, SHARD_ID_SPAN + 1, 2])
+    assert groups == {shards[0]: [1, 2], shards[1]: [SHARD_ID_SPAN + 1]}
+
+
+@pytest.mark.asyncio
+async def test_startup_check_requires_the_shard_command(tmp_path, monkeypatch):
+    router = ShardRouter([f"sqlite+aiosqlite:///{tmp_path}/shard1.db"])
+    shard = router.shards[1]
+    try:
+        with pytest.raises(SchemaOutOfDate):
+            await ensure_shard_schemas([shard])
+
+        await create_shard_schema(shard)
+        assert await shard_revision(shard) == head_revision()
+        await ensure_shard_schemas([shard])
+
+        # a shard built before the models gained a column and an index
+        async with shard.engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_stamps_merchant_status_visit_at"))
+            await conn.execute(text("ALTER TABLE stamps DROP COLUMN photo_url"))
+            await conn.execute(text("UPDATE shard_schema_revision SET revision = '0001'"))
+        monkeypatch.setattr(get_settings(), "DB_AUTO_MIGRATE", True)
+        await ensure_shard_schemas([shard])
+
+        async with shard.engine.connect() as conn:
+            columns, indexes = await conn.run_sync(
+                lambda sync_conn: (
+                    {column["name"] for column in inspect(sync_conn).get_columns("stamps")},
+                    {index["name"] for index in inspect(sync_conn).get_indexes("stamps")},
+                )
+            )
+        assert "photo_url" in columns and "ix_stamps_merchant_status_visit_at" in indexes
+        assert await shard_revision(shard) == head_revision()
+    finally:
+        await router.dispose()
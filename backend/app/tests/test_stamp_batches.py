@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from backend.app.core.security import create_access_token
+from backend.app.database import SessionLocal
+from backend.app.main import app
+from backend.app.models import AuditLog, Merchant, Performance, Stamp, StampBook, User
+from backend.app.schemas import StampBatchItem
+from backend.app.services.jobs import job_queue
+from backend.app.services.settlements import settle_merchant
+from backend.app.services.side_effects import AUDIT_LOG_JOB, CAMPAIGN_MATCH_JOB
+from backend.app.services.stamp_batches import ingest_stamp_batch
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_is_idempotent_per_item(db_engine):
+    async with SessionLocal() as session:
+        fan = User(email="fan@example.com", hashed_password="x")
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        performance = Performance(title="Show", start_at=datetime(2026, 10, 10))
+        session.add_all([fan, owner, performance])
+        await session.flush()
+        merchant = Merchant(owner_id=owner.id, name="Cafe")
+        book = StampBook(user_id=fan.id, performance_id=performance.id)
+        session.add_all([merchant, book])
+        await session.commit()
+
+    items = [
+        StampBatchItem(idempotency_key="a", stamp_book_id=book.id, merchant_id=merchant.id),
+        StampBatchItem(idempotency_key="b", stamp_book_id=book.id, merchant_id=merchant.id),
+        StampBatchItem(idempotency_key="a", stamp_book_id=book.id, merchant_id=merchant.id),
+        StampBatchItem(idempotency_key="c", stamp_book_id=book.id + 100, merchant_id=merchant.id),
+    ]
+    async with SessionLocal() as session:
+        first = await ingest_stamp_batch(session, owner, items)
+    async with SessionLocal() as session:
+        second = await ingest_stamp_batch(session, owner, items[:2])
+
+    assert [r.status for r in first] == ["created", "created", "duplicate", "rejected"]
+    assert first[0].stamp_id == first[2].stamp_id
+    assert [r.status for r in second] == ["duplicate", "duplicate"]
+    assert [r.stamp_id for r in second] == [first[0].stamp_id, first[1].stamp_id]
+    async with SessionLocal() as session:
+        assert await session.scalar(select(func.count()).select_from(Stamp)) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_route_queues_audit_logs_and_campaign_matches(db_engine, monkeypatch):
+    async with SessionLocal() as session:
+        fan = User(email="fan@example.com", hashed_password="x")
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        performance = Performance(title="Show", start_at=datetime(2026, 10, 10))
+        session.add_all([fan, owner, performance])
+        await session.flush()
+        merchant = Merchant(owner_id=owner.id, name="Cafe")
+        book = StampBook(user_id=fan.id, performance_id=performance.id)
+        session.add_all([merchant, book])
+        await session.commit()
+
+    queued = []
+
+    async def enqueue(name, payload):
+        queued.append((name, payload))
+
+    monkeypatch.setattr(job_queue, "enqueue", enqueue)
+    items = [
+        {"idempotency_key": key, "stamp_book_id": book.id, "merchant_id": merchant.id}
+        for key in ("a", "b", "c")
+    ]
+    headers = {"Authorization": f"Bearer {create_access_token('owner@example.com')}"}
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.post("/api/merchant/stamps/batch", headers=headers, json={"items": items})
+    stamp_ids = [result["stamp_id"] for result in response.json()["results"]]
+
+    assert [(name, payload["target_ids"]) for name, payload in queued if name == AUDIT_LOG_JOB] == [
+        (AUDIT_LOG_JOB, sorted(stamp_ids))
+    ]
+    matched = [payload["stamp_id"] for name, payload in queued if name == CAMPAIGN_MATCH_JOB]
+    assert sorted(matched) == sorted(stamp_ids)
+    async with SessionLocal() as session:
+        assert await session.scalar(select(func.count()).select_from(AuditLog)) == 0
+
+
+@pytest.mark.asyncio
+async def test_uploads_wait_for_approval_and_bound_discounts(db_engine):
+    async with SessionLocal() as session:
+        stranger = User(email="stranger@example.com", hashed_password="x")
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        performance = Performance(title="Show", start_at=datetime(2026, 10, 10))
+        session.add_all([stranger, owner, performance])
+        await session.flush()
+        merchant = Merchant(owner_id=owner.id, name="Cafe")
+        # a book the merchant has no tie to: the upload must not make it pay out
+        book = StampBook(user_id=stranger.id, performance_id=performance.id)
+        session.add_all([merchant, book])
+        await session.commit()
+
+    def item(key, discount):
+        return StampBatchItem(
+            idempotency_key=key, stamp_book_id=book.id, merchant_id=merchant.id, discount_amount=discount
+        )
+
+    async with SessionLocal() as session:
+        results = await ingest_stamp_batch(
+            session, owner, [item("ok", 500.0), item("negative", -500.0), item("huge", 1e12)]
+        )
+    assert [(r.status, r.detail) for r in results] == [
+        ("created", None),
+        ("rejected", "Discount amount out of range"),
+        ("rejected", "Discount amount out of range"),
+    ]
+
+    async with SessionLocal() as session:
+        stamp = await session.get(Stamp, results[0].stamp_id)
+        assert stamp.status == "pending"
+        counted = await session.get(StampBook, book.id)
+        assert (counted.approved_count, counted.pending_count, counted.total_discount) == (0, 1, 0)
+        totals = await settle_merchant(
+            session, merchant.id, datetime.utcnow() - timedelta(days=1), datetime.utcnow() + timedelta(days=1)
+        )
+    assert (totals.stamp_count, totals.discount) == (0, 0)
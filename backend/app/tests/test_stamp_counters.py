@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from backend.app.database import SessionLocal
+from backend.app.models import Merchant, Performance, Stamp, StampBook, StampStatus, User
+from backend.app.services.stamp_counters import StampChange, apply_stamp_changes, recount_stamp_books
+
+COUNTER_COLUMNS = (
+    StampBook.approved_count,
+    StampBook.pending_count,
+    StampBook.rejected_count,
+    StampBook.total_discount,
+    StampBook.last_stamp_at,
+)
+
+
+async def _counters(session, book_id):
+    result = await session.execute(select(*COUNTER_COLUMNS).where(StampBook.id == book_id))
+    return tuple(result.one())
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_creates_and_approvals(db_engine):
+    async with SessionLocal() as session:
+        fan = User(email="fan@example.com", hashed_password="x")
+        owner = User(email="owner@example.com", hashed_password="x", role="merchant")
+        performance = Performance(title="Show", start_at=datetime(2026, 10, 10))
+        session.add_all([fan, owner, performance])
+        await session.flush()
+        merchant = Merchant(owner_id=owner.id, name="Cafe")
+        book = StampBook(user_id=fan.id, performance_id=performance.id)
+        session.add_all([merchant, book])
+        await session.commit()
+
+    visits = [datetime(2026, 10, 11, hour) for hour in (10, 12, 11)]
+    async with SessionLocal() as session:
+        stamps = [
+            Stamp(stamp_book_id=book.id, merchant_id=merchant.id, visit_at=visit_at, discount_amount=1000.0)
+            for visit_at in visits
+        ]
+        session.add_all(stamps)
+        await apply_stamp_changes(
+            session,
+            [StampChange(book.id, None, StampStatus.PENDING.value, 1000.0, visit_at) for visit_at in visits],
+        )
+        await session.commit()
+        assert await _counters(session, book.id) == (0, 3, 0, 0.0, datetime(2026, 10, 11, 12))
+
+        approved_at = datetime(2026, 10, 11, 13)
+        for stamp, status in zip(stamps[:2], (StampStatus.APPROVED.value, StampStatus.REJECTED.value)):
+            stamp.status = status
+        stamps[0].visit_at = approved_at
+        await apply_stamp_changes(
+            session,
+            [
+                StampChange(book.id, StampStatus.PENDING.value, StampStatus.APPROVED.value, 1000.0, approved_at),
+                StampChange(book.id, StampStatus.PENDING.value, StampStatus.REJECTED.value, 1000.0, None),
+            ],
+        )
+        await session.commit()
+        expected = (1, 1, 1, 1000.0, approved_at)
+        assert await _counters(session, book.id) == expected
+
+        await recount_stamp_books(session)
+        await session.commit()
+        assert await _counters(session, book.id) == expected
@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import AuditLog
@@ -27,3 +28,29 @@ async def record_audit_log(
     )
     session.add(log)
     await session.flush()
+
+
+async def record_audit_logs(
+    session: AsyncSession,
+    *,
+    actor_id: int,
+    actor_role: str,
+    action: str,
+    target_type: str,
+    target_ids: Iterable[int],
+    created_at: Optional[datetime] = None,
+) -> None:
+    created_at = created_at or datetime.utcnow()
+    rows = [
+        {
+            "actor_id": actor_id,
+            "actor_role": actor_role,
+            "action": action,
+            "target_type": target_type,
+            "target_id": target_id,
+            "created_at": created_at,
+        }
+        for target_id in target_ids
+    ]
+    if rows:
+        await session.execute(insert(AuditLog), rows)
@@ -0,0 +1,55 @@
+"""Post-commit change notifications for in-process caches and indexes.
+
+Mapper events fire at flush time, before the transaction is known to
+succeed, so changes are parked on the session and only dispatched from
+``after_commit``; a rollback discards them. Bulk ``update()``/``delete()``
+statements bypass mapper events and need an explicit invalidation.
+"""
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+ChangeCallback = Callable[[str, Dict[str, Any]], None]
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+_SESSION_KEY = "committed_change_hooks"
+_callbacks: Dict[type, List[ChangeCallback]] = defaultdict(list)
+
+
+def _snapshot(target) -> Dict[str, Any]:
+    return {attr.key: getattr(target, attr.key) for attr in inspect(target).mapper.column_attrs}
+
+
+def _recorder(action: str):
+    def record(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(_SESSION_KEY, []).append((type(target), action, _snapshot(target)))
+
+    return record
+
+
+def on_committed_change(model: type, callback: ChangeCallback) -> None:
+    """Call ``callback(action, column_values)`` after each committed change to ``model``."""
+    if model not in _callbacks:
+        event.listen(model, "after_insert", _recorder(INSERT))
+        event.listen(model, "after_update", _recorder(UPDATE))
+        event.listen(model, "after_delete", _recorder(DELETE))
+    _callbacks[model].append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session):
+    for model, action, values in session.info.pop(_SESSION_KEY, ()):
+        for callback in _callbacks.get(model, ()):
+            callback(action, values)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(_SESSION_KEY, None)
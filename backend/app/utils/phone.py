@@ -0,0 +1,24 @@
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(raw: Optional[str]) -> Optional[str]:
+    """Return a Korean phone number as bare digits (``01012345678``), or None.
+
+    Box-office exports vary: ``010-1234-5678``, ``+82 10 1234 5678`` and
+    ``1012345678.0`` (a number column that lost its leading zero) all map
+    to the same value.
+    """
+    if raw is None:
+        return None
+    text = str(raw).strip()
+    if text.endswith(".0"):
+        text = text[:-2]
+    digits = _NON_DIGITS.sub("", text)
+    if digits.startswith("82") and len(digits) >= 10:
+        digits = "0" + digits[2:].lstrip("0")
+    elif not digits.startswith("0"):
+        digits = "0" + digits
+    return digits if 9 <= len(digits) <= 11 else None
@@ -0,0 +1,48 @@
+"""Column-tuple serialization for list endpoints.
+
+List endpoints select exactly the columns of their response schema and
+return plain dicts through :class:`FastJSONResponse`. That skips building
+ORM instances, the ``from_attributes`` validation of every item and
+FastAPI's second validation against ``response_model``, which stays on
+the route for the OpenAPI schema only. ``orjson`` is used when installed.
+"""
+import json
+from datetime import date
+from decimal import Decimal
+from typing import Any, Iterable, List, Sequence
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default)
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+        ).encode("utf-8")
+
+
+def schema_columns(model: type, schema: type[BaseModel], exclude: Iterable[str] = ()) -> List:
+    """ORM columns of ``model`` named like the fields of ``schema``, in field order."""
+    excluded = set(exclude)
+    return [getattr(model, name) for name in schema.model_fields if name not in excluded]
+
+
+def row_dicts(columns: Sequence, rows: Iterable[Sequence]) -> List[dict]:
+    names = [column.key for column in columns]
+    return [dict(zip(names, row)) for row in rows]
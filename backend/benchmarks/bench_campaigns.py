@@ -0,0 +1,85 @@
+"""Campaign engine benchmark: N active campaigns evaluated against a stamp stream.
+
+    python -m backend.benchmarks.bench_campaigns --campaigns 1000 --stamps 100000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from backend.app.services.campaigns import CampaignEngine, StampFacts
+
+CATEGORIES = ["cafe", "bar", "restaurant", "bookstore", "goods"]
+
+
+def random_rules(rng: random.Random, merchants: int, performances: int) -> str:
+    rules = {}
+    if rng.random() < 0.6:
+        rules["merchant_ids"] = rng.sample(range(1, merchants + 1), rng.randint(1, 20))
+    if rng.random() < 0.5:
+        rules["categories"] = rng.sample(CATEGORIES, rng.randint(1, 3))
+    if rng.random() < 0.3:
+        rules["performance_ids"] = rng.sample(range(1, performances + 1), rng.randint(1, 5))
+    if rng.random() < 0.3:
+        rules["min_discount"] = rng.choice([1000, 3000, 5000])
+    if rng.random() < 0.2:
+        start = rng.randint(0, 20)
+        rules["hours"] = [start, start + 3]
+    return json.dumps(rules)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--campaigns", type=int, default=1000)
+    parser.add_argument("--stamps", type=int, default=100_000)
+    parser.add_argument("--merchants", type=int, default=2000)
+    parser.add_argument("--performances", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    campaigns = [
+        SimpleNamespace(
+            id=index,
+            start_at=now - timedelta(days=1),
+            end_at=now + timedelta(days=30),
+            target_rules=random_rules(rng, args.merchants, args.performances),
+        )
+        for index in range(1, args.campaigns + 1)
+    ]
+
+    engine = CampaignEngine()
+    started = time.perf_counter()
+    engine.load(campaigns)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    stamps = [
+        StampFacts(
+            stamp_id=index,
+            user_id=rng.randint(1, 50_000),
+            merchant_id=rng.randint(1, args.merchants),
+            merchant_category=rng.choice(CATEGORIES),
+            performance_id=rng.randint(1, args.performances),
+            discount_amount=rng.choice([None, 500.0, 2000.0, 6000.0]),
+            approval_method=rng.choice(["qr", "photo", "manual"]),
+            visit_at=now + timedelta(minutes=rng.randint(0, 60 * 24)),
+        )
+        for index in range(args.stamps)
+    ]
+
+    matches = 0
+    started = time.perf_counter()
+    for facts in stamps:
+        matches += len(engine.evaluate(facts))
+    elapsed = time.perf_counter() - started
+
+    print(f"compile {args.campaigns} campaigns: {load_ms:.1f} ms")
+    print(f"evaluate {args.stamps} stamps: {elapsed:.3f} s ({elapsed / args.stamps * 1e6:.2f} us/stamp)")
+    print(f"matches: {matches} ({matches / args.stamps:.2f}/stamp)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Nearby-merchant benchmark: radius queries over a synthetic city of merchants.
+
+    python -m backend.benchmarks.bench_nearby --merchants 50000 --queries 10000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from backend.app.services.geo import MerchantPoint, SpatialIndex
+
+# roughly the Seoul metropolitan core
+LAT_RANGE = (37.45, 37.70)
+LON_RANGE = (126.80, 127.15)
+CATEGORIES = ["cafe", "bar", "restaurant", "bookstore", "goods"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--merchants", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--radius", type=float, default=1000.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = SpatialIndex()
+    started = time.perf_counter()
+    for merchant_id in range(1, args.merchants + 1):
+        index.upsert(
+            MerchantPoint(
+                merchant_id,
+                f"merchant-{merchant_id}",
+                rng.choice(CATEGORIES),
+                None,
+                "active" if rng.random() < 0.9 else "inactive",
+                rng.uniform(*LAT_RANGE),
+                rng.uniform(*LON_RANGE),
+            )
+        )
+    build_ms = (time.perf_counter() - started) * 1000
+
+    timings = []
+    results = 0
+    for _ in range(args.queries):
+        lat, lon = rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+        category = rng.choice([None] + CATEGORIES)
+        started = time.perf_counter()
+        hits = index.query(lat, lon, args.radius, category=category, status="active", limit=50)
+        timings.append((time.perf_counter() - started) * 1e6)
+        results += len(hits)
+
+    timings.sort()
+    print(f"build index ({args.merchants} merchants): {build_ms:.1f} ms")
+    print(
+        f"{args.queries} queries, radius {args.radius:.0f} m: "
+        f"p50 {statistics.median(timings):.1f} us  p99 {timings[int(len(timings) * 0.99)]:.1f} us  "
+        f"avg hits {results / args.queries:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
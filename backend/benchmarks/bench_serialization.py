@@ -0,0 +1,88 @@
+"""List serialization benchmark: ORM objects through response_model versus column tuples.
+
+Both variants are served by a throwaway FastAPI app through httpx, so the
+numbers include FastAPI's response handling but no database work.
+
+    python -m backend.benchmarks.bench_serialization --items 50 200 500 --rounds 200
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import FastAPI
+
+from backend.app.models import Stamp
+from backend.app.schemas import StampPage, StampRead
+from backend.app.utils.serialization import FastJSONResponse, orjson, row_dicts, schema_columns
+
+STAMP_COLUMNS = schema_columns(Stamp, StampRead)
+
+
+def build_app(count: int) -> FastAPI:
+    started = datetime(2026, 10, 18, 12, 0)
+    values = [
+        {
+            "id": index,
+            "stamp_book_id": index // 10 + 1,
+            "merchant_id": index % 50 + 1,
+            "discount_amount": 1000.0,
+            "approval_method": "qr",
+            "photo_url": None,
+            "status": "pending",
+            "visit_at": started + timedelta(seconds=index),
+        }
+        for index in range(1, count + 1)
+    ]
+    stamps = [Stamp(**value) for value in values]
+    rows = [tuple(value[column.key] for column in STAMP_COLUMNS) for value in values]
+    app = FastAPI()
+
+    @app.get("/orm", response_model=StampPage)
+    async def orm_path():
+        return StampPage(items=stamps, next_cursor=None)
+
+    @app.get("/tuples", response_model=StampPage)
+    async def tuple_path():
+        return FastJSONResponse({"items": row_dicts(STAMP_COLUMNS, rows), "next_cursor": None})
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, rounds: int) -> float:
+    await client.get(path)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        response = await client.get(path)
+        response.raise_for_status()
+    return (time.perf_counter() - started) / rounds
+
+
+async def run(items, rounds: int) -> None:
+    print(f"json encoder: {'orjson' if orjson is not None else 'json (install orjson for the fast path)'}")
+    for count in items:
+        app = build_app(count)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            orm = await client.get("/orm")
+            fast = await client.get("/tuples")
+            assert orm.json() == fast.json()
+            orm_seconds = await measure(client, "/orm", rounds)
+            tuple_seconds = await measure(client, "/tuples", rounds)
+        print(
+            f"{count:>5} items: orm {orm_seconds * 1000:7.2f} ms ({orm_seconds / count * 1e6:5.1f} us/item)  "
+            f"tuples {tuple_seconds * 1000:7.2f} ms ({tuple_seconds / count * 1e6:5.1f} us/item)"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Settlement benchmark over synthetic approved stamps in a scratch SQLite database.
+
+    python -m backend.benchmarks.bench_settlement --stamps 10000000 --merchants 2000
+
+Seeding is timed separately; pass --reuse to settle an already seeded file.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.app.database import Base
+from backend.app.models import Merchant, MerchantContract, Performance, Stamp, StampBook, Transaction, User
+from backend.app.services.settlements import run_settlement
+
+PERIOD_START = datetime(2026, 10, 1)
+PERIOD_END = datetime(2026, 11, 1)
+BATCH = 50_000
+
+
+async def seed(engine, stamps: int, merchants: int, seed: int) -> None:
+    rng = random.Random(seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{"id": 1, "email": "bench@example.com", "hashed_password": "x"}])
+        await conn.execute(insert(Performance), [{"id": 1, "title": "Bench", "start_at": PERIOD_START}])
+        await conn.execute(insert(StampBook), [{"id": 1, "user_id": 1, "performance_id": 1}])
+        await conn.execute(
+            insert(Merchant), [{"id": m, "owner_id": 1, "name": f"m{m}"} for m in range(1, merchants + 1)]
+        )
+        await conn.execute(
+            insert(MerchantContract),
+            [
+                {
+                    "merchant_id": m,
+                    "start_at": PERIOD_START - timedelta(days=30),
+                    "fee_plan": rng.choice(["standard", "premium", "0.02"]),
+                    "discount_rate": rng.choice([0.05, 0.1]),
+                }
+                for m in range(1, merchants + 1)
+            ],
+        )
+
+    span = int((PERIOD_END - PERIOD_START).total_seconds())
+    for offset in range(0, stamps, BATCH):
+        size = min(BATCH, stamps - offset)
+        stamp_rows = [
+            {
+                "id": offset + i + 1,
+                "stamp_book_id": 1,
+                "merchant_id": rng.randint(1, merchants),
+                "visit_at": PERIOD_START + timedelta(seconds=rng.randrange(span)),
+                "discount_amount": rng.choice([None, 500.0, 1000.0]),
+                "status": "approved" if rng.random() < 0.9 else "pending",
+            }
+            for i in range(size)
+        ]
+        transaction_rows = [
+            {"stamp_id": row["id"], "amount": rng.randint(5, 80) * 1000, "payment_method": "card"}
+            for row in stamp_rows
+            if rng.random() < 0.7
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(Stamp), stamp_rows)
+            await conn.execute(insert(Transaction), transaction_rows)
+
+
+async def main_async(args) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{args.database}")
+    if not args.reuse:
+        started = time.perf_counter()
+        await seed(engine, args.stamps, args.merchants, args.seed)
+        print(f"seeded {args.stamps} stamps in {time.perf_counter() - started:.1f} s")
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        total = await session.scalar(select(func.count()).select_from(Stamp))
+
+    started = time.perf_counter()
+    results = await run_settlement(session_factory, PERIOD_START, PERIOD_END, concurrency=args.concurrency)
+    elapsed = time.perf_counter() - started
+    settled = sum(totals.stamp_count for totals in results.values())
+    print(
+        f"settled {len(results)} merchants / {settled} approved stamps (of {total}) in {elapsed:.1f} s "
+        f"({settled / elapsed:,.0f} stamps/s, concurrency {args.concurrency})"
+    )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stamps", type=int, default=10_000_000)
+    parser.add_argument("--merchants", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--database", default=os.path.join(os.getcwd(), "bench_settlement.db"))
+    parser.add_argument("--reuse", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Startup benchmark: import time of backend.app.main and first-request latency.
+
+Each sample runs in a fresh interpreter so module caches do not leak between
+runs. The database must already be migrated (``python -m backend.app.migrate``).
+
+    python -m backend.benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import asyncio, json, time
+started = time.perf_counter()
+import backend.app.main as main
+imported = time.perf_counter()
+
+async def first_request():
+    from httpx import AsyncClient
+    await main.on_startup()
+    try:
+        ready = time.perf_counter()
+        async with AsyncClient(app=main.app, base_url="http://bench") as client:
+            before = time.perf_counter()
+            response = await client.get("/health")
+            after = time.perf_counter()
+        assert response.status_code == 200
+    finally:
+        # stops the background workers started above and disposes the engines
+        await main.on_shutdown()
+    return ready, before, after
+
+ready, before, after = asyncio.run(first_request())
+print(json.dumps({
+    "import_s": imported - started,
+    "startup_hook_s": ready - imported,
+    "first_request_s": after - before,
+}))
+"""
+
+
+def sample() -> dict:
+    output = subprocess.run([sys.executable, "-c", PROBE], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    for key in ("import_s", "startup_hook_s", "first_request_s"):
+        values = [s[key] * 1000 for s in samples]
+        print(f"{key[:-2]:>15}: median {statistics.median(values):8.2f} ms  max {max(values):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Token verification benchmark: cached claims versus a full jwt.decode per request.
+
+    python -m backend.benchmarks.bench_token_verify --tokens 1000 --verifications 200000
+"""
+import argparse
+import random
+import time
+
+from jose import jwt
+
+from backend.app.core.config import get_settings
+from backend.app.core.security import create_access_token, reset_token_cache, verify_access_token
+
+
+def decode_every_time(token: str):
+    # the verification path before the claims cache: settings lookup plus a full decode
+    settings = get_settings()
+    payload = jwt.decode(token, settings.signing_keys[settings.active_kid], algorithms=["HS256"])
+    return payload.get("sub")
+
+
+def run(verify, tokens, order) -> float:
+    started = time.perf_counter()
+    for index in order:
+        verify(tokens[index])
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=1000, help="distinct active sessions")
+    parser.add_argument("--verifications", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    reset_token_cache()
+    rng = random.Random(args.seed)
+    tokens = [create_access_token(f"user{i}@example.com") for i in range(args.tokens)]
+    order = [rng.randrange(args.tokens) for _ in range(args.verifications)]
+    assert all(decode_every_time(token) == verify_access_token(token) for token in tokens)
+    reset_token_cache()
+
+    for name, verify in (("jwt.decode per request", decode_every_time), ("claims cache", verify_access_token)):
+        elapsed = run(verify, tokens, order)
+        print(
+            f"{name:<24} {args.verifications} verifications: {elapsed * 1000:.1f} ms  "
+            f"{elapsed / args.verifications * 1e6:.2f} us/op"
+        )
+
+
+if __name__ == "__main__":
+    main()
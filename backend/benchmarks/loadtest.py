@@ -0,0 +1,322 @@
+"""Mixed-traffic load test for the stamp network API.
+
+Seeds a scratch database with synthetic users, merchants, performances and
+QR tokens, then drives weighted traffic (login, issue book, add stamp,
+merchant approve, admin list) through the ASGI app in-process, or against a
+running server with ``--url``.
+
+    python -m backend.benchmarks.loadtest --database /tmp/load.db --duration 30 --concurrency 50
+    python -m backend.benchmarks.loadtest --database /tmp/load.db --no-seed --url http://127.0.0.1:8000
+
+Results (throughput and p50/p95/p99 per route) are printed and can be written
+to JSON. ``--write-baseline FILE`` records a baseline; ``--baseline FILE``
+compares against one and exits non-zero when a route's p95 regresses by more
+than ``--tolerance`` or any request failed. Percentiles only cover successful
+requests.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+PASSWORD = "load-test-password"
+API = "/api"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.requests: Dict[str, int] = defaultdict(int)
+        # successful requests only: a fast 500 must not flatter the percentiles
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, elapsed: float, ok: bool) -> None:
+        self.requests[route] += 1
+        if ok:
+            self.latencies[route].append(elapsed)
+        else:
+            self.errors[route] += 1
+
+    def summary(self, duration: float) -> Dict[str, dict]:
+        report = {}
+        for route, requests in sorted(self.requests.items()):
+            values = sorted(self.latencies[route])
+            errors = self.errors.get(route, 0)
+            report[route] = {
+                "requests": requests,
+                "errors": errors,
+                "error_rate": round(errors / requests, 4),
+                "throughput_rps": round(requests / duration, 2),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            }
+        return report
+
+
+async def seed(users: int, merchants: int, performances: int) -> dict:
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import insert
+
+    from backend.app.core.security import get_password_hash, hash_qr_token
+    from backend.app.database import engine
+    from backend.app.migrate import upgrade
+    from backend.app.models import Merchant, Performance, QRToken, User
+
+    await upgrade("head", engine)
+    hashed = get_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User),
+            [{"email": "admin@load.test", "hashed_password": hashed, "role": "admin", "is_active": True}]
+            + [
+                {"email": f"owner{i}@load.test", "hashed_password": hashed, "role": "merchant", "is_active": True}
+                for i in range(merchants)
+            ]
+            + [
+                {"email": f"user{i}@load.test", "hashed_password": hashed, "role": "user", "is_active": True}
+                for i in range(users)
+            ],
+        )
+        # ids follow insertion order on a fresh database: admin=1, owners=2..merchants+1
+        await conn.execute(
+            insert(Merchant),
+            [
+                {
+                    "owner_id": i + 2,
+                    "name": f"Merchant {i}",
+                    "category": random.choice(["cafe", "bar", "restaurant"]),
+                    "status": "active",
+                }
+                for i in range(merchants)
+            ],
+        )
+        await conn.execute(
+            insert(Performance),
+            [{"title": f"Performance {i}", "start_at": now + timedelta(days=i)} for i in range(performances)],
+        )
+        await conn.execute(
+            insert(QRToken),
+            [
+                {"merchant_id": i + 1, "token_hash": hash_qr_token(f"load-token-{i + 1}"), "usage_count": 0}
+                for i in range(merchants)
+            ],
+        )
+    return {"users": users, "merchants": merchants, "performances": performances}
+
+
+class VirtualUser:
+    def __init__(self, client, recorder: Recorder, rng: random.Random, config: dict):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.config = config
+        self.token: Optional[str] = None
+        self.stamp_books: List[int] = []
+
+    async def call(self, route: str, method: str, url: str, accepted=(200, 201), **kwargs):
+        headers = kwargs.pop("headers", {})
+        if self.token is not None:
+            headers["Authorization"] = f"Bearer {self.token}"
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        except Exception:
+            self.recorder.record(route, time.perf_counter() - started, False)
+            return None
+        self.recorder.record(route, time.perf_counter() - started, response.status_code in accepted)
+        return response
+
+    async def login(self, email: str) -> None:
+        self.token = None
+        response = await self.call(
+            "POST /auth/token", "POST", f"{API}/auth/token", data={"username": email, "password": PASSWORD}
+        )
+        if response is not None and response.status_code == 200:
+            self.token = response.json()["access_token"]
+
+
+class Fan(VirtualUser):
+    async def step(self) -> None:
+        roll = self.rng.random()
+        if self.token is None or roll < 0.05:
+            await self.login(f"user{self.rng.randrange(self.config['users'])}@load.test")
+            self.stamp_books = []
+        elif not self.stamp_books or roll < 0.25:
+            response = await self.call(
+                "POST /stamp-books/",
+                "POST",
+                f"{API}/stamp-books/",
+                accepted=(201, 400),
+                json={"performance_id": self.rng.randint(1, self.config["performances"])},
+            )
+            if response is not None and response.status_code == 201:
+                self.stamp_books.append(response.json()["id"])
+            elif not self.stamp_books:
+                listing = await self.call("GET /stamp-books/", "GET", f"{API}/stamp-books/")
+                if listing is not None and listing.status_code == 200:
+                    self.stamp_books = [book["id"] for book in listing.json()]
+        elif roll < 0.85:
+            merchant_id = self.rng.randint(1, self.config["merchants"])
+            await self.call(
+                "POST /stamp-books/{id}/stamps",
+                "POST",
+                f"{API}/stamp-books/{self.rng.choice(self.stamp_books)}/stamps",
+                json={"merchant_id": merchant_id, "qr_token": f"load-token-{merchant_id}", "discount_amount": 1000},
+            )
+        else:
+            await self.call("GET /stamp-books/", "GET", f"{API}/stamp-books/")
+
+
+class MerchantOwner(VirtualUser):
+    async def step(self) -> None:
+        if self.token is None:
+            await self.login(f"owner{self.rng.randrange(self.config['merchants'])}@load.test")
+            return
+        response = await self.call("GET /merchant/stamps/pending", "GET", f"{API}/merchant/stamps/pending")
+        if response is None or response.status_code != 200:
+            return
+        stamp_ids = [stamp["id"] for stamp in response.json()["items"]][:50]
+        if stamp_ids:
+            await self.call(
+                "POST /merchant/stamps/approve",
+                "POST",
+                f"{API}/merchant/stamps/approve",
+                json={"stamp_ids": stamp_ids},
+            )
+
+
+class Admin(VirtualUser):
+    async def step(self) -> None:
+        if self.token is None:
+            await self.login("admin@load.test")
+            return
+        await self.call("GET /admin/fraud-alerts", "GET", f"{API}/admin/fraud-alerts")
+
+
+async def drive(client, config: dict, concurrency: int, duration: float, seed: int) -> Recorder:
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+    # roughly 80% fans, 15% merchant terminals, 5% admins
+    kinds = [Fan] * 16 + [MerchantOwner] * 3 + [Admin]
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed + index)
+        user = kinds[index % len(kinds)](client, recorder, rng, config)
+        while time.perf_counter() < deadline:
+            await user.step()
+
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return recorder
+
+
+def compare(report: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for route, actual in report.items():
+        # accepted statuses are part of each call, so any error is a failure, baseline or not
+        if actual["errors"]:
+            regressions.append(f"{route}: {actual['errors']} of {actual['requests']} requests failed")
+    for route, expected in baseline.items():
+        actual = report.get(route)
+        if actual is None:
+            continue
+        limit = expected["p95_ms"] * (1 + tolerance)
+        if actual["p95_ms"] > limit:
+            regressions.append(
+                f"{route}: p95 {actual['p95_ms']} ms > {limit:.2f} ms (baseline {expected['p95_ms']} ms)"
+            )
+    return regressions
+
+
+async def main_async(args) -> int:
+    import httpx
+
+    config = {"users": args.users, "merchants": args.merchants, "performances": args.performances}
+    if not args.no_seed:
+        started = time.perf_counter()
+        await seed(**config)
+        print(f"seeded {config} in {time.perf_counter() - started:.1f} s")
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=30)
+    else:
+        from backend.app.main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=30)
+
+    async with client:
+        started = time.perf_counter()
+        recorder = await drive(client, config, args.concurrency, args.duration, args.seed)
+        elapsed = time.perf_counter() - started
+
+    report = recorder.summary(elapsed)
+    print(f"{'route':<34}{'reqs':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for route, stats in report.items():
+        print(
+            f"{route:<34}{stats['requests']:>8}{stats['errors']:>6}{stats['throughput_rps']:>9}"
+            f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+    if args.write_baseline:
+        failed = sorted(route for route, stats in report.items() if stats["errors"])
+        if failed:
+            print(f"not writing a baseline: requests failed on {', '.join(failed)}")
+            return 1
+        with open(args.write_baseline, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+        print(f"baseline written to {args.write_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", help="SQLite file to seed and use (sets DATABASE_URL)")
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--merchants", type=int, default=200)
+    parser.add_argument("--performances", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--write-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 regression (0.25 = +25%%)")
+    args = parser.parse_args()
+
+    if args.database:
+        # must happen before backend.app is imported; settings are read at import time
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.abspath(args.database)}"
+    if not args.url:
+        # in-process traffic all comes from one client address
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    random.seed(args.seed)
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()